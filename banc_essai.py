@@ -0,0 +1,270 @@
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import rss_max
+
+DOSSIER_BANCS = ".etat_hydroqc/bancs"
+# Tailles par défaut : heures de l'export horaire et périodes de facturation (comptes de 40 périodes).
+TAILLES_HORAIRES = (10_000, 100_000, 1_000_000)
+TAILLES_FACTURATION = (100, 1_000, 10_000)
+PERIODES_PAR_COMPTE = 40
+REPETITIONS = 3
+# Écart relatif au-delà duquel une durée ou un pic mémoire est signalé comme régression.
+SEUIL_REGRESSION = 0.20
+
+
+def _preparer_horaire(taille, dossier):
+    from donnees_synthetiques import generer_horaire
+
+    chemin = Path(dossier) / f"horaire_{taille}.csv"
+    generer_horaire(chemin, taille)
+    return {"csv": chemin}
+
+
+def _preparer_facturation(taille, dossier):
+    from donnees_synthetiques import generer_facturation
+    from tarification01 import nettoyer_consommation
+
+    nb_periodes = min(taille, PERIODES_PAR_COMPTE)
+    nb_comptes = max(1, taille // nb_periodes)
+    df = generer_facturation(nb_periodes, nb_comptes)
+    return {"df": nettoyer_consommation(df), "cle_compte": "Compte" if nb_comptes > 1 else None}
+
+
+def _ingestion(d):
+    from ingestion_horaire import lire_horaire_csv
+
+    d["df"] = lire_horaire_csv(d["csv"])
+    return len(d["df"])
+
+
+def _trous(d):
+    from qualite_donnees import analyser
+
+    df = d["df"].dropna(subset=["Datetime"]).sort_values("Datetime")
+    diff = df["Datetime"].diff().dt.total_seconds().div(3600)
+    d["trie"] = df.assign(diff=diff)
+    d["bilan"] = analyser(df)
+    return len(df)
+
+
+def _statistiques(d):
+    """Statistiques par colonne et cube, comme le rapport horaire sur la table chargée."""
+    from constantes import colonnes_mwh
+    from cube_agregats import CubeAgregats
+    from donneeHydroQC01 import DIMENSIONS_CUBE, statistiques_colonne
+    from ingestion_horaire import COLONNES_DERIVEES
+
+    df = d["trie"]
+    colonnes_source = [c for c in df.columns if c not in COLONNES_DERIVEES and c != "diff"]
+    for col in df[colonnes_source].select_dtypes(include=[np.number]).columns:
+        statistiques_colonne(col, df[col])
+    colonnes = [c for c in colonnes_mwh if c in df.columns]
+    d["cube"] = CubeAgregats.construire(df, DIMENSIONS_CUBE, colonnes)
+    return len(df)
+
+
+def _flux(d):
+    """Lecture par blocs du mode flux (accumulateurs, cube, horodatages, séries réduites) et statistiques par colonne."""
+    from donneeHydroQC01 import agreger_par_blocs, statistiques_colonne
+
+    _, accumulateurs, _, dates, _ = agreger_par_blocs(d["csv"])
+    for col, acc in accumulateurs.items():
+        statistiques_colonne(col, acc)
+    return len(dates)
+
+
+def _rendu(d):
+    from constantes import col_prod
+    from rendu_figures import SpecBoites, rendre_image, spec_histogramme
+
+    rendre_image(spec_histogramme(d["trie"][col_prod], "Distribution"))
+    etiquettes, stats = d["cube"].stats_boites(col_prod, "Heure")
+    rendre_image(SpecBoites("Distribution horaire", etiquettes, stats))
+    return len(d["trie"])
+
+
+def _simulation(d):
+    from tarification02 import simuler_tarifs
+
+    d["simule"] = simuler_tarifs(d["df"].copy())
+    return len(d["df"])
+
+
+def _expansion(d):
+    import tarification03
+
+    d["dfj"] = tarification03.developper_journalier(d["df"], cle_compte=d["cle_compte"])
+    return len(d["dfj"])
+
+
+def _projection(d):
+    from tarification03 import projeter
+
+    dfj = d["dfj"]
+    if d["cle_compte"] is not None:
+        # Le profil historique est celui d'un compte : la projection porte sur le premier.
+        dfj = dfj[dfj[d["cle_compte"]] == dfj[d["cle_compte"]].iloc[0]]
+    projeter(dfj)
+    return len(dfj)
+
+
+def _graphiques(d):
+    import plotly.express as px
+
+    from paquet_plotly import PaquetPlotly
+    from regression import ajouter_droites
+
+    df = d["simule"]
+    fig = ajouter_droites(px.scatter(df, x="Température moyenne (°C)", y="kWh"))
+    PaquetPlotly().preparer(fig)
+    return len(df)
+
+
+# Étapes dans l'ordre d'exécution : famille de données et fonction (retourne le nombre de lignes traitées).
+# Chaque étape réutilise les résultats des précédentes de la même famille, calculés pendant la mesure.
+ETAPES = {
+    "ingestion": ("horaire", _ingestion),
+    "trous": ("horaire", _trous),
+    "statistiques": ("horaire", _statistiques),
+    "flux": ("horaire", _flux),
+    "rendu": ("horaire", _rendu),
+    "simulation": ("facturation", _simulation),
+    "expansion": ("facturation", _expansion),
+    "projection": ("facturation", _projection),
+    "graphiques": ("facturation", _graphiques),
+}
+PREPARATIONS = {"horaire": _preparer_horaire, "facturation": _preparer_facturation}
+
+
+def mesurer(fonction, donnees, repetitions=REPETITIONS):
+    """Meilleure durée (murale et CPU) sur `repetitions` exécutions, puis pic d'allocation sous tracemalloc.
+
+    tracemalloc ralentit le code : le pic mémoire est mesuré lors d'une
+    exécution séparée, non chronométrée.
+    """
+    durees, durees_cpu = [], []
+    for _ in range(repetitions):
+        debut, debut_cpu = time.perf_counter(), time.process_time()
+        nb_lignes = fonction(donnees)
+        durees.append(time.perf_counter() - debut)
+        durees_cpu.append(time.process_time() - debut_cpu)
+    tracemalloc.start()
+    try:
+        fonction(donnees)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss = rss_max()
+    return {"lignes": nb_lignes, "secondes": min(durees), "secondes_cpu": min(durees_cpu),
+            "memoire_pic_mio": pic / 2 ** 20, "rss_max_mio": None if rss is None else rss / 2 ** 20}
+
+
+def executer_banc(tailles_horaires=TAILLES_HORAIRES, tailles_facturation=TAILLES_FACTURATION, etapes=None,
+                  repetitions=REPETITIONS, afficher=True):
+    """Mesure chaque étape à chaque taille et retourne la liste des résultats."""
+    etapes = list(etapes or ETAPES)
+    tailles = {"horaire": tailles_horaires, "facturation": tailles_facturation}
+    resultats = []
+    with tempfile.TemporaryDirectory(prefix="banc_hydroqc_") as dossier:
+        for famille, preparer in PREPARATIONS.items():
+            chaine = [nom for nom, (f, _) in ETAPES.items() if f == famille]
+            a_mesurer = [nom for nom in chaine if nom in etapes]
+            if not a_mesurer:
+                continue
+            chaine = chaine[:chaine.index(a_mesurer[-1]) + 1]
+            for taille in tailles[famille]:
+                donnees = preparer(taille, dossier)
+                for nom in chaine:
+                    fonction = ETAPES[nom][1]
+                    if nom not in a_mesurer:
+                        # Étape non demandée mais nécessaire aux suivantes : exécutée sans mesure.
+                        fonction(donnees)
+                        continue
+                    resultat = {"etape": nom, "taille": taille, **mesurer(fonction, donnees, repetitions)}
+                    resultats.append(resultat)
+                    if afficher:
+                        print(f"{nom:<14} {taille:>10} {resultat['secondes']:>9.3f} s "
+                              f"{resultat['memoire_pic_mio']:>9.1f} Mio")
+    return resultats
+
+
+def _versions():
+    versions = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__}
+    for nom in ("matplotlib", "plotly", "pyarrow"):
+        try:
+            versions[nom] = __import__(nom).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def enregistrer(resultats, dossier=DOSSIER_BANCS):
+    """Écrit les résultats et leur contexte (machine, versions) dans un fichier JSON horodaté."""
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    maintenant = datetime.now()
+    chemin = dossier / f"banc-{maintenant:%Y%m%d-%H%M%S}.json"
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump({
+            "horodatage": maintenant.isoformat(timespec="seconds"),
+            "machine": {"systeme": platform.platform(), "processeur": platform.machine()},
+            "versions": _versions(),
+            "resultats": resultats,
+        }, f, indent=1, ensure_ascii=False)
+    return chemin
+
+
+def dernier_banc(dossier=DOSSIER_BANCS, sauf=None):
+    bancs = sorted(p for p in Path(dossier).glob("banc-*.json") if p != sauf)
+    return bancs[-1] if bancs else None
+
+
+def comparer(resultats, reference, seuil=SEUIL_REGRESSION):
+    """Régressions par rapport à un banc de référence (chemin JSON) : durée ou pic mémoire au-delà du seuil."""
+    with open(reference, encoding="utf-8") as f:
+        precedents = {(r["etape"], r["taille"]): r for r in json.load(f)["resultats"]}
+    regressions = []
+    for r in resultats:
+        ref = precedents.get((r["etape"], r["taille"]))
+        if ref is None:
+            continue
+        for mesure in ("secondes", "memoire_pic_mio"):
+            if ref[mesure] > 0 and r[mesure] > ref[mesure] * (1 + seuil):
+                regressions.append({"etape": r["etape"], "taille": r["taille"], "mesure": mesure,
+                                    "reference": ref[mesure], "valeur": r[mesure]})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai des étapes de traitement Hydro-Québec")
+    parser.add_argument("--horaire", type=int, nargs="+", default=TAILLES_HORAIRES, help="Tailles (heures)")
+    parser.add_argument("--facturation", type=int, nargs="+", default=TAILLES_FACTURATION, help="Tailles (périodes)")
+    parser.add_argument("--etapes", nargs="+", choices=list(ETAPES), default=None)
+    parser.add_argument("-r", "--repetitions", type=int, default=REPETITIONS)
+    parser.add_argument("--reference", default=None,
+                        help="Banc JSON de référence (défaut : le plus récent de " + DOSSIER_BANCS + ")")
+    parser.add_argument("--seuil", type=float, default=SEUIL_REGRESSION)
+    args = parser.parse_args()
+
+    print(f"{'étape':<14} {'taille':>10} {'durée':>11} {'pic':>13}")
+    resultats = executer_banc(args.horaire, args.facturation, args.etapes, args.repetitions)
+    chemin = enregistrer(resultats)
+    print(f"✅ Résultats enregistrés : {chemin}")
+    reference = args.reference or dernier_banc(sauf=chemin)
+    if reference:
+        regressions = comparer(resultats, reference, args.seuil)
+        for r in regressions:
+            print(f"❌ {r['etape']} ({r['taille']}) : {r['mesure']} {r['reference']:.3f} → {r['valeur']:.3f}")
+        if not regressions:
+            print(f"✅ Aucune régression par rapport à {reference}")
+        raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,150 @@
+import dataclasses
+import functools
+import hashlib
+import inspect
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DOSSIER_CACHE_FIGURES = ".cache_figures"
+TAILLE_MAX_CACHE_FIGURES = 200 * 2 ** 20
+VERSION_CACHE_FIGURES = 3
+
+
+@functools.lru_cache(maxsize=None)
+def _versions_bibliotheques():
+    versions = [f"cache={VERSION_CACHE_FIGURES}", f"numpy={np.__version__}", f"pandas={pd.__version__}"]
+    for nom in ("matplotlib", "plotly"):
+        try:
+            module = __import__(nom)
+            versions.append(f"{nom}={module.__version__}")
+        except ImportError:
+            pass
+    return "|".join(versions)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_classe(classe):
+    try:
+        return inspect.getsource(classe)
+    except (OSError, TypeError):
+        return classe.__qualname__
+
+
+def _hacher(h, objet):
+    if isinstance(objet, (pd.DataFrame, pd.Series)):
+        noms = list(objet.columns) if isinstance(objet, pd.DataFrame) else [objet.name]
+        h.update(repr((type(objet).__name__, objet.shape, noms, [str(t) for t in np.atleast_1d(objet.dtypes)]))
+                 .encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(objet, index=True).to_numpy().tobytes())
+    elif isinstance(objet, np.ndarray):
+        h.update(repr((objet.dtype.str, objet.shape)).encode("utf-8"))
+        if objet.dtype.kind == "O":
+            h.update(pd.util.hash_array(objet.ravel()).tobytes())
+        else:
+            h.update(np.ascontiguousarray(objet).tobytes())
+    elif dataclasses.is_dataclass(objet) and not isinstance(objet, type):
+        h.update(_source_classe(type(objet)).encode("utf-8"))
+        for champ in dataclasses.fields(objet):
+            h.update(champ.name.encode("utf-8"))
+            _hacher(h, getattr(objet, champ.name))
+    elif isinstance(objet, dict):
+        h.update(b"{")
+        for cle, valeur in objet.items():
+            _hacher(h, cle)
+            _hacher(h, valeur)
+        h.update(b"}")
+    elif isinstance(objet, (list, tuple)):
+        h.update(b"[")
+        for valeur in objet:
+            _hacher(h, valeur)
+        h.update(b"]")
+    else:
+        h.update(repr((type(objet).__name__, objet)).encode("utf-8"))
+
+
+class CacheFigures:
+    """Cache disque des figures rendues, indexé par le contenu de leurs données et paramètres.
+
+    La clé est un hachage SHA-256 des données, des paramètres et des versions
+    des bibliothèques de rendu. Chaque entrée est un fichier; une relecture
+    rafraîchit sa date de modification et, au-delà de `taille_max` octets,
+    les entrées les moins récemment utilisées sont supprimées.
+    """
+
+    def __init__(self, dossier=DOSSIER_CACHE_FIGURES, taille_max=TAILLE_MAX_CACHE_FIGURES):
+        self.dossier = Path(dossier)
+        self.taille_max = taille_max
+        self.succes = 0
+        self.echecs = 0
+        self._verrou = threading.Lock()
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        self._taille = sum(f.stat().st_size for f in self.dossier.glob("*.bin"))
+
+    def cle(self, *parametres):
+        h = hashlib.sha256(_versions_bibliotheques().encode("utf-8"))
+        _hacher(h, parametres)
+        return h.hexdigest()
+
+    def _chemin(self, cle):
+        return self.dossier / f"{cle}.bin"
+
+    def contient(self, cle):
+        return self._chemin(cle).exists()
+
+    def obtenir(self, cle):
+        """Octets mis en cache pour `cle`, ou None (compté comme succès ou échec)."""
+        chemin = self._chemin(cle)
+        try:
+            donnees = chemin.read_bytes()
+        except FileNotFoundError:
+            self.compter(succes=False)
+            return None
+        os.utime(chemin)
+        self.compter(succes=True)
+        return donnees
+
+    def compter(self, succes):
+        with self._verrou:
+            if succes:
+                self.succes += 1
+            else:
+                self.echecs += 1
+
+    def enregistrer(self, cle, donnees):
+        chemin = self._chemin(cle)
+        temporaire = chemin.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temporaire.write_bytes(donnees)
+        with self._verrou:
+            if chemin.exists():
+                self._taille -= chemin.stat().st_size
+            os.replace(temporaire, chemin)
+            self._taille += len(donnees)
+            if self._taille > self.taille_max:
+                self._evincer()
+
+    def _evincer(self):
+        entrees = sorted((f.stat().st_mtime_ns, f.stat().st_size, f) for f in self.dossier.glob("*.bin"))
+        self._taille = sum(taille for _, taille, _ in entrees)
+        for _, taille, chemin in entrees:
+            if self._taille <= self.taille_max:
+                break
+            chemin.unlink(missing_ok=True)
+            self._taille -= taille
+
+    def memoiser(self, cle, produire):
+        """Retourne l'entrée `cle` du cache, ou la produit avec `produire()` (octets) et l'enregistre."""
+        donnees = self.obtenir(cle)
+        if donnees is None:
+            donnees = produire()
+            self.enregistrer(cle, donnees)
+        return donnees
+
+    def resume(self):
+        total = self.succes + self.echecs
+        taux = f" ({self.succes / total:.0%} réutilisées)" if total else ""
+        return (f"Cache des figures : {self.succes} succès, {self.echecs} échec(s){taux}, "
+                f"{self._taille / 2 ** 20:.1f} Mio sur disque")
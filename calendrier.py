@@ -0,0 +1,152 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from types_compacts import SAISONS
+
+# Saisons météorologiques (mois entiers), utilisées pour les données horaires.
+SAISONS_PAR_MOIS = {
+    12: "Hiver", 1: "Hiver", 2: "Hiver",
+    3: "Printemps", 4: "Printemps", 5: "Printemps",
+    6: "Été", 7: "Été", 8: "Été",
+    9: "Automne", 10: "Automne", 11: "Automne"
+}
+# Saisons astronomiques : début de chaque saison (mois × 100 + jour), dates fixes des solstices et équinoxes.
+DEBUTS_SAISONS = {"Printemps": 320, "Été": 621, "Automne": 922, "Hiver": 1221}
+# Température de référence des degrés-jours de chauffage (°C).
+BASE_DEGRES_JOURS = 18.0
+
+
+def _paques(annees):
+    """Date de Pâques (calendrier grégorien, algorithme de Meeus) de chaque année."""
+    a = annees % 19
+    b, c = annees // 100, annees % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mois = (h + l - 7 * m + 114) // 31
+    jour = (h + l - 7 * m + 114) % 31 + 1
+    return pd.to_datetime(pd.DataFrame({"year": annees, "month": mois, "day": jour}))
+
+
+def _lundi(annees, mois, jour, rang):
+    """Le `rang`-ième lundi à partir du jour donné (rang négatif : lundis précédant ce jour)."""
+    depart = pd.to_datetime(pd.DataFrame({"year": annees, "month": mois, "day": jour}))
+    if rang > 0:
+        return depart + pd.to_timedelta((7 - depart.dt.dayofweek) % 7 + 7 * (rang - 1), unit="D")
+    return depart - pd.to_timedelta((depart.dt.dayofweek - 1) % 7 + 1 + 7 * (-rang - 1), unit="D")
+
+
+def jours_feries(annees):
+    """Jours fériés du Québec (date → nom) des années données, sans report des congés tombant une fin de semaine."""
+    annees = pd.Series(np.asarray(annees, dtype=np.int64))
+    paques = _paques(annees)
+
+    def fixe(mois, jour):
+        return pd.to_datetime(pd.DataFrame({"year": annees, "month": mois, "day": jour}))
+
+    feries = {
+        "Jour de l'An": fixe(1, 1),
+        "Vendredi saint": paques - pd.Timedelta(days=2),
+        "Lundi de Pâques": paques + pd.Timedelta(days=1),
+        "Journée nationale des patriotes": _lundi(annees, 5, 25, -1),
+        "Fête nationale": fixe(6, 24),
+        "Fête du Canada": fixe(7, 1),
+        "Fête du Travail": _lundi(annees, 9, 1, 1),
+        "Action de grâce": _lundi(annees, 10, 1, 2),
+        "Noël": fixe(12, 25),
+    }
+    return pd.concat([pd.Series(nom, index=pd.DatetimeIndex(dates)) for nom, dates in feries.items()]).sort_index()
+
+
+@lru_cache(maxsize=8)
+def _calendrier_annees(premiere, derniere):
+    dates = pd.date_range(f"{premiere}-01-01", f"{derniere}-12-31", freq="D", name="date")
+    mois, jour_mois = dates.month.to_numpy(), dates.day.to_numpy()
+    code = mois * 100 + jour_mois
+    astronomique = np.select(
+        [(code >= DEBUTS_SAISONS["Hiver"]) | (code < DEBUTS_SAISONS["Printemps"]),
+         code < DEBUTS_SAISONS["Été"], code < DEBUTS_SAISONS["Automne"]],
+        ["Hiver", "Printemps", "Été"], "Automne")
+    par_mois = np.array([SAISONS_PAR_MOIS[m] for m in range(1, 13)])[mois - 1]
+    feries = jours_feries(range(premiere, derniere + 1)).reindex(dates)
+
+    return pd.DataFrame({
+        "année": dates.year.to_numpy().astype(np.int16),
+        "mois": pd.Categorical(dates.strftime("%Y-%m")),
+        "jour": dates.dayofyear.to_numpy().astype(np.int16),
+        "Saison": pd.Categorical(astronomique, categories=SAISONS),
+        "Saison météo": pd.Categorical(par_mois, categories=SAISONS),
+        "Férié": feries.notna().to_numpy(),
+        "Jour férié": pd.Categorical(feries.to_numpy()),
+    }, index=dates)
+
+
+def table_calendrier(debut, fin, periodes=None, base_degres_jours=BASE_DEGRES_JOURS,
+                     colonne_debut="Date de début", colonne_jours="Jour",
+                     colonne_temperature="Température moyenne (°C)"):
+    """Table indexée par date (une ligne par jour, années entières couvrant `debut` à `fin`).
+
+    Colonnes : année, mois (AAAA-MM), jour de l'année, Saison (astronomique),
+    Saison météo (par mois), Férié et Jour férié. La partie calendaire est
+    calculée une fois par plage d'années puis réutilisée : elle ne doit pas
+    être modifiée. Avec `periodes` (périodes de facturation d'un même
+    compte, sans chevauchement), s'y ajoutent la période de chaque jour
+    (Période : rang dans `periodes`, -1 hors période), son Intervalle et les
+    Degrés-jours de chauffage tirés de la température moyenne de la période.
+    """
+    table = _calendrier_annees(pd.Timestamp(debut).year, pd.Timestamp(fin).year)
+    if periodes is None:
+        return table
+
+    table = table.copy()
+    debuts = pd.to_datetime(periodes[colonne_debut]).to_numpy(dtype="datetime64[D]")
+    jours = pd.to_numeric(periodes[colonne_jours], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    ordre = np.argsort(debuts, kind="stable")
+    dates = table.index.to_numpy(dtype="datetime64[D]")
+    candidate = ordre[np.clip(np.searchsorted(debuts[ordre], dates, side="right") - 1, 0, None)]
+    membre = (dates >= debuts[candidate]) & (dates < debuts[candidate] + jours[candidate])
+    rang = np.where(membre, candidate, -1)
+
+    table["Période"] = rang.astype(np.int32)
+    if "Intervalle" in periodes.columns:
+        intervalles = periodes["Intervalle"].to_numpy()
+        table["Intervalle"] = pd.Categorical(np.where(membre, intervalles[candidate], None))
+    temperature = pd.to_numeric(periodes[colonne_temperature], errors="coerce").to_numpy(dtype=float)
+    table["Degrés-jours"] = np.where(membre, np.clip(base_degres_jours - temperature[candidate], 0, None), np.nan)
+    return table
+
+
+def joindre_calendrier(dates, colonnes=None, table=None):
+    """Colonnes du calendrier alignées sur `dates` (série ou tableau de dates, heures ignorées).
+
+    La ligne de chaque date est trouvée par son décalage en jours depuis le
+    début de la table, sans recherche ni fonction par ligne. Sans `table`,
+    la table couvrant les années de `dates` est utilisée; les dates
+    manquantes ou hors de la table donnent des valeurs manquantes.
+    """
+    jours = pd.DatetimeIndex(dates).to_numpy(dtype="datetime64[D]")
+    valides = ~np.isnat(jours)
+    if table is None:
+        if valides.any():
+            table = table_calendrier(jours[valides].min(), jours[valides].max())
+        else:
+            table = _calendrier_annees(2000, 2000)
+    colonnes = list(table.columns if colonnes is None else colonnes)
+
+    origine = table.index[0].to_datetime64().astype("datetime64[D]")
+    positions = np.full(jours.size, -1, dtype=np.int64)
+    positions[valides] = (jours[valides] - origine).astype(np.int64)
+    positions[(positions < 0) | (positions >= len(table))] = -1
+
+    index = dates.index if isinstance(dates, pd.Series) else None
+    if (positions >= 0).all():
+        resultat = table[colonnes].iloc[positions]
+        resultat.index = index if index is not None else pd.RangeIndex(len(positions))
+        return resultat
+    return table[colonnes].reset_index(drop=True).reindex(positions).set_axis(
+        index if index is not None else pd.RangeIndex(len(positions)))
@@ -0,0 +1,20 @@
+# Colonnes de l'export horaire d'Hydro-Québec (volumes en MWh).
+col_prod = "= Production brute des centrales d'HQP (MWh)"
+colonnes_mwh = [
+    "= Production brute des centrales d'HQP (MWh)",
+    "- Consommation des centrales d'HQP (MWh)",
+    "+ Électricité reçue par HQP aux points de raccordement des centrales et des interconnexions (MWh)",
+    "+ Consommation attribuable à la puissance interruptible mise à la disposition d'HQP majorée des pertes de transport (MWh)",
+    "= Volume d'électricité fournie par les ressources du Producteur (MWh)",
+    "- Volume des engagements du Producteur envers des tiers (MWh)",
+    "= Volume d'électricité fournie par le Producteur au Distributeur (MWh)",
+    "- Volume des approvisionnements hors patrimoniaux provenant d'HQP (MWh)",
+    "= Volume d'électricité mobilisée par le Distributeur au titre de l'électricité patrimoniale (MWh)",
+    "Volume d'électricité patrimoniale (bâtonnets affectés) (MWh)",
+    "Volume d'électricité mobilisée par le Distributeur en dépassement de l'électricité patrimoniale (MWh)"
+]
+
+# Tarif D : prix de la première tranche et du reste ($/kWh), seuil de la première tranche (kWh par jour).
+TARIF_BASE = 0.06905
+TARIF_HAUT = 0.10652
+KWH_PAR_JOUR_TARIF_BASE = 40
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from rendu_figures import etiquette_groupe
+
+
+def etendre_bords(bords, bas, haut):
+    """Bords réguliers couvrant [bas, haut] : l'étendue est doublée (bacs deux fois plus larges) tant qu'il le faut.
+
+    Avec un nombre pair de bacs, chaque ancien bac tombe entier dans un
+    nouveau bac : les comptes reportés restent exacts.
+    """
+    debut, fin = bords[0], bords[-1]
+    if bas >= debut and haut <= fin:
+        return bords
+    while bas < debut or haut > fin:
+        if bas < debut:
+            debut -= fin - debut
+        else:
+            fin += fin - debut
+    return np.linspace(debut, fin, len(bords))
+
+
+def _reporter(histogrammes, bords, nouveaux_bords):
+    """Histogrammes (groupes × bacs) reportés sur des bords élargis par `etendre_bords`."""
+    if len(bords) == len(nouveaux_bords) and np.array_equal(bords, nouveaux_bords):
+        return histogrammes
+    centres = (bords[:-1] + bords[1:]) / 2
+    cibles = np.clip(np.searchsorted(nouveaux_bords, centres, side="right") - 1, 0, len(nouveaux_bords) - 2)
+    resultat = np.zeros((histogrammes.shape[0], len(nouveaux_bords) - 1), dtype=histogrammes.dtype)
+    np.add.at(resultat, (slice(None), cibles), histogrammes)
+    return resultat
+
+
+class CubeAgregats:
+    """Agrégats par groupe (nombre, somme, min, max et histogramme) calculés en une passe.
+
+    Les histogrammes partagent des bords réguliers par colonne et servent de
+    croquis de quantiles fusionnables : l'erreur sur un quantile est d'au plus
+    la largeur d'un bac. Des valeurs hors des bords (nouvelles lignes d'un
+    cube fusionné) élargissent les bacs plutôt que d'être rangées dans les
+    bacs extrêmes, ce qui garde la borne vraie. Toute agrégation plus
+    grossière (par année, par saison, par heure…) se calcule à partir du
+    cube, sans relire les lignes.
+    """
+
+    def __init__(self, dimensions, mesures, bords, histogrammes):
+        self.dimensions = list(dimensions)
+        self.mesures = mesures
+        self.bords = bords
+        self.histogrammes = histogrammes
+
+    @classmethod
+    def construire(cls, df, dimensions, colonnes, nb_bacs=128, bords=None):
+        """Construit le cube; `bords` part de ceux d'un cube existant (pour fusionner), élargis au besoin."""
+        dimensions = list(dimensions)
+        d = df.dropna(subset=dimensions)
+        groupes = d.groupby(dimensions, sort=True, observed=True)
+        codes = groupes.ngroup().to_numpy()
+        nb_groupes = groupes.ngroups
+
+        agregats = groupes[list(colonnes)].agg(["count", "sum", "min", "max"])
+        agregats = agregats.rename(columns={"count": "nombre", "sum": "somme"}, level=1)
+
+        bords = dict(bords or {})
+        histogrammes = {}
+        for col in colonnes:
+            valeurs = d[col].to_numpy(dtype=float)
+            valides = np.isfinite(valeurs)
+            if col in bords:
+                if valides.any():
+                    bords[col] = etendre_bords(bords[col], valeurs[valides].min(), valeurs[valides].max())
+            else:
+                bas, haut = (valeurs[valides].min(), valeurs[valides].max()) if valides.any() else (0.0, 1.0)
+                if haut <= bas:
+                    haut = bas + 1.0
+                bords[col] = np.linspace(bas, haut, nb_bacs + 1)
+            nb = len(bords[col]) - 1
+            bacs = np.clip(np.searchsorted(bords[col], valeurs[valides], side="right") - 1, 0, nb - 1)
+            histogrammes[col] = np.bincount(codes[valides] * nb + bacs, minlength=nb_groupes * nb) \
+                .reshape(nb_groupes, nb).astype(np.uint32)
+        return cls(dimensions, agregats, bords, histogrammes)
+
+    @property
+    def colonnes(self):
+        return list(self.histogrammes)
+
+    def fusionner(self, autre):
+        """Cube combinant deux cubes de mêmes dimensions, sur les bords les plus larges des deux.
+
+        Les histogrammes de chaque cube sont ajoutés directement aux lignes de
+        leurs groupes dans le cube résultat, sans copie empilée intermédiaire.
+        """
+        empiles = CubeAgregats(self.dimensions, pd.concat([self.mesures, autre.mesures]), self.bords, {})
+        codes, mesures = empiles._mesures_regroupees(self.dimensions)
+        codes = (codes[:len(self.mesures)], codes[len(self.mesures):])
+        bords, histogrammes = {}, {}
+        for col in self.colonnes:
+            bords[col] = etendre_bords(self.bords[col], autre.bords[col][0], autre.bords[col][-1])
+            parties = [_reporter(cube.histogrammes[col], cube.bords[col], bords[col]) for cube in (self, autre)]
+            cumul = np.zeros((len(mesures), len(bords[col]) - 1),
+                             dtype=np.promote_types(parties[0].dtype, parties[1].dtype))
+            for lignes, histo in zip(codes, parties):
+                # Chaque groupe n'apparaît qu'une fois par cube : l'addition indexée est exacte.
+                cumul[lignes] += histo
+            histogrammes[col] = cumul
+        return CubeAgregats(self.dimensions, mesures, bords, histogrammes)
+
+    def _mesures_regroupees(self, par):
+        """(code de groupe de chaque ligne, mesures regroupées selon `par`)."""
+        groupes = self.mesures.groupby(level=par, sort=True)
+        parties = {
+            stat: getattr(self.mesures.xs(stat, axis=1, level=1).groupby(level=par, sort=True), operation)()
+            for stat, operation in (("nombre", "sum"), ("somme", "sum"), ("min", "min"), ("max", "max"))
+        }
+        return groupes.ngroup().to_numpy(), pd.concat(parties, axis=1).swaplevel(axis=1)[self.mesures.columns]
+
+    def _regrouper(self, par):
+        par = [par] if isinstance(par, str) else list(par)
+        codes, mesures = self._mesures_regroupees(par)
+        histogrammes = {}
+        for col, histo in self.histogrammes.items():
+            cumul = np.zeros((len(mesures), histo.shape[1]), dtype=np.uint64)
+            np.add.at(cumul, codes, histo)
+            histogrammes[col] = cumul
+        return CubeAgregats(par, mesures, self.bords, histogrammes)
+
+    def cumuler(self, par):
+        """Cube agrégé sur un sous-ensemble des dimensions."""
+        return self._regrouper(par)
+
+    def filtrer(self, **conditions):
+        """Cube restreint aux groupes dont les dimensions valent les valeurs données."""
+        masque = np.ones(len(self.mesures), dtype=bool)
+        for dimension, valeur in conditions.items():
+            masque &= self.mesures.index.get_level_values(dimension) == valeur
+        return CubeAgregats(self.dimensions, self.mesures[masque], self.bords,
+                            {col: h[masque] for col, h in self.histogrammes.items()})
+
+    def sommes(self, colonne, par):
+        return self.cumuler(par).mesures[(colonne, "somme")]
+
+    def quantiles(self, colonne, par, probabilites=(0.25, 0.5, 0.75)):
+        """Quantiles approchés par interpolation dans les histogrammes, bornés par les min/max exacts."""
+        cube = self.cumuler(par)
+        histo = cube.histogrammes[colonne].astype(float)
+        cumul = np.cumsum(histo, axis=1)
+        total = cumul[:, -1:]
+        bords = self.bords[colonne]
+        resultat = {}
+        for p in probabilites:
+            rang = p * total
+            bac = np.minimum((cumul < rang).sum(axis=1), histo.shape[1] - 1)
+            lignes = np.arange(len(bac))
+            avant = np.where(bac > 0, cumul[lignes, bac - 1], 0.0)
+            fraction = np.divide(rang[:, 0] - avant, histo[lignes, bac], out=np.zeros(len(bac)),
+                                 where=histo[lignes, bac] > 0)
+            valeur = bords[bac] + fraction * (bords[bac + 1] - bords[bac])
+            resultat[p] = np.clip(valeur, cube.mesures[(colonne, "min")], cube.mesures[(colonne, "max")])
+        return pd.DataFrame(resultat, index=cube.mesures.index)
+
+    def stats_boites(self, colonne, par):
+        """Statistiques de boîtes à moustaches au format de `rendu_figures.stats_boites`, tirées des histogrammes.
+
+        Quartiles et moustaches sont exacts à un bac près; une moustache vaut
+        le min (max) exact quand aucune valeur n'est au-delà de 1,5 × IQR.
+        Les valeurs au-delà sont comptées dans les histogrammes (`aberrants`,
+        à un bac près) et seuls le min et le max, valeurs réelles, sont
+        tracés comme points aberrants.
+        """
+        cube = self.cumuler(par)
+        quartiles = self.quantiles(colonne, par)
+        minimum = cube.mesures[(colonne, "min")].to_numpy(dtype=float)
+        maximum = cube.mesures[(colonne, "max")].to_numpy(dtype=float)
+        q1, med, q3 = (quartiles[p].to_numpy() for p in (0.25, 0.5, 0.75))
+        bas, haut = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+
+        histo = cube.histogrammes[colonne]
+        bords = self.bords[colonne]
+        # Bacs entièrement au-delà des bornes : toutes leurs valeurs sont aberrantes.
+        dessous = bords[1:] <= bas[:, None]
+        dessus = bords[:-1] > haut[:, None]
+        dedans = (histo > 0) & ~dessous & ~dessus
+        premier = dedans.argmax(axis=1)
+        dernier = histo.shape[1] - 1 - dedans[:, ::-1].argmax(axis=1)
+        whislo = np.where(minimum < bas, np.maximum(bas, bords[premier]), minimum)
+        whishi = np.where(maximum > haut, np.minimum(haut, bords[dernier + 1]), maximum)
+        # Valeurs aberrantes : bacs au-delà des bornes, et part du bac qui contient la borne (interpolée).
+        largeurs = np.diff(bords)
+        part_dessous = np.clip((bas[:, None] - bords[:-1]) / largeurs, 0, 1)
+        part_dessus = np.clip((bords[1:] - haut[:, None]) / largeurs, 0, 1)
+        aberrants = np.maximum(np.rint((histo * part_dessous).sum(axis=1)), minimum < bas) + \
+            np.maximum(np.rint((histo * part_dessus).sum(axis=1)), maximum > haut)
+
+        stats = [
+            {"q1": q1[i], "med": med[i], "q3": q3[i], "whislo": whislo[i], "whishi": whishi[i],
+             "fliers": np.array([v for v, hors in ((minimum[i], minimum[i] < bas[i]), (maximum[i], maximum[i] > haut[i]))
+                                 if hors]),
+             "aberrants": int(aberrants[i])}
+            for i in range(len(quartiles))
+        ]
+        return [etiquette_groupe(v) for v in quartiles.index], stats
@@ -1,205 +1,283 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-import io
-import base64
 import plotly.graph_objs as go
-import plotly.io as pio
-
-
-fichier = "historique-production-consommation-ec-horaire.csv"
-df = pd.read_csv(fichier, encoding="latin1", sep=",")
-
-df.columns = df.columns.str.encode('latin1').str.decode('utf-8').str.strip()
-
-rapport_html = "<html><head><meta charset='utf-8'><title>Analyse Hydro-Québec</title></head><body>"
-rapport_html += "<h1>Rapport d'analyse des données de production et consommation (Hydro-Québec)</h1>"
-
-colonnes_numeriques = df.select_dtypes(include=[np.number]).columns.tolist()
-
-for col in df.columns:
-    rapport_html += f"<h2>{col}</h2>"
-    if col in colonnes_numeriques:
-        minimum = df[col].min()
-        maximum = df[col].max()
-        quantiles = df[col].quantile([0.25, 0.5, 0.75]).to_dict()
-        rapport_html += f"<p>Min: {minimum}, Max: {maximum}</p>"
-        rapport_html += "<ul>" + "".join([f"<li>{int(k*100)}%: {v}</li>" for k, v in quantiles.items()]) + "</ul>"
-        plt.figure()
-        couleur = 'blue'
-        if col.strip().startswith('-'):
-            couleur = 'red'
-        elif col.strip().startswith('+'):
-            couleur = 'green'
-        elif col.strip().startswith('='):
-            couleur = 'purple'
-        sns.histplot(df[col].dropna(), kde=True, bins=50, color=couleur)
-        titre_graph = col
-        if len(col) > 40:
-            mots = col.split()
-            milieu = len(mots) // 2
-            titre_graph = ' '.join(mots[:milieu]) + '\n' + ' '.join(mots[milieu:])
-        plt.title(f"Distribution de {titre_graph}")
-        plt.tight_layout()
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        plt.close()
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-        rapport_html += f'<img src="data:image/png;base64,{image_base64}" width="800"/>'
-
-df["mois"] = pd.to_numeric(df["mois"], errors="coerce")
-df["jour"] = pd.to_numeric(df["jour"], errors="coerce")
-df["Heure"] = pd.to_numeric(df["Heure"], errors="coerce")
-df["Année"] = pd.to_datetime(df["Filename"], errors="coerce", dayfirst=True).dt.year
-
-df["Datetime"] = pd.to_datetime(dict(
-    year=df["Année"],
-    month=df["mois"],
-    day=df["jour"],
-    hour=df["Heure"]
-), errors='coerce')
-
-df = df.dropna(subset=["Datetime"])
-df = df.sort_values("Datetime")
-df["diff"] = df["Datetime"].diff().dt.total_seconds().div(3600)
-
-trous = df[df["diff"] > 1].copy()
-trous["Début"] = trous["Datetime"] - pd.to_timedelta(trous["diff"], unit="h")
-
-rapport_html += "<h2>Analyse des trous temporels</h2>"
-rapport_html += f"<p>Nombre de trous (>1h): {len(trous)}</p>"
-rapport_html += "<ul>" + "".join([
-    f"<li>{row['Début']} → {row['Datetime']}</li>"
-    for _, row in trous.iterrows()
-]) + "</ul>"
-
-plt.figure()
-plt.plot(df["Datetime"], df["diff"].fillna(0), color='black')
-plt.title("Intervalle entre les mesures\n(en heures)")
-plt.xlabel("Date")
-plt.ylabel("Différence en heures")
-plt.tight_layout()
-buffer = io.BytesIO()
-plt.savefig(buffer, format='png')
-plt.close()
-buffer.seek(0)
-image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-rapport_html += f'<img src="data:image/png;base64,{image_base64}" width="800"/>'
-
-col_prod = "= Production brute des centrales d'HQP (MWh)"
-rapport_html += f"<h2>Analyse temporelle de la {col_prod}</h2>"
-
-df["Saison"] = df["mois"].map({
-    12: "Hiver", 1: "Hiver", 2: "Hiver",
-    3: "Printemps", 4: "Printemps", 5: "Printemps",
-    6: "Été", 7: "Été", 8: "Été",
-    9: "Automne", 10: "Automne", 11: "Automne"
-})
-
-plt.figure()
-sns.boxplot(x="Heure", y=col_prod, data=df, color="purple")
-plt.title("Distribution horaire de la production brute")
-plt.tight_layout()
-buffer = io.BytesIO()
-plt.savefig(buffer, format='png')
-plt.close()
-buffer.seek(0)
-image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-rapport_html += f'<img src="data:image/png;base64,{image_base64}" width="800"/>'
-
-df_mois = df[df["mois"].isin(range(1, 13))]
-plt.figure()
-sns.boxplot(x="mois", y=col_prod, data=df_mois, color="purple")
-plt.title("Distribution mensuelle de la production brute")
-plt.tight_layout()
-buffer = io.BytesIO()
-plt.savefig(buffer, format='png')
-plt.close()
-buffer.seek(0)
-image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-rapport_html += f'<img src="data:image/png;base64,{image_base64}" width="800"/>'
-
-plt.figure()
-sns.boxplot(x="Année", y=col_prod, data=df, color="purple")
-plt.title("Distribution annuelle de la production brute")
-plt.xticks(rotation=45)
-plt.tight_layout()
-buffer = io.BytesIO()
-plt.savefig(buffer, format='png')
-plt.close()
-buffer.seek(0)
-image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-rapport_html += f'<img src="data:image/png;base64,{image_base64}" width="800"/>'
-
-rapport_html += "<h2>Répartition saisonnière annuelle</h2>"
-
-for annee in sorted(df["Année"].dropna().unique()):
-    data_annee = df[df["Année"] == annee]
-    total_par_saison = data_annee.groupby("Saison")[col_prod].sum().reindex(["Hiver", "Printemps", "Été", "Automne"])
-    if total_par_saison.notna().sum() == 4:
-        plt.figure()
-        plt.pie(total_par_saison, labels=total_par_saison.index, autopct='%1.1f%%')
-        plt.title(f"Répartition par saison - {annee}")
-        plt.tight_layout()
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        plt.close()
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-        rapport_html += f'<img src="data:image/png;base64,{image_base64}" width="500"/>'
-
-rapport_html += "<h2>Répartition saisonnière globale</h2>"
-
-total_global_saisons = df.groupby("Saison")[col_prod].sum().reindex(["Hiver", "Printemps", "Été", "Automne"])
-if total_global_saisons.notna().sum() == 4:
-    plt.figure()
-    plt.pie(total_global_saisons, labels=total_global_saisons.index, autopct='%1.1f%%')
-    plt.title("Répartition par saison - Toutes années")
-    plt.tight_layout()
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    plt.close()
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    rapport_html += f'<img src="data:image/png;base64,{image_base64}" width="500"/>'
-
-rapport_html += "<h2>Évolution horaire de la consommation et production</h2>"
-
-colonnes_mwh = [
-    "= Production brute des centrales d'HQP (MWh)",
-    "- Consommation des centrales d'HQP (MWh)",
-    "+ Électricité reçue par HQP aux points de raccordement des centrales et des interconnexions (MWh)",
-    "+ Consommation attribuable à la puissance interruptible mise à la disposition d'HQP majorée des pertes de transport (MWh)",
-    "= Volume d'électricité fournie par les ressources du Producteur (MWh)",
-    "- Volume des engagements du Producteur envers des tiers (MWh)",
-    "= Volume d'électricité fournie par le Producteur au Distributeur (MWh)",
-    "- Volume des approvisionnements hors patrimoniaux provenant d'HQP (MWh)",
-    "= Volume d'électricité mobilisée par le Distributeur au titre de l'électricité patrimoniale (MWh)",
-    "Volume d'électricité patrimoniale (bâtonnets affectés) (MWh)",
-    "Volume d'électricité mobilisée par le Distributeur en dépassement de l'électricité patrimoniale (MWh)"
-]
-
-traces = []
-for col in colonnes_mwh:
-    if col in df.columns:
-        traces.append(go.Scatter(x=df["Datetime"], y=df[col], mode='lines', name=col))
-
-layout = go.Layout(
-    title="Comparaison interactive des volumes d'électricité (MWh)",
-    xaxis=dict(title="Date"),
-    yaxis=dict(title="Énergie (MWh)"),
-    height=600
-)
-
-fig = go.Figure(data=traces, layout=layout)
-graph_html = pio.to_html(fig, include_plotlyjs='cdn', full_html=False)
-
-rapport_html += "<h2>Graphique interactif des données horaires (Plotly)</h2>"
-rapport_html += graph_html
-
-rapport_html += "</body></html>"
-
-with open("rapport_analyse_HQ01.html", "w", encoding="utf-8") as f:
-    f.write(rapport_html)
+
+from cache_figures import CacheFigures
+from constantes import col_prod, colonnes_mwh
+from cube_agregats import CubeAgregats
+from ecriture_rapport import RapportHTML
+from incremental import EtatHoraire, charger_etat, sauver_etat
+from ingestion_horaire import COLONNES_DERIVEES, charger_horaire, lire_horaire_blocs, taille_bloc_pour_budget
+from instrumentation import span
+from paquet_plotly import PaquetPlotly
+from qualite_donnees import analyser
+from rendu_figures import (SpecBoites, SpecCamembert, SpecCourbe, SpecHistogramme, RenduFigures,
+                           spec_histogramme)
+from sous_echantillonnage import script_zoom, sous_echantillonner, traces_multiresolution
+from statistiques_flux import AccumulateurColonne
+from types_compacts import SAISONS, SCHEMA_HORAIRE, compacter, rapport_memoire
+
+# Mode flux : le CSV est lu par blocs, sans le charger en entier (statistiques, cube, trous et graphiques).
+MODE_FLUX = False
+TAILLE_BLOC = 500_000
+# Mémoire allouée à la lecture du CSV (octets) : au-delà, le rapport est calculé par blocs comme en mode flux
+# (en mode incrémental, qui a besoin de la table entière, le CSV est lu par blocs convertis en types compacts).
+BUDGET_MEMOIRE = 2 * 2 ** 30
+ERREUR_QUANTILE = 0.01
+# Nombre de processus pour le rendu des figures (None = tous les cœurs, 1 = en série).
+NB_PROCESSUS = None
+# Graphique interactif : points par trace et niveaux de zoom embarqués (× 4 points par niveau).
+POINTS_PAR_TRACE = 2000
+NIVEAUX_RESOLUTION = 3
+METHODE_SOUS_ECHANTILLONNAGE = "lttb"
+# Mode incrémental : les agrégats sont conservés à côté des données et seules les nouvelles lignes sont intégrées.
+MODE_INCREMENTAL = False
+# Rapport : "externe" (images dans rapport_analyse_HQ01_fichiers/) ou "unique" (images intégrées en base64).
+MODE_RAPPORT = "externe"
+FORMAT_IMAGES = "png"
+# Graphique interactif : plotly.js intégré au rapport; COMPRESSER_GRAPHIQUES le compresse en gzip.
+COMPRESSER_GRAPHIQUES = False
+# Cache des figures : les graphiques dont les données n'ont pas changé sont relus depuis le disque.
+CACHE_FIGURES = True
+
+FICHIER = "historique-production-consommation-ec-horaire.csv"
+SORTIE = "rapport_analyse_HQ01.html"
+# Dimensions du cube d'agrégats servant les boîtes à moustaches et les répartitions saisonnières.
+DIMENSIONS_CUBE = ["Année", "mois", "Heure", "Saison"]
+
+
+def agreger_par_blocs(fichier, taille_bloc=TAILLE_BLOC):
+    """Agrégats du rapport en une lecture du CSV par blocs.
+
+    Retourne (colonnes source, accumulateurs par colonne numérique, cube,
+    horodatages valides triés, séries MWh réduites). Outre un bloc, seuls
+    les horodatages et, par bloc et par série, les points du niveau de zoom
+    le plus fin (sous-échantillonnés) sont gardés en mémoire.
+    """
+    points_par_bloc = POINTS_PAR_TRACE * 4 ** (NIVEAUX_RESOLUTION - 1)
+    colonnes_source, accumulateurs, cube = [], {}, None
+    horodatages, reduites = [], {}
+    for bloc in lire_horaire_blocs(fichier, taille_bloc):
+        if cube is None:
+            colonnes_source = [c for c in bloc.columns if c not in COLONNES_DERIVEES]
+            for col in bloc[colonnes_source].select_dtypes(include=[np.number]).columns:
+                accumulateurs[col] = AccumulateurColonne(ERREUR_QUANTILE)
+            colonnes_cube = [col for col in colonnes_mwh if col in accumulateurs]
+            reduites = {col: [] for col in colonnes_cube}
+        for col, acc in accumulateurs.items():
+            acc.ajouter(bloc[col])
+        ajout = CubeAgregats.construire(bloc, DIMENSIONS_CUBE, colonnes_cube, bords=cube.bords if cube else None)
+        cube = ajout if cube is None else cube.fusionner(ajout)
+
+        bloc = bloc.dropna(subset=["Datetime"]).sort_values("Datetime", kind="stable")
+        dates = bloc["Datetime"].to_numpy()
+        horodatages.append(dates)
+        for col, morceaux in reduites.items():
+            morceaux.append(sous_echantillonner(dates, bloc[col].to_numpy(), points_par_bloc,
+                                                METHODE_SOUS_ECHANTILLONNAGE))
+
+    horodatages = np.sort(np.concatenate(horodatages), kind="stable") if horodatages else np.array([], "datetime64[ns]")
+    series = {}
+    for col, morceaux in reduites.items():
+        x = np.concatenate([m[0] for m in morceaux])
+        ordre = np.argsort(x, kind="stable")
+        series[col] = (x[ordre], np.concatenate([m[1] for m in morceaux])[ordre])
+    return colonnes_source, accumulateurs, cube, horodatages, series
+
+
+def statistiques_colonne(col, source):
+    """Min, max, quartiles et histogramme d'une colonne, depuis sa série ou son `AccumulateurColonne`."""
+    if isinstance(source, AccumulateurColonne):
+        minimum, maximum = source.minimum, source.maximum
+        quantiles = source.quantiles([0.25, 0.5, 0.75])
+    else:
+        minimum, maximum = source.min(), source.max()
+        quantiles = source.quantile([0.25, 0.5, 0.75]).to_dict()
+    couleur = 'blue'
+    if col.strip().startswith('-'):
+        couleur = 'red'
+    elif col.strip().startswith('+'):
+        couleur = 'green'
+    elif col.strip().startswith('='):
+        couleur = 'purple'
+    titre_graph = col
+    if len(col) > 40:
+        mots = col.split()
+        milieu = len(mots) // 2
+        titre_graph = ' '.join(mots[:milieu]) + '\n' + ' '.join(mots[milieu:])
+    titre_graph = f"Distribution de {titre_graph}"
+    if isinstance(source, AccumulateurColonne):
+        bords, comptes = source.histogramme.regrouper(50)
+        kde_x, kde_y = source.histogramme.courbe_kde(source.ecart_type, bords[1] - bords[0])
+        spec = SpecHistogramme(titre_graph, bords, comptes, couleur, kde_x, kde_y, xlabel=col)
+    else:
+        spec = spec_histogramme(source, titre_graph, couleur)
+    return minimum, maximum, quantiles, spec
+
+
+def rapport_horaire(fichier=FICHIER, sortie=SORTIE, cache=None, mode_flux=MODE_FLUX, incremental=MODE_INCREMENTAL,
+                    mode_rapport=MODE_RAPPORT, format_images=FORMAT_IMAGES, nb_processus=NB_PROCESSUS,
+                    compresser=COMPRESSER_GRAPHIQUES, budget_memoire=BUDGET_MEMOIRE):
+    """Écrit le rapport d'analyse des données horaires et retourne le chemin du rapport.
+
+    Chaque section est écrite dès qu'elle est produite; les figures sont
+    rendues en parallèle pendant le calcul des sections suivantes. Les
+    options valent par défaut les constantes du module du même nom.
+    """
+    with RenduFigures(nb_processus, format_images, cache) as rendu, \
+            RapportHTML(sortie, mode_rapport, 2 * rendu.nb_processus) as rapport:
+        rapport.ecrire("<html><head><meta charset='utf-8'><title>Analyse Hydro-Québec</title></head><body>")
+        rapport.ecrire("<h1>Rapport d'analyse des données de production et consommation (Hydro-Québec)</h1>")
+
+        accumulateurs = None
+        taille_bloc = None
+        if not incremental:
+            taille_bloc = TAILLE_BLOC if mode_flux else taille_bloc_pour_budget(fichier, budget_memoire)
+            if taille_bloc is not None and not mode_flux:
+                print(f"📦 CSV horaire au-delà du budget mémoire : calcul par blocs de {taille_bloc} lignes")
+        flux = taille_bloc is not None
+        with span("lecture") as etape:
+            if flux:
+                colonnes_source, accumulateurs, cube, dates, series_mwh = agreger_par_blocs(fichier, taille_bloc)
+                etape.compter(len(dates))
+                colonnes_numeriques = list(accumulateurs)
+            else:
+                df = charger_horaire(fichier, budget_memoire=budget_memoire)
+                etape.compter(len(df))
+                print(f"📦 {rapport_memoire(df, 'données horaires')}")
+                colonnes_source = [c for c in df.columns if c not in COLONNES_DERIVEES]
+                colonnes_numeriques = df[colonnes_source].select_dtypes(include=[np.number]).columns.tolist()
+        colonnes_cube = [col for col in colonnes_mwh if col in colonnes_numeriques]
+
+        if incremental:
+            points_par_serie = POINTS_PAR_TRACE * 4 ** (NIVEAUX_RESOLUTION - 1)
+            reduction = (points_par_serie, METHODE_SOUS_ECHANTILLONNAGE)
+            with span("intégration incrémentale") as etape:
+                # Seules les nouvelles lignes sont analysées : un export complété par la fin est déjà trié.
+                valides = df.dropna(subset=["Datetime"])
+                if not valides["Datetime"].is_monotonic_increasing:
+                    valides = valides.sort_values("Datetime", kind="stable")
+                etat = charger_etat(fichier, "horaire")
+                nouvelles = None
+                if etat is not None and etat.compatible(colonnes_cube, colonnes_numeriques, DIMENSIONS_CUBE, *reduction):
+                    nouvelles = etat.nouvelles_lignes(valides)
+                if nouvelles is None:
+                    etat = EtatHoraire(colonnes_cube, colonnes_numeriques, DIMENSIONS_CUBE, ERREUR_QUANTILE, *reduction)
+                    nouvelles = valides
+                etat.integrer(nouvelles)
+                etape.compter(len(nouvelles))
+                accumulateurs = etat.accumulateurs
+                dates = valides["Datetime"].to_numpy()
+                ecarts = np.r_[0.0, np.diff(dates) / np.timedelta64(1, "h")].astype(np.float32)
+                bilan, cube, series_mwh = etat.bilan, etat.cube, etat.series
+
+        with span("statistiques par colonne", colonnes=len(colonnes_source)):
+            for col in colonnes_source:
+                rapport.ecrire(f"<h2>{col}</h2>")
+                if col in colonnes_numeriques:
+                    source = accumulateurs[col] if accumulateurs is not None else df[col]
+                    minimum, maximum, quantiles, spec = statistiques_colonne(col, source)
+                    rapport.ecrire(f"<p>Min: {minimum}, Max: {maximum}</p>")
+                    # Les accumulateurs (lecture par blocs, mode incrémental) donnent des quartiles approchés.
+                    approche = "≈ " if accumulateurs is not None else ""
+                    rapport.ecrire("<ul>" + "".join([f"<li>{int(k*100)}%: {approche}{v}</li>" for k, v in quantiles.items()]) + "</ul>")
+                    if approche:
+                        rapport.ecrire(f"<p><i>Quartiles approchés (erreur de rang ≤ {ERREUR_QUANTILE:.0%}).</i></p>")
+                    rapport.image(rendu.soumettre(spec), 800)
+
+        if flux:
+            with span("intervalles", lignes=len(dates)):
+                ecarts = np.r_[0.0, np.diff(dates) / np.timedelta64(1, "h")].astype(np.float32)
+
+            with span("qualité des données", lignes=len(dates)):
+                bilan = analyser(pd.DataFrame({"Datetime": dates}), colonnes_cube, accumulateurs=accumulateurs)
+        elif not incremental:
+            with span("tri et intervalles", lignes=len(df)):
+                df = df.dropna(subset=["Datetime"])
+                df = df.sort_values("Datetime")
+                df["diff"] = df["Datetime"].diff().dt.total_seconds().div(3600)
+                df = compacter(df, SCHEMA_HORAIRE)
+                dates, ecarts = df["Datetime"].to_numpy(), df["diff"].fillna(0).to_numpy()
+
+            with span("qualité des données", lignes=len(df)):
+                bilan = analyser(df, colonnes_cube)
+
+            with span("cube", lignes=len(df)):
+                cube = CubeAgregats.construire(df, DIMENSIONS_CUBE, colonnes_cube)
+            series_mwh = {col: df[col].to_numpy() for col in colonnes_mwh if col in df.columns}
+
+        rapport.ecrire("<h2>Analyse des trous temporels</h2>")
+        rapport.ecrire(bilan.html())
+
+        rapport.image(rendu.soumettre(SpecCourbe(
+            "Intervalle entre les mesures\n(en heures)", dates, ecarts,
+            couleur="black", xlabel="Date", ylabel="Différence en heures"
+        )), 800)
+
+        rapport.ecrire(f"<h2>Analyse temporelle de la {col_prod}</h2>")
+
+        largeur_bac = cube.bords[col_prod][1] - cube.bords[col_prod][0]
+        rapport.ecrire(f"<p><i>Boîtes à moustaches approchées, tirées des histogrammes du cube d'agrégats : "
+                       f"quartiles, moustaches et nombre de valeurs aberrantes à un bac près ({largeur_bac:.4g} MWh). "
+                       f"Seuls le minimum et le maximum de chaque groupe sont tracés parmi les valeurs aberrantes.</i></p>")
+        for par, titre, rotation in (("Heure", "horaire", 0), ("mois", "mensuelle", 0), ("Année", "annuelle", 45)):
+            etiquettes, stats = cube.stats_boites(col_prod, par)
+            rapport.image(rendu.soumettre(SpecBoites(f"Distribution {titre} de la production brute", etiquettes, stats,
+                                        xlabel=par, ylabel=col_prod, rotation=rotation)), 800)
+            rapport.ecrire(f"<p>Valeurs aberrantes (≈) : {sum(s['aberrants'] for s in stats)}</p>")
+
+        rapport.ecrire("<h2>Répartition saisonnière annuelle</h2>")
+
+        sommes_saisons = cube.sommes(col_prod, ["Année", "Saison"])
+        camemberts_annuels = {}
+        for annee in sorted(sommes_saisons.index.get_level_values("Année").unique()):
+            if incremental and annee in etat.images:
+                rapport.image(etat.images[annee], 500)
+                continue
+            total_par_saison = sommes_saisons.xs(annee, level="Année").reindex(SAISONS)
+            if total_par_saison.notna().sum() == 4:
+                spec = SpecCamembert(f"Répartition par saison - {annee}", total_par_saison.tolist(), total_par_saison.index.tolist())
+                camemberts_annuels[annee] = rendu.soumettre(spec)
+                rapport.image(camemberts_annuels[annee], 500)
+
+        rapport.ecrire("<h2>Répartition saisonnière globale</h2>")
+
+        total_global_saisons = cube.sommes(col_prod, "Saison").reindex(SAISONS)
+        if total_global_saisons.notna().sum() == 4:
+            rapport.image(rendu.soumettre(SpecCamembert("Répartition par saison - Toutes années",
+                                           total_global_saisons.tolist(), total_global_saisons.index.tolist())), 500)
+
+        rapport.ecrire("<h2>Évolution horaire de la consommation et production</h2>")
+
+        with span("sous-échantillonnage", lignes=len(dates)):
+            traces, niveaux = traces_multiresolution(dates, series_mwh, POINTS_PAR_TRACE, NIVEAUX_RESOLUTION,
+                                                     METHODE_SOUS_ECHANTILLONNAGE)
+
+        layout = go.Layout(
+            title="Comparaison interactive des volumes d'électricité (MWh)",
+            xaxis=dict(title="Date", type="date"),
+            yaxis=dict(title="Énergie (MWh)"),
+            height=600
+        )
+
+        with span("graphique interactif"):
+            fig = go.Figure(data=traces, layout=layout)
+            paquet = PaquetPlotly(compresser)
+
+            rapport.ecrire("<h2>Graphique interactif des données horaires (Plotly)</h2>")
+            rapport.ecrire(paquet.script())
+            rapport.ecrire(paquet.figure(fig, post_script=script_zoom(niveaux, POINTS_PAR_TRACE) or None, reduire=False))
+
+        rapport.ecrire("</body></html>")
+
+    if incremental:
+        etat.images.update({annee: image.resultat() for annee, image in camemberts_annuels.items()})
+        sauver_etat(fichier, "horaire", etat)
+    return sortie
+
+
+if __name__ == "__main__":
+    cache = CacheFigures() if CACHE_FIGURES else None
+    rapport_horaire(FICHIER, SORTIE, cache)
+    if cache is not None:
+        print(cache.resume())
@@ -0,0 +1,160 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from constantes import KWH_PAR_JOUR_TARIF_BASE, TARIF_BASE, TARIF_HAUT, colonnes_mwh
+from tarification01 import COLONNES
+
+GRAINE = 0
+# Trous horaires : probabilité qu'un trou commence à une heure donnée et durée maximale (heures).
+TAUX_TROUS = 1e-4
+DUREE_MAX_TROU = 24
+TAILLE_BLOC_HORAIRE = 1_000_000
+# Périodes de facturation : durée en jours (bornes incluses).
+JOURS_PERIODE = (55, 65)
+
+
+def _temperature(jour_annee, generateur, taille):
+    """Température moyenne (°C) selon le jour de l'année, climat de type Montréal."""
+    return -10 * np.cos(2 * np.pi * (jour_annee - 20) / 365.25) + 7 + generateur.normal(0, 3, taille)
+
+
+def _volumes_horaires(dates, generateur):
+    """Colonnes `colonnes_mwh` cohérentes entre elles (bilans des volumes du producteur et du distributeur)."""
+    n = len(dates)
+    saison = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 15) / 365.25)
+    journee = np.sin(2 * np.pi * (dates.hour.to_numpy() - 6) / 24)
+    production = 20000 + 4000 * saison + 1500 * journee + generateur.normal(0, 800, n)
+    consommation = 0.01 * production + generateur.normal(0, 20, n)
+    recue = 0.3 * production + generateur.normal(0, 300, n)
+    interruptible = np.abs(generateur.normal(0, 50, n))
+    ressources = production - consommation + recue + interruptible
+    engagements = 0.15 * ressources + generateur.normal(0, 200, n)
+    distributeur = ressources - engagements
+    hors_patrimoniaux = np.abs(0.02 * distributeur + generateur.normal(0, 50, n))
+    mobilisee = distributeur - hors_patrimoniaux
+    patrimoniale = np.minimum(mobilisee, 19000)
+    valeurs = [production, consommation, recue, interruptible, ressources, engagements, distributeur,
+               hors_patrimoniaux, mobilisee, patrimoniale, mobilisee - patrimoniale]
+    return dict(zip(colonnes_mwh, valeurs))
+
+
+def _masque_trous(n, generateur, taux_trous):
+    """Heures à conserver : des trous de 1 à DUREE_MAX_TROU heures commencent avec la probabilité `taux_trous`."""
+    debuts = np.flatnonzero(generateur.random(n) < taux_trous)
+    fins = np.minimum(debuts + generateur.integers(1, DUREE_MAX_TROU + 1, debuts.size), n)
+    delta = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(delta, debuts, 1)
+    np.add.at(delta, fins, -1)
+    return np.cumsum(delta[:-1]) == 0
+
+
+def generer_horaire(chemin, nb_heures, graine=GRAINE, debut="2019-01-01", taux_trous=TAUX_TROUS,
+                    taille_bloc=TAILLE_BLOC_HORAIRE):
+    """Écrit un export horaire synthétique (Filename, mois, jour, Heure et `colonnes_mwh`) couvrant `nb_heures`.
+
+    Le fichier est écrit par blocs de `taille_bloc` heures, sans tout garder
+    en mémoire; des trous aléatoires sont retirés. Retourne le nombre de
+    lignes écrites.
+    """
+    generateur = np.random.default_rng(graine)
+    debut = pd.Timestamp(debut)
+    nb_lignes = 0
+    with open(chemin, "w", encoding="utf-8", newline="") as f:
+        for depart in range(0, nb_heures, taille_bloc):
+            n = min(taille_bloc, nb_heures - depart)
+            dates = pd.date_range(debut + pd.Timedelta(hours=depart), periods=n, freq="h")
+            dates = dates[_masque_trous(n, generateur, taux_trous)]
+            bloc = pd.DataFrame({
+                "Filename": dates.strftime("%d/%m/%Y"),
+                "mois": dates.month,
+                "jour": dates.day,
+                "Heure": dates.hour,
+                **_volumes_horaires(dates, generateur),
+            })
+            bloc.to_csv(f, header=depart == 0, index=False, float_format="%.3f")
+            nb_lignes += len(bloc)
+    return nb_lignes
+
+
+def generer_facturation(nb_periodes, nb_comptes=1, graine=GRAINE, debut="2015-01-01"):
+    """Périodes de facturation synthétiques au format nettoyé (`COLONNES` de tarification01).
+
+    Chaque compte a `nb_periodes` périodes consécutives; la consommation suit
+    les degrés-jours de chauffage et le montant le tarif D. Avec plusieurs
+    comptes, une colonne `Compte` (numéro à 10 chiffres) est ajoutée.
+    """
+    generateur = np.random.default_rng(graine)
+    taille = (nb_comptes, nb_periodes)
+    jours = generateur.integers(JOURS_PERIODE[0], JOURS_PERIODE[1] + 1, taille)
+    decalage = np.cumsum(jours, axis=1) - jours + generateur.integers(0, 30, (nb_comptes, 1))
+    debuts = np.datetime64(debut, "D") + decalage.astype("timedelta64[D]")
+    milieu = pd.DatetimeIndex((debuts + (jours // 2).astype("timedelta64[D]")).ravel())
+    temperature = _temperature(milieu.dayofyear.to_numpy(), generateur, jours.size).reshape(taille)
+
+    base_compte = generateur.lognormal(np.log(25), 0.4, (nb_comptes, 1))
+    chauffage_compte = generateur.lognormal(np.log(4), 0.5, (nb_comptes, 1))
+    kwh_jour = base_compte + chauffage_compte * np.clip(18 - temperature, 0, None)
+    kwh = np.round(kwh_jour * jours * generateur.lognormal(0, 0.1, taille))
+    seuil = KWH_PAR_JOUR_TARIF_BASE * jours
+    montant = np.round((np.minimum(kwh, seuil) * TARIF_BASE + np.maximum(kwh - seuil, 0) * TARIF_HAUT
+                        + 0.4 * jours) * generateur.normal(1, 0.02, taille), 2)
+
+    df = pd.DataFrame({
+        "Date de début": debuts.ravel().astype("datetime64[ns]"),
+        "Date de fin": (debuts + (jours - 1).astype("timedelta64[D]")).ravel().astype("datetime64[ns]"),
+        "Jour": jours.ravel(),
+        "kWh": kwh.ravel(),
+        "Montant ($)": montant.ravel(),
+        "Moyenne $/j": np.round(montant / jours, 2).ravel(),
+        "Moyenne kwh/j": np.round(kwh / jours, 1).ravel(),
+        "Température moyenne (°C)": np.round(temperature).ravel(),
+    })
+    if nb_comptes > 1:
+        comptes = generateur.choice(9_000_000_000, nb_comptes, replace=False) + 1_000_000_000
+        df.insert(0, "Compte", np.repeat(comptes.astype(str), nb_periodes))
+    return df[(["Compte"] if nb_comptes > 1 else []) + COLONNES]
+
+
+def ecrire_exports(df, dossier):
+    """Écrit un export brut par compte (`;`, ISO-8859-1, virgule décimale), lisible par `normaliser_fichier`."""
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    if "Compte" not in df.columns:
+        df = df.assign(Compte="0000000000")
+    for compte, periodes in df.groupby("Compte", sort=False):
+        periodes = periodes[COLONNES].sort_values("Date de début", ascending=False)
+        nom = (f"{compte}_p_riode_{periodes['Date de début'].min():%Y-%m-%d}"
+               f"_au_{periodes['Date de fin'].max():%Y-%m-%d}.csv")
+        periodes.to_csv(dossier / nom, sep=";", encoding="iso-8859-1", index=False, decimal=",",
+                        date_format="%Y-%m-%d")
+    return df["Compte"].nunique()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques Hydro-Québec")
+    sous = parser.add_subparsers(dest="type", required=True)
+    p = sous.add_parser("horaire", help="Export horaire de production et consommation")
+    p.add_argument("chemin")
+    p.add_argument("-n", "--heures", type=int, default=24 * 365 * 5, help="Heures couvertes (avant trous)")
+    p.add_argument("--graine", type=int, default=GRAINE)
+    p = sous.add_parser("facturation", help="Périodes de facturation (CSV nettoyé ou exports bruts par compte)")
+    p.add_argument("chemin", help="CSV nettoyé, ou dossier des exports bruts avec --exports")
+    p.add_argument("-n", "--periodes", type=int, default=60, help="Périodes par compte")
+    p.add_argument("-c", "--comptes", type=int, default=1)
+    p.add_argument("--exports", action="store_true", help="Écrire un export brut par compte")
+    p.add_argument("--graine", type=int, default=GRAINE)
+    args = parser.parse_args()
+
+    if args.type == "horaire":
+        nb = generer_horaire(args.chemin, args.heures, args.graine)
+        print(f"✅ {nb} ligne(s) horaires → {args.chemin}")
+    else:
+        df = generer_facturation(args.periodes, args.comptes, args.graine)
+        if args.exports:
+            print(f"✅ {ecrire_exports(df, args.chemin)} export(s), {len(df)} période(s) → {args.chemin}")
+        else:
+            df.to_csv(args.chemin, index=False, date_format="%Y-%m-%d")
+            print(f"✅ {len(df)} période(s) → {args.chemin}")
@@ -0,0 +1,119 @@
+import base64
+import html
+from collections import deque
+from pathlib import Path
+from urllib.parse import quote
+
+MODES_RAPPORT = ("externe", "unique")
+TYPES_IMAGE = {"png": "image/png", "webp": "image/webp"}
+
+
+def format_image(donnees):
+    """Format d'une image encodée (png ou webp), reconnu à sa signature."""
+    if donnees[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if donnees[:4] == b"RIFF" and donnees[8:12] == b"WEBP":
+        return "webp"
+    raise ValueError("format d'image non reconnu (png ou webp attendu)")
+
+
+class RapportHTML:
+    """Rapport HTML écrit sur disque au fur et à mesure, sans garder le document en mémoire.
+
+    En mode « externe », chaque image est écrite dans le dossier
+    `<nom du rapport>_fichiers` à côté du rapport et référencée par un chemin
+    relatif. En mode « unique », les images sont intégrées en base64 pour
+    produire un seul fichier autonome. Le format (PNG ou WebP) est celui des
+    octets reçus.
+
+    Une image peut aussi être une image différée (méthodes `prete` et
+    `resultat`, voir `rendu_figures.RenduFigures`) : ce qui la suit est
+    retenu jusqu'à ce qu'elle soit prête, et au-delà de
+    `images_en_attente_max` images en attente, l'écriture attend la plus
+    ancienne.
+    """
+
+    def __init__(self, chemin, mode="externe", images_en_attente_max=8):
+        if mode not in MODES_RAPPORT:
+            raise ValueError(f"mode de rapport inconnu : {mode!r} (attendu : {', '.join(MODES_RAPPORT)})")
+        self.chemin = Path(chemin)
+        self.mode = mode
+        self.dossier_images = self.chemin.with_name(f"{self.chemin.stem}_fichiers")
+        self.nb_images = 0
+        self.octets_images = 0
+        self.images_en_attente_max = images_en_attente_max
+        self._en_attente = deque()
+        self._images_en_attente = 0
+        if mode == "externe":
+            self.dossier_images.mkdir(parents=True, exist_ok=True)
+            for ancienne in self.dossier_images.glob("figure_*"):
+                ancienne.unlink()
+        self._fichier = open(self.chemin, "w", encoding="utf-8")
+
+    def ecrire(self, *morceaux):
+        if self._en_attente:
+            self._en_attente.extend(morceaux)
+            return
+        for morceau in morceaux:
+            self._fichier.write(morceau)
+
+    def image(self, donnees, largeur=None, style=None):
+        """Écrit une balise <img> pour l'image `donnees` (octets PNG ou WebP, ou image différée)."""
+        if isinstance(donnees, bytes) and not self._en_attente:
+            self._ecrire_image(donnees, largeur, style)
+            return
+        if not isinstance(donnees, bytes):
+            self._images_en_attente += 1
+        self._en_attente.append((donnees, largeur, style))
+        self._vider()
+
+    def _vider(self, tout=False):
+        """Écrit la tête de la file tant que ses images sont prêtes (ou jusqu'au bout avec `tout`)."""
+        while self._en_attente:
+            morceau = self._en_attente[0]
+            if isinstance(morceau, str):
+                self._fichier.write(morceau)
+            else:
+                donnees, largeur, style = morceau
+                if not isinstance(donnees, bytes):
+                    if not (tout or donnees.prete() or self._images_en_attente > self.images_en_attente_max):
+                        return
+                    donnees = donnees.resultat()
+                    self._images_en_attente -= 1
+                self._ecrire_image(donnees, largeur, style)
+            self._en_attente.popleft()
+
+    def _ecrire_image(self, donnees, largeur, style):
+        extension = format_image(donnees)
+        self.nb_images += 1
+        self.octets_images += len(donnees)
+        attributs = ""
+        if largeur is not None:
+            attributs += f' width="{largeur}"'
+        if style:
+            attributs += f' style="{html.escape(style)}"'
+        if self.mode == "externe":
+            nom = f"figure_{self.nb_images:04d}.{extension}"
+            (self.dossier_images / nom).write_bytes(donnees)
+            self._fichier.write(f'<img src="{quote(self.dossier_images.name)}/{nom}"{attributs}/>')
+        else:
+            for morceau in (f'<img src="data:{TYPES_IMAGE[extension]};base64,',
+                            base64.b64encode(donnees).decode("ascii"), f'"{attributs}/>'):
+                self._fichier.write(morceau)
+
+    def fermer(self):
+        """Écrit ce qui reste en attente (en attendant les images) et ferme le fichier."""
+        try:
+            self._vider(tout=True)
+        finally:
+            self._fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_exc, *exc):
+        if type_exc is None:
+            self.fermer()
+        else:
+            self._fichier.close()
+        return False
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+
+def poids_degres_jours(temperatures=None, base=18.0, colonne_temperature="Température moyenne (°C)"):
+    """Pondération par degrés-jours de chauffage, à passer comme `poids` à `etendre_periodes`.
+
+    `temperatures` est une série de températures journalières indexée par date;
+    à défaut (ou pour les dates absentes), la température moyenne de la période
+    est utilisée. Une période sans degré-jour est répartie uniformément.
+    """
+    def calculer(jours):
+        temp = jours[colonne_temperature].to_numpy(dtype=float)
+        if temperatures is not None:
+            journalieres = temperatures.reindex(jours["date"]).to_numpy(dtype=float)
+            temp = np.where(np.isnan(journalieres), temp, journalieres)
+        return np.clip(base - temp, 0, None)
+    return calculer
+
+
+def etendre_periodes(df, colonnes_reparties=("kWh", "Montant ($)"), colonnes_constantes=(),
+                     colonne_debut="Date de début", colonne_jours="Jour", cle_compte=None, poids=None):
+    """Développe chaque période de facturation en une ligne par jour, sans boucle Python.
+
+    Les `colonnes_reparties` sont réparties entre les jours de la période
+    (uniformément, ou selon `poids` : tableau aligné sur les lignes
+    journalières ou fonction recevant le tableau journalier); les
+    `colonnes_constantes` sont recopiées. Avec `cle_compte`, la clé de
+    compte est conservée pour traiter plusieurs comptes à la fois.
+    """
+    jours = pd.to_numeric(df[colonne_jours], errors="coerce").fillna(0).clip(lower=0).astype(np.int64).to_numpy()
+    position = np.repeat(np.arange(len(df)), jours)
+    decalage = np.arange(position.size) - np.repeat(np.cumsum(jours) - jours, jours)
+
+    debuts = pd.to_datetime(df[colonne_debut]).to_numpy()
+    dfj = pd.DataFrame({"date": debuts[position] + decalage.astype("timedelta64[D]")})
+    if cle_compte is not None:
+        dfj[cle_compte] = df[cle_compte].to_numpy()[position]
+    for col in df.columns:
+        if col in colonnes_constantes:
+            dfj[col] = df[col].to_numpy()[position]
+
+    part = 1.0 / jours[position]
+    if poids is not None:
+        valeurs_poids = np.asarray(poids(dfj) if callable(poids) else poids, dtype=float)
+        valeurs_poids = np.nan_to_num(valeurs_poids, nan=0.0)
+        total = np.bincount(position, weights=valeurs_poids, minlength=len(df))[position]
+        part = np.divide(valeurs_poids, total, out=part, where=total > 0)
+
+    for col in df.columns:
+        if col in colonnes_reparties:
+            dfj[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)[position] * part
+    return dfj
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from constantes import KWH_PAR_JOUR_TARIF_BASE, TARIF_BASE, TARIF_HAUT
+
+COLONNES_GRILLE = ["date_effet", "tarif_base", "tarif_haut", "kwh_par_jour"]
+UN_JOUR = np.timedelta64(1, "D")
+
+
+def grille_unique(tarif_base, tarif_haut, kwh_par_jour, date_effet="1900-01-01"):
+    """Grille tarifaire à un seul palier, en vigueur depuis `date_effet`."""
+    return pd.DataFrame({
+        "date_effet": [pd.Timestamp(date_effet)],
+        "tarif_base": [tarif_base],
+        "tarif_haut": [tarif_haut],
+        "kwh_par_jour": [kwh_par_jour],
+    })
+
+
+def lire_grille(chemin):
+    """Lit une grille tarifaire CSV (date_effet, tarif_base, tarif_haut, kwh_par_jour)."""
+    grille = pd.read_csv(chemin, parse_dates=["date_effet"])
+    manquantes = set(COLONNES_GRILLE) - set(grille.columns)
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes dans la grille tarifaire : {sorted(manquantes)}")
+    return grille
+
+
+def grille_tarifaire(fichier=None):
+    """Grille du fichier CSV donné, sinon le tarif D unique de `constantes`."""
+    if fichier:
+        return lire_grille(fichier)
+    return grille_unique(TARIF_BASE, TARIF_HAUT, KWH_PAR_JOUR_TARIF_BASE)
+
+
+def simuler_factures(df, grille, colonne_debut="Date de début", colonne_jours="Jour", colonne_kwh="kWh"):
+    """Calcule la facture simulée au tarif D pour chaque période, en une passe vectorisée.
+
+    Une période à cheval sur un changement de tarif est découpée en segments
+    au prorata des jours : la consommation et le seuil de première tranche
+    sont répartis entre segments, et chaque segment est facturé à son tarif.
+    Une période sans nombre de jours n'est pas découpée et garde un seuil
+    manquant : `kWh_haut` et `Montant_simulé` sont alors manquants aussi.
+    Retourne une copie de `df` avec les colonnes `Seuil_kWh`, `kWh_base`,
+    `kWh_haut` et `Montant_simulé`.
+    """
+    grille = grille.sort_values("date_effet")
+    effets = grille["date_effet"].to_numpy().astype("datetime64[D]")
+    tarif_base = grille["tarif_base"].to_numpy(dtype=float)
+    tarif_haut = grille["tarif_haut"].to_numpy(dtype=float)
+    kwh_par_jour = grille["kwh_par_jour"].to_numpy(dtype=float)
+
+    debut = pd.to_datetime(df[colonne_debut]).to_numpy().astype("datetime64[D]")
+    jours = pd.to_numeric(df[colonne_jours], errors="coerce").clip(lower=0).to_numpy(dtype=float)
+    connus = ~np.isnan(jours)
+    jours = np.where(connus, jours, 0).astype(np.int64)
+    kwh = pd.to_numeric(df[colonne_kwh], errors="coerce").to_numpy(dtype=float)
+    fin = debut + jours.astype("timedelta64[D]")
+
+    premier = np.searchsorted(effets, debut, side="right") - 1
+    if (premier < 0).any():
+        raise ValueError("Des périodes commencent avant la première date d'effet de la grille tarifaire")
+    dernier = np.maximum(np.searchsorted(effets, fin - UN_JOUR, side="right") - 1, premier)
+
+    nb_segments = dernier - premier + 1
+    position = np.repeat(np.arange(len(df)), nb_segments)
+    palier = premier[position] + np.arange(position.size) - np.repeat(np.cumsum(nb_segments) - nb_segments, nb_segments)
+    fins_paliers = np.append(effets[1:], np.datetime64("9999-12-31", "D"))
+    debut_segment = np.maximum(debut[position], effets[palier])
+    fin_segment = np.minimum(fin[position], fins_paliers[palier])
+    jours_segment = np.clip((fin_segment - debut_segment) / UN_JOUR, 0, None)
+
+    part = np.divide(jours_segment, jours[position], out=np.ones_like(jours_segment), where=jours[position] > 0)
+    kwh_segment = kwh[position] * part
+    seuil_segment = np.where(connus[position], jours_segment * kwh_par_jour[palier], np.nan)
+    base_segment = np.fmin(kwh_segment, seuil_segment)
+    haut_segment = np.clip(kwh_segment - seuil_segment, 0, None)
+    montant_segment = base_segment * tarif_base[palier] + haut_segment * tarif_haut[palier]
+
+    def par_periode(valeurs):
+        return np.bincount(position, weights=valeurs, minlength=len(df))
+
+    resultat = df.copy()
+    resultat["Seuil_kWh"] = par_periode(seuil_segment)
+    resultat["kWh_base"] = par_periode(base_segment)
+    resultat["kWh_haut"] = par_periode(haut_segment)
+    resultat["Montant_simulé"] = par_periode(montant_segment)
+    return resultat
@@ -0,0 +1,3 @@
+"""Outils d'analyse des données Hydro-Québec (commande `hydroqc`)."""
+
+__version__ = "0.1.0"
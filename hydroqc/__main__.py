@@ -0,0 +1,3 @@
+from hydroqc.cli import main
+
+raise SystemExit(main())
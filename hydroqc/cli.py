@@ -0,0 +1,212 @@
+"""Commande `hydroqc` : normalisation des exports et génération des rapports.
+
+Seules les bibliothèques standard sont importées au démarrage; pandas,
+matplotlib et plotly ne sont chargés que par les sous-commandes qui en ont
+besoin, et matplotlib est forcé sur le moteur Agg (sans affichage).
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from hydroqc import __version__
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Durées de chaque commande (imports, exécution), ajoutées ligne par ligne.
+FICHIER_TEMPS = Path(".etat_hydroqc") / "temps_cli.jsonl"
+
+_DEBUT = time.perf_counter()
+
+
+class _Chronometre:
+    """Sépare le temps d'import des modules du temps d'exécution d'une sous-commande."""
+
+    def __init__(self):
+        self.imports = 0.0
+
+    def importer(self, nom):
+        debut = time.perf_counter()
+        module = importlib.import_module(nom)
+        self.imports += time.perf_counter() - debut
+        return module
+
+
+def _cache(args, module):
+    if args.sans_cache or not module.CACHE_FIGURES:
+        return None
+    return importlib.import_module("cache_figures").CacheFigures()
+
+
+def _afficher_cache(cache):
+    if cache is not None:
+        print(cache.resume())
+
+
+def commande_normalize(args, chrono):
+    if args.destination and args.destination.lower().endswith(".csv"):
+        tarification01 = chrono.importer("tarification01")
+        df = tarification01.normaliser_fichier(args.source)
+        df.to_csv(args.destination, index=False)
+        print(f"✅ {len(df)} période(s) normalisée(s) → {args.destination}")
+        return 0
+    normalisation_lot = chrono.importer("normalisation_lot")
+    resume = normalisation_lot.normaliser_lot(args.source, args.destination or "consommation_enrichie", args.processus)
+    resume.afficher()
+    return 1 if resume.echecs else 0
+
+
+def commande_analyse_horaire(args, chrono):
+    module = chrono.importer("donneeHydroQC01")
+    cache = _cache(args, module)
+    sortie = module.rapport_horaire(args.fichier, args.sortie, cache, mode_flux=args.flux, incremental=args.incremental,
+                                    mode_rapport=args.rapport, format_images=args.format_images,
+                                    nb_processus=args.processus)
+    print(f"✅ Rapport d'analyse horaire généré avec succès : {sortie}")
+    _afficher_cache(cache)
+    return 0
+
+
+def commande_rapport_dynamique(args, chrono):
+    tarification01 = chrono.importer("tarification01")
+    module = chrono.importer("tarification02")
+    cache = _cache(args, module)
+    df = module.simuler_tarifs(tarification01.lire_consommation_enrichie(args.fichier), args.grille)
+    sortie = module.rapport_dynamique(df, args.fichier, args.sortie, cache, incremental=args.incremental,
+                                      compresser=args.compresser)
+    print(f"✅ Rapport dynamique généré avec succès : {sortie}")
+    _afficher_cache(cache)
+    return 0
+
+
+def commande_rapport_economique(args, chrono):
+    tarification01 = chrono.importer("tarification01")
+    module = chrono.importer("tarification03")
+    cache = _cache(args, module)
+    dfj = module.developper_journalier(tarification01.lire_consommation_enrichie(args.fichier), args.fichier,
+                                       incremental=args.incremental)
+    sortie = module.rapport_economique(dfj, module.projeter(dfj), args.sortie, cache, compresser=args.compresser)
+    print(f"✅ Rapport économique généré avec succès : {sortie}")
+    _afficher_cache(cache)
+    return 0
+
+
+def commande_pipeline(args, chrono):
+    pipeline = chrono.importer("pipeline")
+    cache = None if args.sans_cache else chrono.importer("cache_figures").CacheFigures()
+    debut = time.perf_counter()
+    _, bilans = pipeline.Pipeline(pipeline.etapes_facturation(args.fichier, cache, args.grille, args.compresser),
+                                  nb_fils=args.fils).executer(args.forcer)
+    for bilan in bilans:
+        etat = f"exécutée en {bilan.duree:.2f} s" if bilan.executee else "inchangée"
+        print(f"{'↻' if bilan.executee else '✓'} {bilan.nom:<20} {etat}")
+    print(f"✅ Pipeline terminé en {time.perf_counter() - debut:.2f} s")
+    _afficher_cache(cache)
+    return 0
+
+
+def commande_serve(args, chrono):
+    service_requetes = chrono.importer("service_requetes")
+    service_requetes.servir(args.hote, args.port, args.horaire, args.facturation, args.grille)
+    return 0
+
+
+def construire_analyseur():
+    parser = argparse.ArgumentParser(prog="hydroqc", description="Analyse des données Hydro-Québec")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("--temps", action="store_true", help="Afficher les temps d'import et d'exécution")
+    parser.add_argument("--trace", metavar="FICHIER", default=None,
+                        help="Écrire la trace des étapes (format Chrome trace, JSON) et afficher leur résumé")
+    parser.add_argument("--trace-memoire", action="store_true", help="Mesurer aussi le pic d'allocation par étape")
+    sous = parser.add_subparsers(dest="commande", required=True, metavar="COMMANDE")
+
+    p = sous.add_parser("normalize", help="Normaliser un export CSV ou un lot d'exports")
+    p.add_argument("source", help="Export CSV, dossier ou motif glob des exports")
+    p.add_argument("destination", nargs="?", default=None,
+                   help="CSV normalisé (.csv) ou dossier du jeu Parquet (défaut : consommation_enrichie)")
+    p.add_argument("-j", "--processus", type=int, default=None, help="Nombre de processus (défaut : tous les cœurs)")
+    p.set_defaults(executer=commande_normalize)
+
+    p = sous.add_parser("analyse-horaire", help="Rapport d'analyse des données horaires de production")
+    p.add_argument("fichier", nargs="?", default="historique-production-consommation-ec-horaire.csv")
+    p.add_argument("--sortie", default="rapport_analyse_HQ01.html")
+    p.add_argument("--flux", action="store_true", help="Statistiques par blocs, sans charger tout le CSV")
+    p.add_argument("--incremental", action="store_true", help="N'intégrer que les nouvelles lignes")
+    p.add_argument("--rapport", choices=("externe", "unique"), default="externe",
+                   help="Images dans un dossier à côté du rapport ou intégrées en base64")
+    p.add_argument("--format-images", choices=("png", "webp"), default="png")
+    p.add_argument("-j", "--processus", type=int, default=None, help="Processus de rendu (défaut : tous les cœurs)")
+    p.add_argument("--sans-cache", action="store_true", help="Ne pas utiliser le cache des figures")
+    p.set_defaults(executer=commande_analyse_horaire)
+
+    for nom, aide, sortie, executer in (
+        ("rapport-dynamique", "Rapport de consommation et simulation tarifaire", "rapport_dynamique.html",
+         commande_rapport_dynamique),
+        ("rapport-economique", "Rapport économique et projection de la consommation", "rapport_economique.html",
+         commande_rapport_economique),
+    ):
+        p = sous.add_parser(nom, help=aide)
+        p.add_argument("fichier", nargs="?", default="consommation_enrichie01.csv",
+                       help="CSV de consommation enrichi (sortie de normalize)")
+        p.add_argument("--sortie", default=sortie)
+        p.add_argument("--incremental", action="store_true", help="Ne traiter que les nouvelles périodes")
+        p.add_argument("--compresser", action="store_true", help="Compresser plotly.js et les graphiques (gzip)")
+        p.add_argument("--sans-cache", action="store_true", help="Ne pas utiliser le cache des figures")
+        if executer is commande_rapport_dynamique:
+            p.add_argument("--grille", default=None, help="Grille tarifaire datée (CSV; défaut : tarif D unique)")
+        p.set_defaults(executer=executer)
+
+    p = sous.add_parser("pipeline", help="Rapports de facturation en pipeline incrémental")
+    p.add_argument("fichier", nargs="?", default="consommation_enrichie01.csv")
+    p.add_argument("-j", "--fils", type=int, default=None, help="Nombre de fils (défaut : automatique)")
+    p.add_argument("--forcer", action="store_true", help="Relancer toutes les étapes")
+    p.add_argument("--sans-cache", action="store_true", help="Ne pas utiliser le cache des figures")
+    p.add_argument("--grille", default=None, help="Grille tarifaire datée (CSV; défaut : tarif D unique)")
+    p.add_argument("--compresser", action="store_true", help="Compresser plotly.js et les graphiques (gzip)")
+    p.set_defaults(executer=commande_pipeline)
+
+    p = sous.add_parser("serve", help="Service local de requêtes JSON sur les séries horaire et de facturation")
+    p.add_argument("--hote", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--horaire", default="historique-production-consommation-ec-horaire.csv",
+                   help="Export horaire (chaîne vide : ignoré)")
+    p.add_argument("--facturation", default="consommation_enrichie01.csv",
+                   help="CSV de facturation (chaîne vide : ignoré)")
+    p.add_argument("--grille", default=None, help="Grille tarifaire datée (CSV; défaut : tarif D unique)")
+    p.set_defaults(executer=commande_serve)
+    return parser
+
+
+def enregistrer_temps(commande, demarrage, imports, execution):
+    """Ajoute les durées d'une commande à FICHIER_TEMPS (suivi du temps de démarrage)."""
+    FICHIER_TEMPS.parent.mkdir(parents=True, exist_ok=True)
+    with open(FICHIER_TEMPS, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "commande": commande, "version": __version__, "horodatage": datetime.now().isoformat(timespec="seconds"),
+            "demarrage": round(demarrage, 4), "imports": round(imports, 4), "execution": round(execution, 4),
+        }) + "\n")
+
+
+def main(argv=None):
+    args = construire_analyseur().parse_args(argv)
+    chrono = _Chronometre()
+    demarrage = time.perf_counter() - _DEBUT
+    if args.trace:
+        chrono.importer("instrumentation").activer(args.trace_memoire)
+    debut = time.perf_counter()
+    code = args.executer(args, chrono)
+    execution = time.perf_counter() - debut - chrono.imports
+    if args.trace:
+        traceur = importlib.import_module("instrumentation").desactiver()
+        traceur.ecrire(args.trace)
+        print(traceur.resume(), file=sys.stderr)
+        print(f"✅ Trace écrite : {args.trace}", file=sys.stderr)
+    enregistrer_temps(args.commande, demarrage, chrono.imports, execution)
+    if args.temps:
+        print(f"⏱ démarrage {demarrage:.3f} s, imports {chrono.imports:.2f} s, exécution {execution:.2f} s",
+              file=sys.stderr)
+    return code
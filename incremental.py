@@ -0,0 +1,223 @@
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube_agregats import CubeAgregats
+from qualite_donnees import analyser
+from sous_echantillonnage import sous_echantillonner
+from statistiques_flux import AccumulateurColonne
+
+DOSSIER_ETAT = ".etat_hydroqc"
+VERSION_ETAT = 8
+
+
+def _chemin_etat(fichier, nom):
+    fichier = Path(fichier)
+    return fichier.parent / DOSSIER_ETAT / f"{fichier.name}.{nom}.pkl"
+
+
+def charger_etat(fichier, nom):
+    """Relit l'état agrégé sauvegardé à côté de `fichier`, ou None s'il est absent ou périmé."""
+    chemin = _chemin_etat(fichier, nom)
+    if not chemin.exists():
+        return None
+    with open(chemin, "rb") as f:
+        version, etat = pickle.load(f)
+    return etat if version == VERSION_ETAT else None
+
+
+def sauver_etat(fichier, nom, etat):
+    chemin = _chemin_etat(fichier, nom)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = chemin.with_suffix(".tmp")
+    with open(temporaire, "wb") as f:
+        pickle.dump((VERSION_ETAT, etat), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporaire, chemin)
+
+
+def empreinte_lignes(df):
+    """Somme (modulo 2**64) des hachages des lignes de `df`.
+
+    Elle se complète par ajout de lignes et change dès qu'une ligne déjà
+    comptée est modifiée, ajoutée ou retirée, quel que soit l'ordre des lignes.
+    """
+    return int(pd.util.hash_pandas_object(df, index=False).to_numpy().sum(dtype=np.uint64))
+
+
+def _cumuler_empreinte(empreinte, df):
+    return (empreinte + empreinte_lignes(df)) % 2 ** 64
+
+
+class SommesCorrelation:
+    """Sommes courantes permettant de calculer une corrélation de Pearson par ajouts successifs."""
+
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.syy = self.sxy = 0.0
+
+    def ajouter(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valides = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[valides], y[valides]
+        self.n += x.size
+        self.sx += x.sum()
+        self.sy += y.sum()
+        self.sxx += (x * x).sum()
+        self.syy += (y * y).sum()
+        self.sxy += (x * y).sum()
+
+    @property
+    def correlation(self):
+        if self.n < 2:
+            return np.nan
+        cov = self.sxy - self.sx * self.sy / self.n
+        vx = self.sxx - self.sx ** 2 / self.n
+        vy = self.syy - self.sy ** 2 / self.n
+        return cov / np.sqrt(vx * vy) if vx > 0 and vy > 0 else np.nan
+
+
+class EtatHoraire:
+    """Agrégats du rapport horaire mis à jour avec les seules nouvelles lignes.
+
+    Outre le cube et les accumulateurs, l'état garde le bilan de qualité et,
+    pour chaque colonne du cube, une série sous-échantillonnée d'au plus
+    2 × `points_par_serie` points (réduite à nouveau au-delà).
+    """
+
+    def __init__(self, colonnes_cube, colonnes_numeriques, dimensions_cube, erreur_quantile=0.01,
+                 points_par_serie=32_000, methode="lttb"):
+        self.colonnes_cube = list(colonnes_cube)
+        self.colonnes_numeriques = list(colonnes_numeriques)
+        self.dimensions_cube = list(dimensions_cube)
+        self.points_par_serie = points_par_serie
+        self.methode = methode
+        self.dernier = None
+        self.nb_lignes = 0
+        self.empreinte = 0
+        self.cube = None
+        self.bilan = None
+        self.accumulateurs = {col: AccumulateurColonne(erreur_quantile) for col in self.colonnes_numeriques}
+        self.series = {col: (np.array([], dtype="datetime64[ns]"), np.array([])) for col in self.colonnes_cube}
+        self.images = {}
+
+    def compatible(self, colonnes_cube, colonnes_numeriques, dimensions_cube, points_par_serie=32_000, methode="lttb"):
+        return (self.colonnes_cube, self.colonnes_numeriques, self.dimensions_cube, self.points_par_serie,
+                self.methode) == (list(colonnes_cube), list(colonnes_numeriques), list(dimensions_cube),
+                                  points_par_serie, methode)
+
+    @property
+    def colonnes_empreinte(self):
+        colonnes = ["Datetime", *self.dimensions_cube, *self.colonnes_numeriques]
+        return list(dict.fromkeys(colonnes))
+
+    def nouvelles_lignes(self, df):
+        """Lignes postérieures au dernier horodatage intégré (df trié par Datetime, sans NaT).
+
+        Retourne None si des lignes antérieures sont apparues, ont disparu ou
+        ont été modifiées (rattrapage ou correction, repérés par l'empreinte
+        des lignes déjà intégrées) : l'état doit alors être reconstruit.
+        """
+        if self.dernier is None:
+            return df
+        position = df["Datetime"].searchsorted(self.dernier, side="right")
+        if position != self.nb_lignes:
+            return None
+        if empreinte_lignes(df[self.colonnes_empreinte].iloc[:position]) != self.empreinte:
+            return None
+        return df.iloc[position:]
+
+    def integrer(self, nouvelles):
+        """Intègre des lignes triées par Datetime et retourne les années touchées."""
+        if nouvelles.empty:
+            return set()
+        if self.cube is None:
+            self.cube = CubeAgregats.construire(nouvelles, self.dimensions_cube, self.colonnes_cube)
+        else:
+            ajout = CubeAgregats.construire(nouvelles, self.dimensions_cube, self.colonnes_cube, bords=self.cube.bords)
+            self.cube = self.cube.fusionner(ajout)
+        for col, acc in self.accumulateurs.items():
+            acc.ajouter(nouvelles[col])
+
+        # Bilan des nouvelles lignes précédées du dernier horodatage intégré, raccordé au bilan existant.
+        fenetre = nouvelles[["Datetime"]]
+        if self.dernier is not None:
+            fenetre = pd.concat([pd.DataFrame({"Datetime": [self.dernier]}), fenetre], ignore_index=True)
+        suite = analyser(fenetre, self.colonnes_cube, accumulateurs=self.accumulateurs)
+        self.bilan = suite if self.bilan is None else self.bilan.prolonger(suite)
+
+        dates = nouvelles["Datetime"].to_numpy()
+        for col, (x, y) in self.series.items():
+            ajout_x, ajout_y = sous_echantillonner(dates, nouvelles[col].to_numpy(), self.points_par_serie, self.methode)
+            x, y = np.concatenate([x, ajout_x]), np.concatenate([y, ajout_y])
+            if len(x) > 2 * self.points_par_serie:
+                x, y = sous_echantillonner(x, y, self.points_par_serie, self.methode)
+            self.series[col] = (x, y)
+
+        self.nb_lignes += len(nouvelles)
+        self.empreinte = _cumuler_empreinte(self.empreinte, nouvelles[self.colonnes_empreinte])
+        self.dernier = nouvelles["Datetime"].iloc[-1]
+        annees = set(nouvelles["Année"].dropna().unique())
+        for annee in annees:
+            self.images.pop(annee, None)
+        return annees
+
+
+class _EtatPeriodes:
+    def __init__(self):
+        self.dernier_debut = None
+        self.nb_periodes = 0
+        self.empreinte = 0
+
+    def nouvelles_periodes(self, df, colonne_debut="Date de début"):
+        """Périodes commençant après la dernière intégrée, ou None si l'historique a changé.
+
+        Les périodes déjà intégrées sont comparées par leur nombre et leur
+        empreinte : une correction d'une ancienne période force la reconstruction.
+        """
+        if self.dernier_debut is None:
+            return df
+        anciennes = df[colonne_debut] <= self.dernier_debut
+        if anciennes.sum() != self.nb_periodes or empreinte_lignes(df[anciennes]) != self.empreinte:
+            return None
+        return df[~anciennes]
+
+    def _compter(self, nouvelles, colonne_debut):
+        self.nb_periodes += len(nouvelles)
+        self.empreinte = _cumuler_empreinte(self.empreinte, nouvelles)
+        self.dernier_debut = nouvelles[colonne_debut].max()
+
+
+class EtatFacturation(_EtatPeriodes):
+    """Totaux et sommes de corrélation des périodes de facturation déjà intégrées."""
+
+    def __init__(self):
+        super().__init__()
+        self.correlation = SommesCorrelation()
+        self.totaux = {"kWh": 0.0, "Montant ($)": 0.0, "Montant_simulé": 0.0}
+
+    def integrer(self, nouvelles, colonne_debut="Date de début"):
+        if nouvelles.empty:
+            return
+        self.correlation.ajouter(nouvelles["kWh"], nouvelles["Température moyenne (°C)"])
+        for col in self.totaux:
+            self.totaux[col] += nouvelles[col].sum()
+        self._compter(nouvelles, colonne_debut)
+
+
+class EtatJournalier(_EtatPeriodes):
+    """Table journalière développée des périodes déjà intégrées."""
+
+    def __init__(self):
+        super().__init__()
+        self.dfj = None
+
+    def integrer(self, nouvelles, dfj_nouvelles, colonne_debut="Date de début"):
+        """Ajoute les jours des nouvelles périodes."""
+        if nouvelles.empty:
+            return
+        self.dfj = dfj_nouvelles if self.dfj is None else pd.concat([self.dfj, dfj_nouvelles], ignore_index=True)
+        self._compter(nouvelles, colonne_debut)
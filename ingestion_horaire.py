@@ -0,0 +1,202 @@
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from calendrier import joindre_calendrier
+from types_compacts import SCHEMA_HORAIRE, compacter
+
+DOSSIER_CACHE = ".cache_hydroqc"
+VERSION_CACHE = 4
+COLONNES_DERIVEES = ["Année", "Datetime", "Saison"]
+# Lignes lues pour estimer la mémoire nécessaire à la lecture du CSV entier.
+LIGNES_ECHANTILLON = 10_000
+
+try:
+    import pyarrow  # noqa: F401
+    FORMAT_CACHE = "parquet"
+except ImportError:
+    FORMAT_CACHE = "pickle"
+
+
+def empreinte_fichier(chemin, taille_bloc=1 << 20):
+    """Retourne le hachage SHA-256 du contenu d'un fichier."""
+    return _empreintes(chemin, None, taille_bloc)[1]
+
+
+def _empreintes(chemin, taille_prefixe, taille_bloc=1 << 20):
+    """Hachages SHA-256 des `taille_prefixe` premiers octets et du fichier entier, en une lecture."""
+    h = hashlib.sha256()
+    prefixe = None
+    lus = 0
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b""):
+            if taille_prefixe is not None and prefixe is None and lus + len(bloc) >= taille_prefixe:
+                coupe = taille_prefixe - lus
+                h.update(bloc[:coupe])
+                prefixe = h.hexdigest()
+                h.update(bloc[coupe:])
+            else:
+                h.update(bloc)
+            lus += len(bloc)
+    return prefixe, h.hexdigest()
+
+
+def _lire_ajout(fichier, debut, colonnes):
+    """Lit les lignes ajoutées à la fin du CSV depuis l'octet `debut`."""
+    with open(fichier, "rb") as f:
+        f.seek(debut)
+        ajout = f.read()
+    df = pd.read_csv(io.BytesIO(ajout), encoding="latin1", sep=",", header=None, names=colonnes)
+    return enrichir_horaire(df)
+
+
+def taille_bloc_pour_budget(fichier, budget_memoire):
+    """Lignes par bloc pour que la lecture brute du CSV tienne dans `budget_memoire` octets (None : en une fois).
+
+    L'occupation de la lecture brute (float64, chaînes) est estimée à partir
+    des LIGNES_ECHANTILLON premières lignes et de la taille du fichier. Un
+    bloc brut occupe au plus le quart du budget; le reste est laissé aux
+    blocs déjà convertis en types compacts.
+    """
+    with open(fichier, "rb") as f:
+        echantillon = b"".join(f.readline() for _ in range(LIGNES_ECHANTILLON + 1))
+    brut = pd.read_csv(io.BytesIO(echantillon), encoding="latin1", sep=",")
+    if brut.empty:
+        return None
+    octets_par_ligne = brut.memory_usage(deep=True).sum() / len(brut)
+    nb_lignes = os.path.getsize(fichier) / (len(echantillon) / (len(brut) + 1))
+    if octets_par_ligne * nb_lignes <= budget_memoire:
+        return None
+    return max(LIGNES_ECHANTILLON, int(budget_memoire / 4 / octets_par_ligne))
+
+
+def _finit_par_saut_de_ligne(fichier, taille):
+    with open(fichier, "rb") as f:
+        f.seek(taille - 1)
+        return f.read(1) == b"\n"
+
+
+def lire_horaire_blocs(fichier, taille_bloc):
+    """Blocs nettoyés de l'export horaire brut (en-têtes, types compacts, Datetime, Année, Saison), un à la fois."""
+    for bloc in pd.read_csv(fichier, encoding="latin1", sep=",", chunksize=taille_bloc):
+        bloc.columns = bloc.columns.str.encode('latin1').str.decode('utf-8').str.strip()
+        yield enrichir_horaire(bloc)
+
+
+def lire_horaire_csv(fichier, taille_bloc=None):
+    """Lit et nettoie l'export horaire brut (en-têtes, types compacts, Datetime, Année, Saison).
+
+    Avec `taille_bloc`, le CSV est lu par blocs convertis un à un en types
+    compacts : seul un bloc brut est en mémoire à la fois, mais la table
+    compacte entière est assemblée (voir `lire_horaire_blocs` pour un
+    traitement par blocs).
+    """
+    if taille_bloc is None:
+        df = pd.read_csv(fichier, encoding="latin1", sep=",")
+        df.columns = df.columns.str.encode('latin1').str.decode('utf-8').str.strip()
+        return enrichir_horaire(df)
+    morceaux = list(lire_horaire_blocs(fichier, taille_bloc))
+    if len(morceaux) == 1:
+        return morceaux[0]
+    # Les catégories propres à chaque bloc (Filename) sont réunies par la recompaction.
+    return compacter(pd.concat(morceaux, ignore_index=True), SCHEMA_HORAIRE)
+
+
+def enrichir_horaire(df):
+    df["mois"] = pd.to_numeric(df["mois"], errors="coerce")
+    df["jour"] = pd.to_numeric(df["jour"], errors="coerce")
+    df["Heure"] = pd.to_numeric(df["Heure"], errors="coerce")
+    df["Année"] = pd.to_datetime(df["Filename"], errors="coerce", dayfirst=True).dt.year
+
+    df["Datetime"] = pd.to_datetime(dict(
+        year=df["Année"],
+        month=df["mois"],
+        day=df["jour"],
+        hour=df["Heure"]
+    ), errors='coerce')
+
+    df["Saison"] = joindre_calendrier(df["Datetime"], ["Saison météo"])["Saison météo"]
+    return compacter(df, SCHEMA_HORAIRE)
+
+
+def _chemins_cache(fichier, dossier_cache):
+    fichier = Path(fichier)
+    dossier = Path(dossier_cache) if dossier_cache else fichier.parent / DOSSIER_CACHE
+    return dossier / f"{fichier.name}.{FORMAT_CACHE}", dossier / f"{fichier.name}.json"
+
+
+def _ecrire_cache(df, chemin_donnees):
+    if FORMAT_CACHE == "parquet":
+        df.to_parquet(chemin_donnees, index=False)
+    else:
+        df.to_pickle(chemin_donnees)
+
+
+def _lire_cache(chemin_donnees):
+    if FORMAT_CACHE == "parquet":
+        return pd.read_parquet(chemin_donnees)
+    return pd.read_pickle(chemin_donnees)
+
+
+def charger_horaire(fichier, dossier_cache=None, utiliser_cache=True, budget_memoire=None):
+    """Charge le fichier horaire nettoyé en passant par un cache colonnaire.
+
+    Le cache est associé à la taille, à la date de modification et au hachage
+    du fichier source. Si la taille et la date n'ont pas changé, le cache est
+    relu sans recalculer le hachage; sinon le hachage décide s'il faut
+    reconstruire (un fichier simplement « touché » garde son cache). Si des
+    lignes ont seulement été ajoutées à la fin du fichier, seules celles-ci
+    sont lues et ajoutées au cache. Si la lecture du CSV entier dépasserait
+    `budget_memoire` octets, il est lu par blocs (la table compacte entière
+    est tout de même assemblée : `lire_horaire_blocs` traite un bloc à la fois).
+    """
+    def lire():
+        taille_bloc = taille_bloc_pour_budget(fichier, budget_memoire) if budget_memoire else None
+        return lire_horaire_csv(fichier, taille_bloc)
+
+    if not utiliser_cache:
+        return lire()
+
+    chemin_donnees, chemin_meta = _chemins_cache(fichier, dossier_cache)
+    stat = os.stat(fichier)
+    meta = None
+    if chemin_donnees.exists() and chemin_meta.exists():
+        with open(chemin_meta, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != VERSION_CACHE or meta.get("format") != FORMAT_CACHE:
+            meta = None
+
+    if meta and meta["taille"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+        return _lire_cache(chemin_donnees)
+
+    taille_prefixe = meta["taille"] if meta and stat.st_size > meta["taille"] else None
+    empreinte_prefixe, empreinte = _empreintes(fichier, taille_prefixe)
+    if meta and meta["taille"] == stat.st_size and meta["sha256"] == empreinte:
+        meta["mtime_ns"] = stat.st_mtime_ns
+        with open(chemin_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return _lire_cache(chemin_donnees)
+
+    if meta and empreinte_prefixe == meta["sha256"] and _finit_par_saut_de_ligne(fichier, meta["taille"]):
+        df = pd.concat([_lire_cache(chemin_donnees), _lire_ajout(fichier, meta["taille"], meta["colonnes_source"])],
+                       ignore_index=True)
+        df = compacter(df, SCHEMA_HORAIRE)
+    else:
+        df = lire()
+    chemin_donnees.parent.mkdir(parents=True, exist_ok=True)
+    _ecrire_cache(df, chemin_donnees)
+    with open(chemin_meta, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": VERSION_CACHE,
+            "format": FORMAT_CACHE,
+            "source": str(fichier),
+            "taille": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": empreinte,
+            "colonnes_source": [c for c in df.columns if c not in COLONNES_DERIVEES],
+        }, f, ensure_ascii=False)
+    return df
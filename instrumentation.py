@@ -0,0 +1,214 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Windows : pas de getrusage, le pic RSS n'est pas rapporté.
+    resource = None
+
+# Trace activée au chargement si la variable d'environnement donne le chemin du fichier JSON à écrire.
+FICHIER_TRACE = os.environ.get("HYDROQC_TRACE")
+# Suivi des allocations (tracemalloc) : pic mémoire par étape, au prix d'un ralentissement notable.
+TRACE_MEMOIRE = os.environ.get("HYDROQC_TRACE_MEMOIRE", "") not in ("", "0")
+
+_traceur = None
+# Champs d'une étape transmis d'un processus de travail au processus parent (`spans_depuis`, `reprendre`).
+CHAMPS_SPAN = ("nom", "lignes", "attributs", "pic", "debut", "duree", "duree_cpu", "rss_max", "fil", "pid")
+
+
+def rss_max():
+    """Pic de mémoire résidente du processus (octets), ou None si la plateforme ne le fournit pas."""
+    if resource is None:
+        return None
+    maximum = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximum if sys.platform == "darwin" else maximum * 1024
+
+
+class _SpanNul:
+    """Étape sans effet, retournée quand la trace est désactivée."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def compter(self, nb_lignes):
+        pass
+
+
+_SPAN_NUL = _SpanNul()
+
+
+class Span:
+    """Étape nommée : durées murale et CPU (du fil), pic d'allocation, pic RSS et nombre de lignes."""
+
+    def __init__(self, traceur, nom, lignes, attributs):
+        self.traceur = traceur
+        self.nom = nom
+        self.lignes = lignes
+        self.attributs = attributs
+        self.pic = 0
+
+    def compter(self, nb_lignes):
+        self.lignes = nb_lignes
+
+    def __enter__(self):
+        pile = self.traceur._pile()
+        if self.traceur.memoire:
+            courant, pic = tracemalloc.get_traced_memory()
+            if pile:
+                pile[-1].pic = max(pile[-1].pic, pic - pile[-1].memoire_debut)
+            tracemalloc.reset_peak()
+            self.memoire_debut = courant
+        pile.append(self)
+        self.debut_cpu = time.thread_time()
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duree = time.perf_counter() - self.debut
+        self.duree_cpu = time.thread_time() - self.debut_cpu
+        pile = self.traceur._pile()
+        pile.pop()
+        if self.traceur.memoire:
+            self.pic = max(self.pic, tracemalloc.get_traced_memory()[1] - self.memoire_debut)
+            if pile:
+                pile[-1].pic = max(pile[-1].pic, self.pic + self.memoire_debut - pile[-1].memoire_debut)
+        self.rss_max = rss_max()
+        self.fil = threading.get_ident()
+        self.pid = os.getpid()
+        self.traceur._terminer(self)
+        return False
+
+
+class Traceur:
+    """Collecte les étapes d'une exécution et les écrit au format Chrome trace (chrome://tracing, Perfetto)."""
+
+    def __init__(self, memoire=False):
+        self.memoire = memoire
+        self.origine = time.perf_counter()
+        self.spans = []
+        self._local = threading.local()
+        self._verrou = threading.Lock()
+        if memoire and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _pile(self):
+        if not hasattr(self._local, "pile"):
+            self._local.pile = []
+        return self._local.pile
+
+    def _terminer(self, span):
+        with self._verrou:
+            self.spans.append(span)
+
+    def evenements(self):
+        evenements = []
+        for s in self.spans:
+            args = {"cpu_ms": round(s.duree_cpu * 1e3, 3), **s.attributs}
+            if s.rss_max is not None:
+                args["rss_max_mio"] = round(s.rss_max / 2 ** 20, 1)
+            if s.lignes is not None:
+                args["lignes"] = s.lignes
+            if self.memoire:
+                args["pic_mio"] = round(s.pic / 2 ** 20, 3)
+            evenements.append({"name": s.nom, "ph": "X", "pid": s.pid, "tid": s.fil,
+                               "ts": round((s.debut - self.origine) * 1e6, 1), "dur": round(s.duree * 1e6, 1),
+                               "args": args})
+        return sorted(evenements, key=lambda e: e["ts"])
+
+    def ecrire(self, chemin):
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.evenements(), "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return chemin
+
+    def resume(self):
+        """Tableau des étapes regroupées par nom, de la plus coûteuse à la moins coûteuse (durée totale)."""
+        groupes = {}
+        for s in self.spans:
+            g = groupes.setdefault(s.nom, {"appels": 0, "duree": 0.0, "cpu": 0.0, "pic": 0, "lignes": None})
+            g["appels"] += 1
+            g["duree"] += s.duree
+            g["cpu"] += s.duree_cpu
+            g["pic"] = max(g["pic"], s.pic)
+            if s.lignes is not None:
+                g["lignes"] = (g["lignes"] or 0) + s.lignes
+        largeur = max([len(nom) for nom in groupes] + [5])
+        lignes = [f"{'étape':<{largeur}} {'appels':>6} {'durée (s)':>10} {'CPU (s)':>9} {'pic (Mio)':>10} {'lignes':>10}"]
+        for nom, g in sorted(groupes.items(), key=lambda item: -item[1]["duree"]):
+            pic = f"{g['pic'] / 2 ** 20:.1f}" if self.memoire else "-"
+            nb = "-" if g["lignes"] is None else str(g["lignes"])
+            lignes.append(f"{nom:<{largeur}} {g['appels']:>6} {g['duree']:>10.3f} {g['cpu']:>9.3f} {pic:>10} {nb:>10}")
+        return "\n".join(lignes)
+
+
+def span(nom, lignes=None, **attributs):
+    """Contexte mesurant une étape nommée; quasi gratuit quand la trace est désactivée.
+
+    `lignes` (ou `compter()` dans le bloc) indique le nombre de lignes traitées.
+    """
+    if _traceur is None:
+        return _SPAN_NUL
+    return Span(_traceur, nom, lignes, attributs)
+
+
+def marque():
+    """Position courante de la trace (à passer à `spans_depuis`), None si la trace est désactivée."""
+    return None if _traceur is None else len(_traceur.spans)
+
+
+def spans_depuis(position):
+    """Étapes terminées depuis `marque()`, en dictionnaires transmissibles à un autre processus.
+
+    Un processus de travail créé par `fork` trace dans sa copie du traceur :
+    ses étapes sont renvoyées au parent, qui les ajoute avec `reprendre`.
+    """
+    if _traceur is None or position is None:
+        return []
+    return [{champ: getattr(s, champ) for champ in CHAMPS_SPAN} for s in _traceur.spans[position:]]
+
+
+def reprendre(spans):
+    """Ajoute à la trace les étapes mesurées dans un processus de travail (voir `spans_depuis`)."""
+    if _traceur is None:
+        return
+    for champs in spans:
+        s = Span(_traceur, champs["nom"], champs["lignes"], champs["attributs"])
+        for champ in CHAMPS_SPAN:
+            setattr(s, champ, champs[champ])
+        _traceur._terminer(s)
+
+
+def activer(memoire=False):
+    global _traceur
+    _traceur = Traceur(memoire)
+    return _traceur
+
+
+def desactiver():
+    """Arrête la trace et retourne le traceur (ou None)."""
+    global _traceur
+    traceur, _traceur = _traceur, None
+    if traceur is not None and traceur.memoire:
+        tracemalloc.stop()
+    return traceur
+
+
+def _ecrire_a_la_sortie(chemin):
+    traceur = desactiver()
+    if traceur is not None and traceur.spans:
+        traceur.ecrire(chemin)
+        print(traceur.resume(), file=sys.stderr)
+        print(f"✅ Trace écrite : {chemin}", file=sys.stderr)
+
+
+if FICHIER_TRACE:
+    activer(TRACE_MEMOIRE)
+    atexit.register(_ecrire_a_la_sortie, FICHIER_TRACE)
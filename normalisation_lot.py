@@ -0,0 +1,106 @@
+import argparse
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tarification01 import normaliser_fichier
+
+COLONNE_COMPTE = "Compte"
+
+
+@dataclass
+class ResumeLot:
+    destination: str
+    reussis: list = field(default_factory=list)
+    echecs: dict = field(default_factory=dict)
+    nb_lignes: int = 0
+
+    def afficher(self):
+        total = len(self.reussis) + len(self.echecs)
+        print(f"{len(self.reussis)}/{total} fichier(s) normalisé(s), {self.nb_lignes} période(s) → {self.destination}")
+        if self.echecs:
+            print(f"❌ {len(self.echecs)} échec(s) :")
+            for chemin, erreur in sorted(self.echecs.items()):
+                print(f"  - {chemin} : {erreur}")
+
+
+def numero_compte(chemin):
+    """Numéro de compte en préfixe du nom de fichier (ex. 0314397469_p_riode_…csv)."""
+    correspondance = re.match(r"(\d+)_", Path(chemin).name)
+    if not correspondance:
+        raise ValueError("numéro de compte introuvable dans le nom du fichier")
+    return correspondance.group(1)
+
+
+def lister_fichiers(source):
+    """Fichiers CSV d'un dossier, ou correspondant à un motif glob."""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.csv")))
+    return sorted(glob.glob(source, recursive=True))
+
+
+def normaliser_vers_partition(chemin, destination):
+    """Normalise un export et l'écrit dans la partition Parquet de son compte."""
+    compte = numero_compte(chemin)
+    df = normaliser_fichier(chemin)
+    partition = Path(destination) / f"{COLONNE_COMPTE}={compte}"
+    partition.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(partition / f"{Path(chemin).stem}.parquet", index=False)
+    return len(df)
+
+
+def normaliser_lot(source, destination="consommation_enrichie", nb_processus=None):
+    """Normalise en parallèle tous les exports de `source` dans un jeu Parquet partitionné par compte.
+
+    Chaque fichier est traité isolément : une erreur est consignée dans le
+    résumé sans interrompre le lot. Le résultat se relit avec
+    `lire_lot(destination)`, la colonne `Compte` provenant des partitions.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("La normalisation par lot nécessite pyarrow (pip install pyarrow)") from exc
+
+    fichiers = lister_fichiers(source)
+    resume = ResumeLot(str(destination))
+    with ProcessPoolExecutor(nb_processus) as pool:
+        taches = {pool.submit(normaliser_vers_partition, chemin, destination): chemin for chemin in fichiers}
+        for tache in as_completed(taches):
+            chemin = taches[tache]
+            try:
+                resume.nb_lignes += tache.result()
+                resume.reussis.append(chemin)
+            except BrokenProcessPool:
+                resume.echecs[chemin] = "processus de travail interrompu"
+            except Exception as exc:
+                resume.echecs[chemin] = f"{type(exc).__name__}: {exc}"
+    resume.reussis.sort()
+    return resume
+
+
+def lire_lot(destination, comptes=None):
+    """Relit le jeu partitionné (numéros de compte gardés en texte), éventuellement filtré par compte."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitionnement = ds.partitioning(pa.schema([(COLONNE_COMPTE, pa.string())]), flavor="hive")
+    filtres = [(COLONNE_COMPTE, "in", list(comptes))] if comptes is not None else None
+    return pd.read_parquet(destination, partitioning=partitionnement, filters=filtres)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalisation par lot des exports de facturation Hydro-Québec")
+    parser.add_argument("source", help="Dossier ou motif glob des fichiers CSV exportés")
+    parser.add_argument("destination", nargs="?", default="consommation_enrichie",
+                        help="Dossier du jeu Parquet partitionné par compte")
+    parser.add_argument("-j", "--processus", type=int, default=None, help="Nombre de processus (défaut : tous les cœurs)")
+    args = parser.parse_args()
+
+    resume = normaliser_lot(args.source, args.destination, args.processus)
+    resume.afficher()
+    raise SystemExit(1 if resume.echecs else 0)
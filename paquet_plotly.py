@@ -0,0 +1,234 @@
+import base64
+import gzip
+import hashlib
+import inspect
+import json
+import sys
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+from plotly.offline import get_plotlyjs
+
+from instrumentation import span
+
+# Dossier des modules du projet : le code de leurs fonctions appelées par une figure entre dans sa clé de cache.
+RACINE_PROJET = Path(__file__).resolve().parent
+# Types réduits pour les tableaux numériques (notation des tableaux typés de plotly.js).
+TYPES_REDUITS = {"f8": "f4", "i8": "i4", "u8": "u4"}
+# plotly (express) n'est pas sûr entre fils : les figures sont construites une à la fois, puis sérialisées en parallèle.
+_VERROU_CONSTRUCTION = threading.Lock()
+
+_SCRIPT_AIDE = """
+var hqModeles = {};
+function hqOctets(b64) {
+    var brut = atob(b64), octets = new Uint8Array(brut.length);
+    for (var i = 0; i < brut.length; i++) octets[i] = brut.charCodeAt(i);
+    return octets;
+}
+function hqDecompresser(b64) {
+    var flux = new Blob([hqOctets(b64)]).stream().pipeThrough(new DecompressionStream("gzip"));
+    return new Response(flux).text();
+}
+function hqTracer(id, figure) {
+    var charge = typeof figure === "string" ? hqDecompresser(figure).then(JSON.parse) : Promise.resolve(figure);
+    return Promise.all([hqPret, charge]).then(function(r) {
+        var f = r[1];
+        if (f.modele) f.layout.template = hqModeles[f.modele];
+        return Plotly.newPlot(id, f.data, f.layout, f.config);
+    });
+}
+"""
+
+
+def _compresser(texte):
+    return base64.b64encode(gzip.compress(texte.encode("utf-8"), compresslevel=9, mtime=0)).decode("ascii")
+
+
+def _tableau_type(valeurs):
+    valeurs = np.ascontiguousarray(valeurs)
+    code = f"{valeurs.dtype.kind}{valeurs.dtype.itemsize}"
+    reduit = TYPES_REDUITS.get(code, code)
+    if reduit != code:
+        if valeurs.dtype.kind in "iu" and (valeurs.min() < np.iinfo(reduit).min or valeurs.max() > np.iinfo(reduit).max):
+            return None
+        valeurs = valeurs.astype(reduit)
+    tableau = {"dtype": reduit, "bdata": base64.b64encode(valeurs.tobytes()).decode("ascii")}
+    if valeurs.ndim > 1:
+        tableau["shape"] = ",".join(str(n) for n in valeurs.shape)
+    return tableau
+
+
+def _du_projet(fonction):
+    fichier = getattr(sys.modules.get(fonction.__module__), "__file__", None)
+    return fichier is not None and Path(fichier).resolve().parent == RACINE_PROJET
+
+
+def empreinte_code(fonction):
+    """Hachage du code d'une fonction qui construit une figure.
+
+    Couvre son bytecode et ses constantes (titres, couleurs, mise en page),
+    les valeurs simples qu'elle capture et, de proche en proche, le code
+    des fonctions du projet qu'elle appelle.
+    """
+    h = hashlib.sha256()
+    a_visiter, vues = [fonction], set()
+    while a_visiter:
+        fonction = a_visiter.pop()
+        if fonction.__code__ in vues:
+            continue
+        vues.add(fonction.__code__)
+        h.update(fonction.__qualname__.encode("utf-8"))
+        codes = [fonction.__code__]
+        while codes:
+            code = codes.pop()
+            h.update(code.co_code)
+            h.update(repr(code.co_names).encode("utf-8"))
+            for constante in code.co_consts:
+                if isinstance(constante, types.CodeType):
+                    codes.append(constante)
+                elif isinstance(constante, frozenset):
+                    # Ordre d'itération variable d'un processus à l'autre (hachage des chaînes).
+                    h.update(repr(sorted(map(repr, constante))).encode("utf-8"))
+                else:
+                    h.update(repr(constante).encode("utf-8"))
+            for nom in code.co_names:
+                appelee = fonction.__globals__.get(nom)
+                if inspect.isfunction(appelee) and _du_projet(appelee):
+                    a_visiter.append(appelee)
+        for cellule in fonction.__closure__ or ():
+            try:
+                valeur = cellule.cell_contents
+            except ValueError:
+                continue
+            if isinstance(valeur, (str, int, float, bool, type(None))):
+                h.update(repr(valeur).encode("utf-8"))
+            elif inspect.isfunction(valeur):
+                a_visiter.append(valeur)
+    return h.hexdigest()
+
+
+def _nb_points(fig):
+    points = 0
+    for trace in fig.data:
+        valeurs = trace.x if getattr(trace, "x", None) is not None else getattr(trace, "y", None)
+        points += len(valeurs) if valeurs is not None else 0
+    return points
+
+
+def reduire_tableaux(objet):
+    """Convertit les tableaux numériques d'une figure sérialisée en tableaux typés base64 float32/int32."""
+    if isinstance(objet, dict):
+        if "bdata" in objet and "dtype" in objet:
+            valeurs = np.frombuffer(base64.b64decode(objet["bdata"]), dtype=objet["dtype"])
+            if "shape" in objet:
+                valeurs = valeurs.reshape([int(n) for n in objet["shape"].split(",")])
+            return _tableau_type(valeurs) or objet
+        return {cle: reduire_tableaux(valeur) for cle, valeur in objet.items()}
+    if isinstance(objet, np.ndarray) and objet.dtype.kind in "fiu" and objet.size:
+        tableau = _tableau_type(objet)
+        return tableau if tableau is not None else objet
+    if isinstance(objet, (list, tuple)):
+        return [reduire_tableaux(valeur) for valeur in objet]
+    return objet
+
+
+class PaquetPlotly:
+    """Regroupe les graphiques Plotly d'une page autonome (hors ligne).
+
+    `script()` intègre une seule copie de plotly.js à placer avant le premier
+    graphique; `figure()` produit le <div> et le script d'un graphique. Les
+    tableaux numériques sont encodés en tableaux typés base64 (float32/int32
+    si `reduire`) et les modèles de mise en page communs ne sont écrits
+    qu'une fois. Avec `compresser`, plotly.js et chaque figure sont
+    compressés en gzip et décompressés par le navigateur
+    (DecompressionStream). Un `CacheFigures` permet de réutiliser la charge
+    utile des figures dont les données n'ont pas changé.
+    """
+
+    def __init__(self, compresser=False, cache=None):
+        self.compresser = compresser
+        self.cache = cache
+        self.nb_figures = 0
+        self._modeles = set()
+
+    def script(self):
+        code = get_plotlyjs()
+        if self.compresser:
+            chargement = f"""
+var hqPret = hqDecompresser("{_compresser(code)}").then(function(code) {{
+    var s = document.createElement("script");
+    s.text = code;
+    document.head.appendChild(s);
+}});"""
+            return f"<script>{_SCRIPT_AIDE}{chargement}</script>"
+        return f"<script>{code}</script><script>{_SCRIPT_AIDE}var hqPret = Promise.resolve();</script>"
+
+    def _serialiser(self, fig, reduire, config):
+        """Charge utile d'une figure : données et mise en page JSON (compressées au besoin) et modèle à part."""
+        contenu = fig.to_plotly_json()
+        donnees = reduire_tableaux(contenu["data"]) if reduire else contenu["data"]
+        mise_en_page = dict(contenu["layout"])
+        modele = mise_en_page.pop("template", None)
+        texte_modele = to_json_plotly(modele) if modele else None
+        cle_modele = hashlib.sha1(texte_modele.encode("utf-8")).hexdigest()[:12] if modele else None
+        charge = to_json_plotly({"data": donnees, "layout": mise_en_page,
+                                 "config": config or {"responsive": True}, "modele": cle_modele})
+        if self.compresser:
+            charge = f'"{_compresser(charge)}"'
+        hauteur = f"{mise_en_page['height']}px" if mise_en_page.get("height") else "100%"
+        return {"charge": charge, "hauteur": hauteur, "cle_modele": cle_modele, "modele": texte_modele}
+
+    def preparer(self, fig, reduire=True, config=None, cle=None):
+        """Charge utile d'un graphique, indépendante de sa position dans la page (sûre entre fils).
+
+        Avec un cache et une `cle` (données dont dépend la figure), `fig` peut
+        être une fonction sans argument qui construit la figure : elle n'est
+        appelée que si la charge utile n'est pas déjà en cache. La clé du
+        cache combine `cle` et le code de cette fonction (`empreinte_code`);
+        une figure déjà construite n'est pas mise en cache.
+        """
+        def produire():
+            with _VERROU_CONSTRUCTION, span("construction plotly") as etape:
+                figure = fig() if callable(fig) else fig
+                etape.compter(_nb_points(figure))
+            with span("sérialisation plotly"):
+                return self._serialiser(figure, reduire, config)
+
+        if self.cache is not None and cle is not None and callable(fig):
+            cle_cache = self.cache.cle("plotly", cle, empreinte_code(fig), self.compresser, reduire, config)
+            return json.loads(self.cache.memoiser(cle_cache, lambda: json.dumps(produire()).encode("utf-8")))
+        return produire()
+
+    def assembler(self, partie, post_script=None):
+        """<div> et script d'un graphique préparé; `{plot_id}` dans `post_script` est remplacé par l'id du <div>."""
+        self.nb_figures += 1
+        identifiant = f"graphique-{self.nb_figures}"
+        morceaux = []
+        if partie["cle_modele"] and partie["cle_modele"] not in self._modeles:
+            self._modeles.add(partie["cle_modele"])
+            morceaux.append(f'<script>hqModeles["{partie["cle_modele"]}"] = {partie["modele"]};</script>')
+        suite = ""
+        if post_script:
+            suite = ".then(function() {%s})" % post_script.replace("{plot_id}", identifiant)
+        morceaux.append(f'<div id="{identifiant}" class="plotly-graph-div" style="height:{partie["hauteur"]}; width:100%;"></div>')
+        morceaux.append(f'<script>hqTracer("{identifiant}", {partie["charge"]}){suite};</script>')
+        return "".join(morceaux)
+
+    def figure(self, fig, post_script=None, reduire=True, config=None, cle=None):
+        return self.assembler(self.preparer(fig, reduire, config, cle), post_script)
+
+    def figures(self, demandes, nb_fils=None):
+        """Fragments de plusieurs graphiques, préparés en parallèle puis assemblés dans l'ordre.
+
+        Chaque demande est une figure (ou une fonction qui la construit) ou un
+        dict avec la clé `fig` et les options de `figure()`.
+        """
+        demandes = [d if isinstance(d, dict) else {"fig": d} for d in demandes]
+        options = [{k: v for k, v in d.items() if k in ("reduire", "config", "cle")} for d in demandes]
+        with ThreadPoolExecutor(nb_fils) as pool:
+            parties = list(pool.map(lambda d, o: self.preparer(d["fig"], **o), demandes, options))
+        return [self.assembler(partie, d.get("post_script")) for partie, d in zip(parties, demandes)]
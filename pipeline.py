@@ -0,0 +1,284 @@
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import pickle
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ingestion_horaire import empreinte_fichier
+from instrumentation import span
+
+DOSSIER_PIPELINE = ".etat_hydroqc/pipeline"
+# Dossier des modules du projet : leurs sources entrent dans l'empreinte des étapes qui les utilisent.
+RACINE_PROJET = Path(__file__).resolve().parent
+
+
+@dataclass
+class Etape:
+    """Étape du pipeline : `fonction(*résultats des dépendances, **parametres, **ressources)`.
+
+    `fichiers` sont les fichiers lus par l'étape (leur contenu entre dans
+    l'empreinte) et `sorties` ceux qu'elle écrit (l'étape est relancée s'ils
+    ont disparu). Les `ressources` (cache des figures…) sont transmises sans
+    entrer dans l'empreinte.
+    """
+    nom: str
+    fonction: callable
+    dependances: tuple = ()
+    parametres: dict = field(default_factory=dict)
+    fichiers: tuple = ()
+    sorties: tuple = ()
+    ressources: dict = field(default_factory=dict)
+
+
+@dataclass
+class BilanEtape:
+    nom: str
+    executee: bool
+    duree: float = 0.0
+
+
+def _source_module(fonction):
+    try:
+        return Path(inspect.getsourcefile(fonction)).read_bytes()
+    except (OSError, TypeError):
+        return fonction.__qualname__.encode("utf-8")
+
+
+def _fichier_projet(module):
+    fichier = getattr(module, "__file__", None)
+    if fichier is None or Path(fichier).resolve().parent != RACINE_PROJET:
+        return None
+    return Path(fichier).resolve()
+
+
+def _modules_importes(fichier):
+    """Modules chargés que nomme le source (imports de noms de valeurs et imports locaux aux fonctions compris)."""
+    for noeud in ast.walk(ast.parse(fichier.read_bytes())):
+        if isinstance(noeud, ast.Import):
+            noms = [alias.name for alias in noeud.names]
+        elif isinstance(noeud, ast.ImportFrom) and noeud.level == 0 and noeud.module:
+            noms = [noeud.module]
+        else:
+            continue
+        for nom in noms:
+            yield sys.modules.get(nom)
+
+
+def _modules_projet(module):
+    """Fichiers des modules du projet utilisés par `module`, lui compris, en suivant leurs imports."""
+    fichiers, a_visiter, vus = set(), [module], set()
+    while a_visiter:
+        module = a_visiter.pop()
+        if module is None or module.__name__ in vus:
+            continue
+        vus.add(module.__name__)
+        fichier = _fichier_projet(module)
+        if fichier is None:
+            continue
+        fichiers.add(fichier)
+        a_visiter.extend(_modules_importes(fichier))
+        for valeur in vars(module).values():
+            if inspect.ismodule(valeur):
+                a_visiter.append(valeur)
+            elif isinstance(getattr(valeur, "__module__", None), str):
+                a_visiter.append(sys.modules.get(valeur.__module__))
+    return sorted(fichiers)
+
+
+def _sources(fonction):
+    """Sources dont dépend une étape : modules du projet atteints depuis sa fonction, sinon le module de celle-ci."""
+    fichiers = _modules_projet(inspect.getmodule(fonction))
+    if not fichiers:
+        return _source_module(fonction)
+    return b"".join(f.name.encode("utf-8") + b"\0" + f.read_bytes() for f in fichiers)
+
+
+class Pipeline:
+    """Exécute des étapes dépendantes en parallèle (fils) en partageant leurs résultats en mémoire.
+
+    L'empreinte d'une étape combine sa fonction (sources des modules du
+    projet qu'elle utilise, directement ou non), ses paramètres, le contenu de ses fichiers d'entrée et les empreintes de ses
+    dépendances. Une étape dont l'empreinte n'a pas changé depuis la dernière
+    exécution n'est pas relancée : son résultat est relu depuis le disque,
+    et seulement si une étape qui en dépend doit s'exécuter.
+    """
+
+    def __init__(self, etapes, dossier=DOSSIER_PIPELINE, nb_fils=None):
+        self.etapes = {etape.nom: etape for etape in etapes}
+        self.dossier = Path(dossier)
+        self.nb_fils = nb_fils
+        for etape in etapes:
+            for dependance in etape.dependances:
+                if dependance not in self.etapes:
+                    raise ValueError(f"étape {etape.nom!r} : dépendance inconnue {dependance!r}")
+        self.ordre = self._ordre_topologique()
+
+    def _ordre_topologique(self):
+        ordre, visitees, en_cours = [], set(), set()
+
+        def visiter(nom):
+            if nom in visitees:
+                return
+            if nom in en_cours:
+                raise ValueError(f"cycle dans le pipeline autour de l'étape {nom!r}")
+            en_cours.add(nom)
+            for dependance in self.etapes[nom].dependances:
+                visiter(dependance)
+            en_cours.discard(nom)
+            visitees.add(nom)
+            ordre.append(nom)
+
+        for nom in self.etapes:
+            visiter(nom)
+        return ordre
+
+    def _empreintes(self):
+        empreintes = {}
+        for nom in self.ordre:
+            etape = self.etapes[nom]
+            h = hashlib.sha256(nom.encode("utf-8"))
+            h.update(etape.fonction.__qualname__.encode("utf-8"))
+            h.update(_sources(etape.fonction))
+            h.update(repr(sorted(etape.parametres.items())).encode("utf-8"))
+            for chemin in etape.fichiers:
+                h.update(empreinte_fichier(chemin).encode("ascii"))
+            for dependance in etape.dependances:
+                h.update(empreintes[dependance].encode("ascii"))
+            empreintes[nom] = h.hexdigest()
+        return empreintes
+
+    def _chemin_resultat(self, nom):
+        return self.dossier / f"{nom}.pkl"
+
+    def _manifeste(self):
+        chemin = self.dossier / "manifeste.json"
+        if not chemin.exists():
+            return {}
+        with open(chemin, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _a_executer(self, empreintes, manifeste, forcer):
+        """Étapes à relancer : empreinte changée, sortie ou résultat manquant alors qu'une étape en a besoin."""
+        a_executer = set()
+        for nom in self.ordre:
+            etape = self.etapes[nom]
+            if forcer or manifeste.get(nom) != empreintes[nom] or not all(Path(s).exists() for s in etape.sorties):
+                a_executer.add(nom)
+        change = True
+        while change:
+            change = False
+            for nom in a_executer.copy():
+                for dependance in self.etapes[nom].dependances:
+                    if dependance not in a_executer and not self._chemin_resultat(dependance).exists():
+                        a_executer.add(dependance)
+                        change = True
+        return a_executer
+
+    def executer(self, forcer=False):
+        """Exécute le pipeline et retourne (résultats disponibles en mémoire, bilans par étape)."""
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        empreintes = self._empreintes()
+        manifeste = self._manifeste()
+        a_executer = self._a_executer(empreintes, manifeste, forcer)
+        resultats, bilans = {}, {}
+
+        def resultat(nom):
+            if nom not in resultats:
+                with open(self._chemin_resultat(nom), "rb") as f:
+                    resultats[nom] = pickle.load(f)
+            return resultats[nom]
+
+        def lancer(nom):
+            etape = self.etapes[nom]
+            debut = time.perf_counter()
+            with span(f"pipeline : {nom}"):
+                valeur = etape.fonction(*(resultat(d) for d in etape.dependances), **etape.parametres, **etape.ressources)
+            return valeur, time.perf_counter() - debut
+
+        for nom in self.ordre:
+            if nom not in a_executer:
+                bilans[nom] = BilanEtape(nom, executee=False)
+
+        restantes = [nom for nom in self.ordre if nom in a_executer]
+        with ThreadPoolExecutor(self.nb_fils) as pool:
+            en_cours = {}
+            while restantes or en_cours:
+                for nom in list(restantes):
+                    if all(d in resultats or d not in a_executer for d in self.etapes[nom].dependances):
+                        # Les résultats des étapes inchangées sont relus ici, dans le fil principal.
+                        for dependance in self.etapes[nom].dependances:
+                            resultat(dependance)
+                        en_cours[pool.submit(lancer, nom)] = nom
+                        restantes.remove(nom)
+                terminees, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                for tache in terminees:
+                    nom = en_cours.pop(tache)
+                    valeur, duree = tache.result()
+                    resultats[nom] = valeur
+                    bilans[nom] = BilanEtape(nom, executee=True, duree=duree)
+                    with open(self._chemin_resultat(nom), "wb") as f:
+                        pickle.dump(valeur, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    manifeste[nom] = empreintes[nom]
+                    with open(self.dossier / "manifeste.json", "w", encoding="utf-8") as f:
+                        json.dump(manifeste, f, indent=1)
+        return resultats, [bilans[nom] for nom in self.ordre]
+
+
+def etapes_facturation(fichier="consommation_enrichie01.csv", cache=None, fichier_grille=None, compresser=False):
+    """Étapes des rapports de facturation : lecture, nettoyage, simulation, expansion, projection, rapports.
+
+    Les options sont passées en paramètres des étapes : elles entrent dans
+    leur empreinte. Le mode incrémental des modules est désactivé, le
+    pipeline ne relançant déjà que les étapes dont les entrées ont changé.
+    """
+    import pandas as pd
+
+    import tarification02
+    import tarification03
+    from tarification01 import nettoyer_consommation
+
+    return [
+        Etape("lecture", pd.read_csv, parametres={"filepath_or_buffer": fichier}, fichiers=(fichier,)),
+        Etape("nettoyage", nettoyer_consommation, ("lecture",)),
+        Etape("simulation", tarification02.simuler_tarifs, ("nettoyage",), {"fichier_grille": fichier_grille},
+              fichiers=tuple(f for f in (fichier_grille,) if f)),
+        Etape("expansion", tarification03.developper_journalier, ("nettoyage",),
+              {"fichier": fichier, "incremental": False}),
+        Etape("projection", tarification03.projeter, ("expansion",)),
+        Etape("rapport_dynamique", tarification02.rapport_dynamique, ("simulation",),
+              {"fichier": fichier, "sortie": tarification02.SORTIE, "incremental": False, "compresser": compresser},
+              sorties=(tarification02.SORTIE,), ressources={"cache": cache}),
+        Etape("rapport_economique", tarification03.rapport_economique, ("expansion", "projection"),
+              {"sortie": tarification03.SORTIE, "compresser": compresser}, sorties=(tarification03.SORTIE,),
+              ressources={"cache": cache}),
+    ]
+
+
+if __name__ == "__main__":
+    from cache_figures import CacheFigures
+
+    parser = argparse.ArgumentParser(description="Pipeline des rapports de facturation Hydro-Québec")
+    parser.add_argument("fichier", nargs="?", default="consommation_enrichie01.csv",
+                        help="CSV de consommation enrichi (sortie de tarification01.py)")
+    parser.add_argument("-j", "--fils", type=int, default=None, help="Nombre de fils (défaut : automatique)")
+    parser.add_argument("--forcer", action="store_true", help="Relancer toutes les étapes")
+    parser.add_argument("--sans-cache", action="store_true", help="Ne pas utiliser le cache des figures")
+    parser.add_argument("--grille", default=None, help="Grille tarifaire datée (CSV; défaut : tarif D unique)")
+    parser.add_argument("--compresser", action="store_true", help="Compresser plotly.js et les graphiques (gzip)")
+    args = parser.parse_args()
+
+    cache = None if args.sans_cache else CacheFigures()
+    debut = time.perf_counter()
+    _, bilans = Pipeline(etapes_facturation(args.fichier, cache, args.grille, args.compresser), nb_fils=args.fils).executer(args.forcer)
+    for bilan in bilans:
+        etat = f"exécutée en {bilan.duree:.2f} s" if bilan.executee else "inchangée"
+        print(f"{'↻' if bilan.executee else '✓'} {bilan.nom:<20} {etat}")
+    print(f"✅ Pipeline terminé en {time.perf_counter() - debut:.2f} s")
+    if cache is not None:
+        print(cache.resume())
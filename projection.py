@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from calendrier import joindre_calendrier
+
+COLONNES_PROFIL = ["kWh", "Montant ($)", "Température moyenne (°C)"]
+
+
+def profil_journalier(dfj, colonne_date="date"):
+    """Moyennes historiques par jour de l'année (1 à 366), trous comblés par report."""
+    jour = joindre_calendrier(dfj[colonne_date], ["jour"])["jour"]
+    profil = dfj[COLONNES_PROFIL].astype(float).groupby(jour).mean().reindex(range(1, 367))
+    return profil.ffill().bfill()
+
+
+def _base(profil, dates):
+    return profil.reindex(joindre_calendrier(dates, ["jour"])["jour"]).to_numpy(dtype=float)
+
+
+def trajectoire(profil, debut, nb_jours, generateur, ecart_bruit=0.05, ecart_temperature=1.0):
+    """Une trajectoire journalière simulée (même bruit relatif sur kWh et montant)."""
+    dates = pd.date_range(debut, periods=nb_jours, freq="D")
+    base = _base(profil, dates)
+    bruit = generateur.normal(0, ecart_bruit, nb_jours)
+    return pd.DataFrame({
+        "date": dates,
+        "kWh": base[:, 0] * (1 + bruit),
+        "Montant ($)": base[:, 1] * (1 + bruit),
+        "Température moyenne (°C)": base[:, 2] + generateur.normal(0, ecart_temperature, nb_jours)
+    })
+
+
+def projeter_scenarios(profil, debut, nb_jours, nb_scenarios=1000, graine=None, ecart_bruit=0.05,
+                       centiles=(5, 50, 95), budget_memoire=256 * 2 ** 20):
+    """Simule `nb_scenarios` trajectoires et retourne les bandes mensuelles de kWh et de coût.
+
+    Les scénarios sont générés par blocs (scénarios × jours) dont la taille
+    respecte `budget_memoire` (en octets); seuls les totaux mensuels de chaque
+    scénario sont conservés. Retourne (bandes, totaux) : `bandes` contient une
+    ligne par mois et les colonnes `kWh_P5`, `Montant ($)_P50`, etc.; `totaux`
+    contient le total de chaque scénario sur tout l'horizon.
+    """
+    dates = pd.date_range(debut, periods=nb_jours, freq="D")
+    base = _base(profil, dates)
+    mois = dates.to_period("M")
+    debuts_mois = np.flatnonzero(np.r_[True, mois[1:] != mois[:-1]])
+
+    generateur = np.random.default_rng(graine)
+    # Tableaux temporaires par bloc : bruit, kWh et montant en float64.
+    taille_bloc = max(1, int(budget_memoire // (nb_jours * 8 * 3)))
+    mensuel_kwh = np.empty((nb_scenarios, debuts_mois.size))
+    mensuel_montant = np.empty((nb_scenarios, debuts_mois.size))
+    for depart in range(0, nb_scenarios, taille_bloc):
+        fin = min(depart + taille_bloc, nb_scenarios)
+        facteur = 1 + generateur.normal(0, ecart_bruit, (fin - depart, nb_jours))
+        mensuel_kwh[depart:fin] = np.add.reduceat(facteur * base[:, 0], debuts_mois, axis=1)
+        mensuel_montant[depart:fin] = np.add.reduceat(facteur * base[:, 1], debuts_mois, axis=1)
+
+    bandes = pd.DataFrame({"mois": mois[debuts_mois].astype(str)})
+    for nom, valeurs in (("kWh", mensuel_kwh), ("Montant ($)", mensuel_montant)):
+        for c, ligne in zip(centiles, np.percentile(valeurs, centiles, axis=0)):
+            bandes[f"{nom}_P{c}"] = ligne
+    totaux = pd.DataFrame({"kWh": mensuel_kwh.sum(axis=1), "Montant ($)": mensuel_montant.sum(axis=1)})
+    return bandes, totaux
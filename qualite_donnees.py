@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Les horodatages des exports sont en heure locale (sans fuseau) : les changements d'heure y laissent
+# une heure inexistante au printemps et une heure ambiguë à l'automne.
+FUSEAU = "America/Montreal"
+PAS = pd.Timedelta(hours=1)
+# Bornes par défaut d'une colonne : quartiles ± ECART_INTERQUARTILE × écart interquartile.
+ECART_INTERQUARTILE = 5.0
+# Trous listés par page dans le rapport (les autres pages sont repliées).
+TAILLE_PAGE = 50
+COLONNES_HORS_LIMITES = ["Colonne", "Borne basse", "Borne haute", "Manquantes", "Hors limites"]
+
+
+def _plages(horodatages, pas):
+    """Regroupe des horodatages triés et uniques en plages consécutives : (débuts, fins, nombre par plage)."""
+    if horodatages.size == 0:
+        return horodatages, horodatages, np.zeros(0, dtype=np.int64)
+    rupture = np.r_[True, np.diff(horodatages) != pas]
+    fin = np.r_[rupture[1:], True]
+    return horodatages[rupture], horodatages[fin], np.bincount(np.cumsum(rupture) - 1)
+
+
+def _heures_particulieres(premier, dernier, fuseau):
+    """Heures inexistantes (printemps) et ambiguës (automne) entre deux horodatages locaux.
+
+    Seules les heures des jours où le décalage horaire change (repérés à midi) sont examinées.
+    """
+    midis = pd.date_range(premier.floor("D") - pd.Timedelta(hours=12), dernier.ceil("D") + pd.Timedelta(hours=12),
+                          freq="D")
+    decalages = midis.tz_localize(fuseau).tz_convert("UTC").tz_localize(None) - midis
+    jours = midis[1:][decalages[1:] != decalages[:-1]].floor("D")
+    if jours.empty:
+        return np.array([], dtype="datetime64[ns]"), np.array([], dtype="datetime64[ns]")
+    heures = pd.DatetimeIndex(np.concatenate([pd.date_range(j, periods=24, freq="h").to_numpy() for j in jours]))
+    inexistantes = heures[heures.tz_localize(fuseau, ambiguous=True, nonexistent="NaT").isna()]
+    ambigues = heures[heures.tz_localize(fuseau, ambiguous="NaT", nonexistent="shift_forward").isna()]
+    return inexistantes.to_numpy(), ambigues.to_numpy()
+
+
+def _compter_dans(triees, debuts, fins):
+    return np.searchsorted(triees, fins, side="right") - np.searchsorted(triees, debuts, side="left")
+
+
+def _presents(triees, valeurs):
+    """Appartenance de chaque valeur à un tableau trié (recherche binaire, plus rapide que np.isin)."""
+    return _compter_dans(triees, valeurs, valeurs) > 0
+
+
+@dataclass
+class BilanQualite:
+    """Bilan de qualité d'une série horaire.
+
+    `trous` et `doublons` sont des plages (Début, Fin inclus) plutôt qu'une
+    ligne par heure; les heures sautées ou répétées par les changements
+    d'heure sont rapportées à part dans `changements_heure`.
+    """
+    premier: pd.Timestamp
+    dernier: pd.Timestamp
+    nb_lignes: int
+    nb_attendues: int
+    trous: pd.DataFrame
+    doublons: pd.DataFrame
+    changements_heure: pd.DataFrame
+    hors_limites: pd.DataFrame
+
+    @property
+    def intervalles_manquants(self):
+        """Trous sous forme d'IntervalIndex (bornes incluses)."""
+        return pd.IntervalIndex.from_arrays(self.trous["Début"], self.trous["Fin"], closed="both")
+
+    def est_complet(self, debut, fin):
+        """Vrai si toutes les heures de [debut, fin] sont dans la série (recherche binaire parmi les trous)."""
+        debut, fin = pd.Timestamp(debut), pd.Timestamp(fin)
+        if self.premier is None or debut < self.premier or fin > self.dernier:
+            return False
+        position = np.searchsorted(self.trous["Fin"].to_numpy(), debut.to_datetime64(), side="left")
+        return position == len(self.trous) or self.trous["Début"].iloc[position] > fin
+
+    @property
+    def heures_manquantes(self):
+        return int(self.trous["Heures manquantes"].sum())
+
+    def prolonger(self, suite):
+        """Bilan de la série prolongée, `suite` étant le bilan des lignes ajoutées précédé de notre dernier horodatage.
+
+        Trous, doublons et changements d'heure jusqu'à `dernier` sont repris
+        tels quels; les valeurs hors limites sont celles de `suite`.
+        """
+        if self.premier is None:
+            return suite
+        if suite.premier is None:
+            return self
+        doublons = [self.doublons, suite.doublons]
+        if len(self.doublons) and len(suite.doublons) and \
+                self.doublons["Fin"].iloc[-1] + PAS == suite.doublons["Début"].iloc[0]:
+            # Plage de doublons à cheval sur les deux bilans.
+            jointe = self.doublons.iloc[[-1]].assign(Fin=suite.doublons["Fin"].iloc[0])
+            jointe["Lignes en trop"] += suite.doublons["Lignes en trop"].iloc[0]
+            doublons = [self.doublons.iloc[:-1], jointe, suite.doublons.iloc[1:]]
+        anciens = self.changements_heure[self.changements_heure["Date"] <= self.dernier]
+        nouveaux = suite.changements_heure[suite.changements_heure["Date"] > self.dernier]
+        changements = pd.concat([anciens, nouveaux], ignore_index=True)
+        inexistantes = int((changements["Changement"] == "heure avancée").sum())
+        nb_attendues = int((suite.dernier - self.premier) // PAS) + 1 - inexistantes
+        return BilanQualite(self.premier, suite.dernier, self.nb_lignes + suite.nb_lignes - 1, nb_attendues,
+                            pd.concat([self.trous, suite.trous], ignore_index=True),
+                            pd.concat(doublons, ignore_index=True), changements, suite.hors_limites)
+
+    def resume_mensuel(self):
+        """Trous regroupés par mois de début : nombre, heures manquantes et plus long trou."""
+        mois = self.trous["Début"].dt.to_period("M").astype(str).rename("Mois")
+        return self.trous.groupby(mois)["Heures manquantes"].agg(
+            Trous="count", **{"Heures manquantes": "sum", "Plus long (h)": "max"}).reset_index()
+
+    def html(self, taille_page=TAILLE_PAGE):
+        """Résumé HTML : chiffres clés, tableau mensuel des trous, trous paginés et anomalies."""
+        morceaux = [
+            f"<p>Période couverte : {self.premier} → {self.dernier} "
+            f"({self.nb_lignes} lignes pour {self.nb_attendues} heures attendues)</p>",
+            "<ul>",
+            f"<li>Trous (>1h) : {len(self.trous)}, {self.heures_manquantes} heure(s) manquante(s)</li>",
+            f"<li>Horodatages en double : {int(self.doublons['Lignes en trop'].sum())} ligne(s) en trop "
+            f"sur {len(self.doublons)} plage(s)</li>",
+            f"<li>Changements d'heure : {len(self.changements_heure)}</li>",
+            f"<li>Valeurs hors limites : {int(self.hors_limites['Hors limites'].sum())}</li>",
+            "</ul>",
+        ]
+        if len(self.trous):
+            morceaux.append("<h3>Trous par mois</h3>")
+            morceaux.append(self.resume_mensuel().to_html(index=False, border=0))
+            for depart in range(0, len(self.trous), taille_page):
+                page = self.trous.iloc[depart:depart + taille_page]
+                ouvert = " open" if depart == 0 else ""
+                morceaux.append(f"<details{ouvert}><summary>Trous {depart + 1} à {depart + len(page)}</summary>"
+                                + page.to_html(index=False, border=0) + "</details>")
+        for titre, tableau in (("Horodatages en double", self.doublons), ("Changements d'heure", self.changements_heure),
+                               ("Valeurs hors limites", self.hors_limites[self.hors_limites["Hors limites"] > 0])):
+            if len(tableau):
+                morceaux.append(f"<h3>{titre}</h3>" + tableau.head(taille_page).to_html(index=False, border=0))
+        return "".join(morceaux)
+
+
+def _bornes_quartiles(q1, q3, ecart=ECART_INTERQUARTILE):
+    return q1 - ecart * (q3 - q1), q3 + ecart * (q3 - q1)
+
+
+def bornes_par_defaut(serie, ecart=ECART_INTERQUARTILE):
+    return _bornes_quartiles(*serie.quantile([0.25, 0.75]).astype(float), ecart)
+
+
+def analyser(df, colonnes=(), colonne_date="Datetime", bornes=None, fuseau=FUSEAU, accumulateurs=None):
+    """Bilan de qualité d'une série horaire : trous, doublons, changements d'heure et valeurs hors limites.
+
+    Tout est calculé sur les horodatages triés, sans boucle par ligne.
+    `bornes` associe à une colonne ses valeurs (min, max) admises; à défaut,
+    les bornes sont tirées des quartiles de la colonne. Avec `accumulateurs`
+    (`statistiques_flux.AccumulateurColonne` par colonne, lecture par blocs),
+    `df` peut se limiter à la colonne de dates : les valeurs hors limites
+    sont comptées sur leurs histogrammes, à un bac près.
+    """
+    horodatages = pd.to_datetime(df[colonne_date]).dropna().to_numpy(dtype="datetime64[ns]")
+    horodatages.sort()
+    pas = PAS.to_timedelta64()
+    nouveau = np.r_[True, horodatages[1:] != horodatages[:-1]] if horodatages.size else np.zeros(0, dtype=bool)
+    uniques = horodatages[nouveau]
+    comptes = np.diff(np.r_[np.flatnonzero(nouveau), horodatages.size])
+    if accumulateurs is None:
+        hors_limites = _hors_limites(df, colonnes, bornes or {})
+    else:
+        hors_limites = _hors_limites_accumulateurs(accumulateurs, colonnes, bornes or {})
+    if uniques.size == 0:
+        vide = pd.DataFrame({"Début": pd.Series(dtype="datetime64[ns]"), "Fin": pd.Series(dtype="datetime64[ns]")})
+        return BilanQualite(None, None, 0, 0, vide.assign(**{"Heures manquantes": 0}),
+                            vide.assign(**{"Lignes en trop": 0}), pd.DataFrame(columns=["Date", "Changement", "Constat"]),
+                            hors_limites)
+    premier, dernier = pd.Timestamp(uniques[0]), pd.Timestamp(uniques[-1])
+    inexistantes, ambigues = _heures_particulieres(premier, dernier, fuseau)
+
+    # Trous : écarts de plus d'un pas entre horodatages consécutifs, sans compter les heures inexistantes.
+    ecarts = np.diff(uniques)
+    saut = np.flatnonzero(ecarts > pas)
+    debuts, fins = uniques[saut] + pas, uniques[saut + 1] - pas
+    manquantes = (ecarts[saut] // pas - 1) - _compter_dans(inexistantes, debuts, fins)
+    reels = manquantes > 0
+    trous = pd.DataFrame({"Début": debuts[reels], "Fin": fins[reels], "Heures manquantes": manquantes[reels]})
+
+    # Doublons : horodatages répétés regroupés en plages; l'heure ambiguë vue deux fois est normale.
+    repetes = comptes > 1
+    normales = _presents(ambigues, uniques) & (comptes == 2)
+    en_double = uniques[repetes & ~normales]
+    debuts_d, fins_d, _ = _plages(en_double, pas)
+    surplus = np.add.reduceat(comptes[repetes & ~normales] - 1, np.searchsorted(en_double, debuts_d)) \
+        if en_double.size else np.zeros(0, dtype=np.int64)
+    doublons = pd.DataFrame({"Début": debuts_d, "Fin": fins_d, "Lignes en trop": surplus})
+
+    # Changements d'heure couverts par la série et ce que l'export en montre.
+    dans_serie = _presents(uniques, inexistantes)
+    comptes_ambigues = np.zeros(ambigues.size, dtype=np.int64)
+    position = np.searchsorted(uniques, ambigues)
+    trouvees = (position < uniques.size) & (uniques[np.minimum(position, uniques.size - 1)] == ambigues)
+    comptes_ambigues[trouvees] = comptes[position[trouvees]]
+    changements = pd.concat([
+        pd.DataFrame({"Date": inexistantes, "Changement": "heure avancée",
+                      "Constat": np.where(dans_serie, "heure inexistante présente", "heure sautée")}),
+        pd.DataFrame({"Date": ambigues, "Changement": "heure normale",
+                      "Constat": [f"heure répétée : {n} ligne(s)" for n in comptes_ambigues]}),
+    ], ignore_index=True).sort_values("Date", ignore_index=True)
+    # Un changement d'heure tombant dans un trou n'apprend rien sur l'export.
+    dates = changements["Date"].to_numpy()
+    position = np.searchsorted(trous["Fin"].to_numpy(), dates, side="left")
+    dans_trou = position < len(trous)
+    dans_trou[dans_trou] = trous["Début"].to_numpy()[position[dans_trou]] <= dates[dans_trou]
+    changements.loc[dans_trou, "Constat"] = "dans un trou"
+
+    nb_attendues = int((uniques[-1] - uniques[0]) // pas) + 1 - inexistantes.size
+    return BilanQualite(premier, dernier, len(horodatages), nb_attendues, trous, doublons, changements, hors_limites)
+
+
+def _hors_limites(df, colonnes, bornes):
+    lignes = []
+    for col in colonnes:
+        serie = df[col]
+        bas, haut = bornes.get(col) or bornes_par_defaut(serie)
+        valeurs = serie.to_numpy(dtype=float)
+        lignes.append({"Colonne": col, "Borne basse": bas, "Borne haute": haut,
+                       "Manquantes": int(np.isnan(valeurs).sum()),
+                       "Hors limites": int(((valeurs < bas) | (valeurs > haut)).sum())})
+    return pd.DataFrame(lignes, columns=COLONNES_HORS_LIMITES)
+
+
+def _hors_limites_accumulateurs(accumulateurs, colonnes, bornes):
+    lignes = []
+    for col in colonnes:
+        acc = accumulateurs[col]
+        quartiles = acc.quantiles([0.25, 0.75])
+        bas, haut = bornes.get(col) or _bornes_quartiles(quartiles[0.25], quartiles[0.75])
+        lignes.append({"Colonne": col, "Borne basse": bas, "Borne haute": haut, "Manquantes": acc.manquantes,
+                       "Hors limites": acc.histogramme.compter_hors(bas, haut)})
+    return pd.DataFrame(lignes, columns=COLONNES_HORS_LIMITES)
@@ -0,0 +1,157 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Températures d'équilibre candidates (°C) du modèle degrés-jours à point de rupture.
+TEMPERATURES_EQUILIBRE = np.arange(8.0, 22.01, 0.25)
+
+
+def _moindres_carres(n, sx, sy, sxx, sxy, syy):
+    """Droite des moindres carrés à partir des sommes (tableaux par groupe) : pente, ordonnée, SCE, SCT."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vxx = sxx - sx * sx / n
+        vxy = sxy - sx * sy / n
+        sct = syy - sy * sy / n
+        pente = vxy / vxx
+        ordonnee = (sy - pente * sx) / n
+        sce = sct - pente * vxy
+    return pente, ordonnee, np.maximum(sce, 0.0), sct
+
+
+@dataclass
+class Droite:
+    pente: float
+    ordonnee: float
+    r2: float
+    n: int
+
+    def predire(self, x):
+        return self.ordonnee + self.pente * np.asarray(x, dtype=float)
+
+
+def ajuster_droite(x, y):
+    """Régression linéaire y = ordonnée + pente × x en forme fermée (valeurs manquantes ignorées)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valides = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valides], y[valides]
+    n = x.size
+    if n < 2 or x.min() == x.max():
+        return Droite(np.nan, np.nan, np.nan, n)
+    pente, ordonnee, sce, sct = _moindres_carres(n, x.sum(), y.sum(), x @ x, x @ y, y @ y)
+    return Droite(float(pente), float(ordonnee), float(1 - sce / sct) if sct > 0 else np.nan, n)
+
+
+def ajouter_droites(fig):
+    """Ajoute une droite des moindres carrés par série de points d'une figure plotly (remplace trendline="ols").
+
+    Chaque droite reprend la couleur et le groupe de légende de sa série;
+    l'équation et le R² sont affichés au survol.
+    """
+    import plotly.graph_objects as go
+
+    for trace in list(fig.data):
+        if trace.type != "scatter" or trace.x is None or trace.y is None:
+            continue
+        x = np.asarray(trace.x, dtype=float)
+        droite = ajuster_droite(x, trace.y)
+        if droite.n < 2 or not np.isfinite(droite.pente):
+            continue
+        bornes = np.array([np.nanmin(x), np.nanmax(x)])
+        fig.add_trace(go.Scatter(
+            x=bornes, y=droite.predire(bornes), mode="lines", name=trace.name, legendgroup=trace.legendgroup,
+            showlegend=False, line=dict(color=trace.marker.color), xaxis=trace.xaxis, yaxis=trace.yaxis,
+            hovertemplate=(f"<b>Droite des moindres carrés</b><br>y = {droite.pente:.4g} x + {droite.ordonnee:.4g}"
+                           f"<br>R² = {droite.r2:.3f}<extra>{trace.name or ''}</extra>"),
+        ))
+    return fig
+
+
+@dataclass
+class ModeleDegresJours:
+    """Modèle à point de rupture par groupe : conso = base + pente × max(0, temperature_equilibre − T).
+
+    Les paramètres sont des tableaux alignés sur `groupes` (un seul groupe
+    `None` sans regroupement). `temperature_equilibre` vaut NaN pour un
+    groupe sans composante de chauffage (pente nulle).
+    """
+    groupes: np.ndarray
+    temperature_equilibre: np.ndarray
+    base: np.ndarray
+    pente: np.ndarray
+    r2: np.ndarray
+    n: np.ndarray
+
+    def _positions(self, groupes, taille):
+        if groupes is None:
+            return np.zeros(taille, dtype=np.int64)
+        positions = pd.Index(self.groupes).get_indexer(np.asarray(groupes))
+        if (positions < 0).any():
+            raise KeyError("groupe absent du modèle degrés-jours")
+        return positions
+
+    def degres_jours(self, temperature, groupes=None):
+        temperature = np.asarray(temperature, dtype=float)
+        p = self._positions(groupes, temperature.size)
+        return np.clip(np.nan_to_num(self.temperature_equilibre[p]) - temperature, 0, None)
+
+    def predire(self, temperature, groupes=None):
+        """Consommation attendue pour des températures (par exemple celles d'une projection)."""
+        temperature = np.asarray(temperature, dtype=float)
+        p = self._positions(groupes, temperature.size)
+        return self.base[p] + self.pente[p] * self.degres_jours(temperature, groupes)
+
+    def tableau(self):
+        return pd.DataFrame({
+            "temperature_equilibre": self.temperature_equilibre, "base": self.base, "pente": self.pente,
+            "r2": self.r2, "n": self.n,
+        }, index=pd.Index(self.groupes, name="groupe"))
+
+
+def ajuster_degres_jours(temperature, conso, groupes=None, poids=None, temperatures_equilibre=TEMPERATURES_EQUILIBRE):
+    """Ajuste le modèle degrés-jours à point de rupture, pour tous les groupes (comptes) à la fois.
+
+    Pour chaque température d'équilibre candidate, la droite conso ~ degrés-jours
+    de chaque groupe est obtenue en forme fermée à partir de sommes par groupe
+    (`np.bincount`); la candidate de plus petite somme des carrés des écarts
+    est retenue. Une pente négative est ramenée à un modèle constant.
+    `poids` (par exemple le nombre de jours de chaque période) pondère les
+    observations.
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    conso = np.asarray(conso, dtype=float)
+    w = np.ones_like(conso) if poids is None else np.asarray(poids, dtype=float)
+    if groupes is None:
+        codes, uniques = np.zeros(conso.size, dtype=np.int64), np.array([None], dtype=object)
+    else:
+        codes, uniques = pd.factorize(np.asarray(groupes), sort=True)
+        uniques = np.asarray(uniques)
+    valides = np.isfinite(temperature) & np.isfinite(conso) & np.isfinite(w) & (codes >= 0)
+    codes, temperature, conso, w = codes[valides], temperature[valides], conso[valides], w[valides]
+    nb = len(uniques)
+
+    def somme(valeurs):
+        return np.bincount(codes, weights=valeurs, minlength=nb)
+
+    n, sy, syy = somme(w), somme(w * conso), somme(w * conso * conso)
+    nombre = np.bincount(codes, minlength=nb)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moyenne = sy / n
+        sct = syy - sy * sy / n
+
+    meilleur_sce = sct.copy()
+    base, pente = moyenne.copy(), np.zeros(nb)
+    equilibre = np.full(nb, np.nan)
+    for candidate in temperatures_equilibre:
+        h = np.clip(candidate - temperature, 0, None)
+        p, o, sce, _ = _moindres_carres(n, somme(w * h), sy, somme(w * h * h), somme(w * h * conso), syy)
+        meilleur = np.isfinite(p) & (p > 0) & (sce < meilleur_sce - 1e-9 * np.abs(meilleur_sce))
+        meilleur_sce = np.where(meilleur, sce, meilleur_sce)
+        base = np.where(meilleur, o, base)
+        pente = np.where(meilleur, p, pente)
+        equilibre = np.where(meilleur, candidate, equilibre)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(sct > 0, 1 - meilleur_sce / sct, np.nan)
+    return ModeleDegresJours(uniques, equilibre, base, pente, r2, nombre)
@@ -0,0 +1,256 @@
+import base64
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from instrumentation import marque, reprendre, span, spans_depuis
+from statistiques_flux import kde_binnee
+
+# pyplot garde un état global : un seul fil trace à la fois dans un même processus.
+_VERROU_PYPLOT = threading.Lock()
+
+# Options d'enregistrement par format d'image (transmises à Pillow par matplotlib).
+OPTIONS_FORMAT_IMAGE = {
+    "png": {"optimize": True},
+    "webp": {"lossless": True},
+}
+
+
+@dataclass
+class SpecHistogramme:
+    titre: str
+    bords: np.ndarray
+    comptes: np.ndarray
+    couleur: str = "blue"
+    kde_x: np.ndarray = None
+    kde_y: np.ndarray = None
+    xlabel: str = ""
+    ylabel: str = "Count"
+
+    def tracer(self, plt):
+        plt.bar(self.bords[:-1], self.comptes, width=np.diff(self.bords), align="edge",
+                color=self.couleur, alpha=0.5, edgecolor="white")
+        if self.kde_x is not None and len(self.kde_x):
+            plt.plot(self.kde_x, self.kde_y, color=self.couleur)
+        plt.xlabel(self.xlabel)
+        plt.ylabel(self.ylabel)
+        plt.title(self.titre)
+
+
+@dataclass
+class SpecBoites:
+    titre: str
+    etiquettes: list
+    stats: list
+    couleur: str = "purple"
+    xlabel: str = ""
+    ylabel: str = ""
+    rotation: int = 0
+
+    def tracer(self, plt):
+        stats = [dict(s, label=str(e)) for e, s in zip(self.etiquettes, self.stats)]
+        ax = plt.gca()
+        ax.bxp(stats, positions=range(len(stats)), patch_artist=True, widths=0.8,
+               boxprops=dict(facecolor=self.couleur, alpha=0.8),
+               medianprops=dict(color="white"),
+               flierprops=dict(marker="d", markersize=4, markerfacecolor="gray", markeredgecolor="gray"))
+        plt.xlabel(self.xlabel)
+        plt.ylabel(self.ylabel)
+        plt.title(self.titre)
+        if self.rotation:
+            plt.xticks(rotation=self.rotation)
+
+
+@dataclass
+class SpecCamembert:
+    titre: str
+    valeurs: list
+    etiquettes: list
+    startangle: float = 0
+
+    def tracer(self, plt):
+        plt.pie(self.valeurs, labels=self.etiquettes, autopct='%1.1f%%', startangle=self.startangle)
+        plt.title(self.titre)
+
+
+@dataclass
+class SpecCourbe:
+    titre: str
+    x: np.ndarray
+    y: np.ndarray
+    couleur: str = "black"
+    xlabel: str = ""
+    ylabel: str = ""
+    options: dict = field(default_factory=dict)
+
+    def tracer(self, plt):
+        plt.plot(self.x, self.y, color=self.couleur, **self.options)
+        plt.title(self.titre)
+        plt.xlabel(self.xlabel)
+        plt.ylabel(self.ylabel)
+
+
+def spec_histogramme(serie, titre, couleur="blue", bins=50, nb_bacs_kde=1024):
+    """Pré-agrège une série en histogramme à `bins` bacs avec sa courbe de densité."""
+    valeurs = np.asarray(serie.dropna(), dtype=float)
+    if valeurs.size == 0:
+        return SpecHistogramme(titre, np.array([0.0, 1.0]), np.zeros(1), couleur, xlabel=serie.name)
+    comptes, bords = np.histogram(valeurs, bins=bins)
+    fins, bords_fins = np.histogram(valeurs, bins=nb_bacs_kde)
+    centres = (bords_fins[:-1] + bords_fins[1:]) / 2
+    occupes = fins > 0
+    ecart_type = valeurs.std(ddof=1) if valeurs.size > 1 else np.nan
+    kde_x, kde_y = kde_binnee(centres[occupes], fins[occupes], ecart_type, bords[1] - bords[0])
+    return SpecHistogramme(titre, bords, comptes, couleur, kde_x, kde_y, xlabel=serie.name)
+
+
+def etiquette_groupe(valeur):
+    if isinstance(valeur, (float, np.floating)) and float(valeur).is_integer():
+        return str(int(valeur))
+    return str(valeur)
+
+
+def stats_boites(df, x, y):
+    """Statistiques de boîtes à moustaches (1,5 × IQR) par groupe, calculées sans boucle Python."""
+    d = df[[x, y]].dropna()
+    quartiles = d.groupby(x)[y].quantile([0.25, 0.5, 0.75]).unstack()
+    iqr = quartiles[0.75] - quartiles[0.25]
+    bas = (quartiles[0.25] - 1.5 * iqr).rename("_bas")
+    haut = (quartiles[0.75] + 1.5 * iqr).rename("_haut")
+    d = d.join(bas, on=x).join(haut, on=x)
+    dedans = (d[y] >= d["_bas"]) & (d[y] <= d["_haut"])
+    moustaches = d[dedans].groupby(x)[y].agg(["min", "max"])
+    aberrants = d.loc[~dedans].groupby(x)[y].apply(np.asarray)
+
+    stats = []
+    for groupe, q in quartiles.iterrows():
+        stats.append({
+            "q1": q[0.25], "med": q[0.5], "q3": q[0.75],
+            "whislo": moustaches.at[groupe, "min"], "whishi": moustaches.at[groupe, "max"],
+            "fliers": aberrants.get(groupe, np.empty(0)),
+        })
+    return [etiquette_groupe(g) for g in quartiles.index], stats
+
+
+def _initialiser_processus():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def rendre_image(spec, format_image="png"):
+    """Trace une spécification avec le backend Agg et retourne l'image encodée (octets)."""
+    _initialiser_processus()
+    import matplotlib.pyplot as plt
+
+    with _VERROU_PYPLOT, span(f"rendu {type(spec).__name__}"):
+        plt.figure()
+        spec.tracer(plt)
+        plt.tight_layout()
+        buffer = io.BytesIO()
+        with span("savefig"):
+            plt.savefig(buffer, format=format_image, pil_kwargs=OPTIONS_FORMAT_IMAGE[format_image])
+        plt.close()
+    return buffer.getvalue()
+
+
+def _rendre_en_processus(spec, format_image):
+    """`rendre_image` dans un processus du pool : retourne l'image et les étapes tracées (reprises par le parent)."""
+    position = marque()
+    image = rendre_image(spec, format_image)
+    return image, spans_depuis(position)
+
+
+class ImageDifferee:
+    """Image d'une figure soumise à `RenduFigures`, disponible une fois le rendu terminé."""
+
+    def __init__(self, rendu, spec, cle=None, futur=None, image=None):
+        self._rendu = rendu
+        self._spec = spec
+        self._cle = cle
+        self._futur = futur
+        self._image = image
+
+    def prete(self):
+        return self._image is not None or self._futur.done()
+
+    def resultat(self):
+        """Octets de l'image (attend la fin du rendu; rendue en série si le pool a échoué)."""
+        if self._image is None:
+            try:
+                image, spans = self._futur.result()
+                reprendre(spans)
+            except BrokenProcessPool:
+                self._rendu.en_serie = True
+                image = rendre_image(self._spec, self._rendu.format_image)
+            self._image = self._rendu._enregistrer(self._cle, image)
+            self._spec = self._futur = None
+        return self._image
+
+
+class RenduFigures:
+    """Rend les figures au fur et à mesure qu'elles sont soumises, en parallèle.
+
+    `soumettre` retourne aussitôt une `ImageDifferee`, de sorte que
+    l'appelant peut écrire chaque section dès qu'elle est produite. Le pool
+    de processus est créé par `fork` (pour ne pas ré-exécuter le script
+    appelant) à la première figure à tracer; avec `nb_processus=1`, sans
+    `fork` ou si le pool échoue, les figures sont rendues en série. Avec un
+    `CacheFigures`, seules les figures absentes du cache sont rendues.
+    """
+
+    def __init__(self, nb_processus=None, format_image="png", cache=None):
+        self.nb_processus = nb_processus or os.cpu_count() or 1
+        self.format_image = format_image
+        self.cache = cache
+        self.en_serie = self.nb_processus <= 1 or "fork" not in multiprocessing.get_all_start_methods()
+        self._pool = None
+
+    def soumettre(self, spec):
+        cle = None
+        if self.cache is not None:
+            cle = self.cache.cle(spec, self.format_image)
+            image = self.cache.obtenir(cle)
+            if image is not None:
+                return ImageDifferee(self, spec, image=image)
+        if not self.en_serie:
+            try:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(self.nb_processus, mp_context=multiprocessing.get_context("fork"),
+                                                     initializer=_initialiser_processus)
+                futur = self._pool.submit(_rendre_en_processus, spec, self.format_image)
+                return ImageDifferee(self, spec, cle, futur=futur)
+            except (BrokenProcessPool, OSError):
+                self.en_serie = True
+        return ImageDifferee(self, spec, cle, image=self._enregistrer(cle, rendre_image(spec, self.format_image)))
+
+    def _enregistrer(self, cle, image):
+        if cle is not None:
+            self.cache.enregistrer(cle, image)
+        return image
+
+    def fermer(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+        return False
+
+
+def rendre_figure(spec, cache=None):
+    """Trace une spécification avec le backend Agg et retourne le PNG en base64."""
+    if cache is None:
+        image = rendre_image(spec)
+    else:
+        image = cache.memoiser(cache.cle(spec, "png"), lambda: rendre_image(spec))
+    return base64.b64encode(image).decode('utf-8')
@@ -0,0 +1,288 @@
+import argparse
+import json
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from calendrier import joindre_calendrier
+from constantes import colonnes_mwh
+from facturation import grille_tarifaire, simuler_factures
+from ingestion_horaire import charger_horaire
+from tarification01 import lire_consommation_enrichie
+
+HOTE = "127.0.0.1"
+PORT = 8765
+FICHIER_HORAIRE = "historique-production-consommation-ec-horaire.csv"
+FICHIER_FACTURATION = "consommation_enrichie01.csv"
+# Résultats de requêtes gardés en mémoire (les moins récemment utilisés sont supprimés).
+TAILLE_CACHE = 256
+
+AGREGATS = ("sum", "mean", "min", "max", "count")
+COLONNES_FACTURATION = ["kWh", "Montant ($)", "Montant_simulé", "Écart_facture_vs_simulé", "Jour",
+                        "Température moyenne (°C)"]
+
+
+class ErreurRequete(ValueError):
+    """Paramètre de requête invalide (réponse HTTP 400)."""
+
+
+class CacheResultats:
+    """Cache LRU des réponses, partagé entre les fils du serveur."""
+
+    def __init__(self, taille_max=TAILLE_CACHE):
+        self.taille_max = taille_max
+        self.succes = 0
+        self.echecs = 0
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def obtenir(self, cle):
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.succes += 1
+                return self._entrees[cle]
+            self.echecs += 1
+            return None
+
+    def enregistrer(self, cle, valeur):
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def etat(self):
+        with self._verrou:
+            return {"entrees": len(self._entrees), "taille_max": self.taille_max,
+                    "succes": self.succes, "echecs": self.echecs}
+
+
+class Source:
+    """Table en lecture seule indexée et triée par date, avec ses colonnes de regroupement."""
+
+    def __init__(self, df, colonne_date, mesures, dimensions):
+        self.df = df.dropna(subset=[colonne_date]).set_index(colonne_date).sort_index(kind="stable")
+        self.mesures = [c for c in mesures if c in self.df.columns]
+        self.dimensions = dimensions
+
+    def plage(self, debut, fin):
+        """Lignes de [debut, fin] (bornes incluses) par recherche binaire dans l'index trié."""
+        index = self.df.index
+        gauche = 0 if debut is None else index.searchsorted(debut, side="left")
+        droite = len(index) if fin is None else index.searchsorted(fin, side="right")
+        return self.df.iloc[gauche:droite]
+
+    def cles(self, lignes, par):
+        cles = []
+        for dimension in par:
+            if dimension == "date":
+                cles.append(pd.Series(lignes.index.normalize(), index=lignes.index, name="date"))
+            elif dimension in self.dimensions:
+                cles.append(lignes[dimension])
+            else:
+                raise ErreurRequete(f"regroupement inconnu : {dimension} (possibles : date, "
+                                    + ", ".join(self.dimensions) + ")")
+        return cles
+
+
+def _un(parametres, nom, defaut=None):
+    valeurs = parametres.get(nom)
+    return valeurs[-1] if valeurs else defaut
+
+
+def _date(texte, nom, fin=False):
+    """Borne d'une plage en heure locale, sans fuseau (les séries sont en heure locale).
+
+    Une `fin` couvre toute l'unité donnée : « 2024-01-31 » inclut les heures
+    du 31 janvier, « 2024-01 » tout le mois de janvier.
+    """
+    if texte is None:
+        return None
+    try:
+        date = pd.Timestamp(texte)
+    except (ValueError, TypeError, OverflowError):
+        raise ErreurRequete(f"date invalide pour {nom} : {texte}") from None
+    if pd.isna(date):
+        raise ErreurRequete(f"date invalide pour {nom} : {texte}")
+    if date.tz is not None:
+        raise ErreurRequete(f"date avec fuseau pour {nom} : {texte} (heure locale sans fuseau attendue)")
+    if fin:
+        try:
+            return pd.Period(texte).end_time
+        except (ValueError, TypeError):
+            pass
+    return date
+
+
+def _heures(texte):
+    """Heures retenues (0 à 23) : « 17-20 » (bornes incluses) ou « 0,6,12 »."""
+    heures = set()
+    try:
+        for morceau in texte.split(","):
+            bas, _, haut = morceau.partition("-")
+            bas, haut = int(bas), int(haut or bas)
+            if not 0 <= bas <= haut <= 23:
+                raise ValueError
+            heures.update(range(bas, haut + 1))
+    except ValueError:
+        raise ErreurRequete(f"heures invalides : {texte} (heures de 0 à 23, plages croissantes)") from None
+    return sorted(heures)
+
+
+def _enregistrements(resultat):
+    """Lignes du résultat en objets JSON (dates ISO, valeurs manquantes à null)."""
+    return json.loads(resultat.to_json(orient="records", date_format="iso", force_ascii=False))
+
+
+class ServiceRequetes:
+    """Réponses aux requêtes par plage de dates et regroupement sur les séries horaire et de facturation.
+
+    Les tables sont chargées une fois (cache colonnaire pour l'horaire,
+    simulation tarifaire pour la facturation) puis seulement lues : les
+    requêtes concurrentes ne prennent aucun verrou hors du cache de
+    résultats.
+    """
+
+    def __init__(self, fichier_horaire=FICHIER_HORAIRE, fichier_facturation=FICHIER_FACTURATION,
+                 taille_cache=TAILLE_CACHE, fichier_grille=None):
+        self.sources = {}
+        if fichier_horaire:
+            self.sources["horaire"] = Source(charger_horaire(fichier_horaire), "Datetime", colonnes_mwh,
+                                             ["Année", "mois", "jour", "Heure", "Saison"])
+        if fichier_facturation:
+            factures = simuler_factures(lire_consommation_enrichie(fichier_facturation), grille_tarifaire(fichier_grille))
+            factures["Écart_facture_vs_simulé"] = factures["Montant ($)"] - factures["Montant_simulé"]
+            calendrier = joindre_calendrier(factures["Date de début"], ["année", "mois", "Saison"])
+            for col in calendrier.columns:
+                factures[col] = calendrier[col]
+            self.sources["facturation"] = Source(factures, "Date de début", COLONNES_FACTURATION,
+                                                 ["année", "mois", "Saison", "Intervalle"])
+        self.cache = CacheResultats(taille_cache)
+
+    def description(self):
+        return {nom: {"lignes": len(s.df), "debut": s.df.index.min().isoformat() if len(s.df) else None,
+                      "fin": s.df.index.max().isoformat() if len(s.df) else None,
+                      "colonnes": s.mesures, "regroupements": ["date"] + s.dimensions}
+                for nom, s in self.sources.items()}
+
+    def interroger(self, nom_source, parametres):
+        """Réponse (dictionnaire JSON) à une requête; `parametres` suit parse_qs (listes de valeurs).
+
+        Paramètres : debut, fin (incluse : une date seule couvre toute la
+        journée), heures (« 17-20 », horaire seulement),
+        colonne (répétable, défaut : toutes), par (répétable) et agregat
+        (sum, mean, min, max ou count).
+        """
+        cle = (nom_source, tuple(sorted((k, tuple(v)) for k, v in parametres.items())))
+        reponse = self.cache.obtenir(cle)
+        if reponse is not None:
+            return reponse
+        reponse = self._calculer(self.sources[nom_source], parametres)
+        self.cache.enregistrer(cle, reponse)
+        return reponse
+
+    def _calculer(self, source, parametres):
+        colonnes = parametres.get("colonne") or source.mesures
+        inconnues = [c for c in colonnes if c not in source.mesures]
+        if inconnues:
+            raise ErreurRequete(f"colonne(s) inconnue(s) : {', '.join(inconnues)}")
+        agregat = _un(parametres, "agregat", "sum")
+        if agregat not in AGREGATS:
+            raise ErreurRequete(f"agrégat inconnu : {agregat} (possibles : {', '.join(AGREGATS)})")
+
+        debut = _date(_un(parametres, "debut"), "debut")
+        fin = _date(_un(parametres, "fin"), "fin", fin=True)
+        lignes = source.plage(debut, fin)
+        heures = _un(parametres, "heures")
+        if heures is not None:
+            if "Heure" not in source.dimensions:
+                raise ErreurRequete("le filtre heures ne s'applique qu'à la série horaire")
+            lignes = lignes[np.isin(lignes["Heure"].to_numpy(), _heures(heures))]
+
+        valeurs = lignes[colonnes].astype(float)
+        par = parametres.get("par") or []
+        if par:
+            resultat = valeurs.groupby(source.cles(lignes, par), observed=True, sort=True).agg(agregat).reset_index()
+        else:
+            resultat = valeurs.agg(agregat).to_frame().T
+        return {"lignes_source": len(lignes), "agregat": agregat, "par": par, "resultat": _enregistrements(resultat)}
+
+
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    """GET /sante, /sources, /horaire?… et /facturation?… (réponses JSON)."""
+
+    def do_GET(self):
+        debut = time.perf_counter()
+        url = urlsplit(self.path)
+        chemin = url.path.strip("/")
+        service = self.server.service
+        try:
+            if chemin == "sante":
+                reponse = {"etat": "ok", "cache": service.cache.etat()}
+            elif chemin == "sources":
+                reponse = service.description()
+            elif chemin in service.sources:
+                reponse = service.interroger(chemin, parse_qs(url.query))
+            else:
+                raise LookupError
+            code = 200
+        except LookupError:
+            code, reponse = 404, {"erreur": f"ressource inconnue : /{chemin}"}
+        except ErreurRequete as e:
+            code, reponse = 400, {"erreur": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            code, reponse = 500, {"erreur": f"erreur interne : {type(e).__name__}"}
+        reponse = {**reponse, "duree_ms": round((time.perf_counter() - debut) * 1e3, 3)}
+        corps = json.dumps(reponse, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def creer_serveur(service, hote=HOTE, port=PORT):
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireRequetes)
+    serveur.daemon_threads = True
+    serveur.service = service
+    return serveur
+
+
+def servir(hote=HOTE, port=PORT, fichier_horaire=FICHIER_HORAIRE, fichier_facturation=FICHIER_FACTURATION,
+           fichier_grille=None):
+    debut = time.perf_counter()
+    service = ServiceRequetes(fichier_horaire, fichier_facturation, fichier_grille=fichier_grille)
+    serveur = creer_serveur(service, hote, port)
+    print(f"✅ Données chargées en {time.perf_counter() - debut:.2f} s; service sur http://{hote}:{port}/")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service local de requêtes sur les données Hydro-Québec")
+    parser.add_argument("--hote", default=HOTE)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--horaire", default=FICHIER_HORAIRE, help="Export horaire (chaîne vide : ignoré)")
+    parser.add_argument("--facturation", default=FICHIER_FACTURATION, help="CSV de facturation (chaîne vide : ignoré)")
+    parser.add_argument("--grille", default=None, help="Grille tarifaire datée (CSV; défaut : tarif D unique)")
+    args = parser.parse_args()
+    servir(args.hote, args.port, args.horaire, args.facturation, args.grille)
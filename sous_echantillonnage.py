@@ -0,0 +1,145 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+
+def _en_nombres(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ms]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, nb_points):
+    """Indices retenus par Largest-Triangle-Three-Buckets (extrémités incluses)."""
+    n = len(y)
+    if nb_points >= n or nb_points < 3:
+        return np.arange(n)
+    x = _en_nombres(x)
+    y = np.asarray(y, dtype=float)
+    bords = np.linspace(1, n - 1, nb_points - 1).astype(np.int64)
+    # Moyenne de chaque seau, utilisée comme troisième sommet du triangle.
+    sommes_x = np.add.reduceat(x[1:n - 1], bords[:-1] - 1)
+    sommes_y = np.add.reduceat(y[1:n - 1], bords[:-1] - 1)
+    tailles = np.diff(bords)
+    moy_x = np.append(sommes_x / tailles, x[-1])
+    moy_y = np.append(sommes_y / tailles, y[-1])
+
+    indices = np.empty(nb_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(nb_points - 2):
+        debut, fin = bords[i], bords[i + 1]
+        cx, cy = moy_x[i + 1], moy_y[i + 1]
+        aires = np.abs((x[a] - cx) * (y[debut:fin] - y[a]) - (x[a] - x[debut:fin]) * (cy - y[a]))
+        a = debut + int(np.argmax(aires))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax(x, y, nb_points):
+    """Indices du minimum et du maximum de chaque seau, dans l'ordre chronologique."""
+    n = len(y)
+    if nb_points >= n:
+        return np.arange(n)
+    seaux = np.arange(n) * max(1, nb_points // 2) // n
+    serie = pd.Series(np.asarray(y, dtype=float))
+    groupes = serie.groupby(seaux)
+    indices = np.concatenate([groupes.idxmin().to_numpy(), groupes.idxmax().to_numpy(), [0, n - 1]])
+    return np.unique(indices)
+
+
+METHODES = {"lttb": lttb, "minmax": minmax}
+
+
+def sous_echantillonner(x, y, nb_points, methode="lttb"):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    valides = ~np.isnan(y)
+    x, y = x[valides], y[valides]
+    indices = METHODES[methode](x, y, nb_points)
+    return x[indices], y[indices]
+
+
+def niveaux_resolution(x, y, budget, nb_niveaux=1, methode="lttb"):
+    """Versions de plus en plus fines d'une série (budget × 4^k points), la plus grossière en premier."""
+    niveaux = []
+    for k in range(nb_niveaux):
+        nb_points = budget * 4 ** k
+        xs, ys = sous_echantillonner(x, y, nb_points, methode)
+        niveaux.append((_en_nombres(xs), ys))
+        if nb_points >= len(y):
+            break
+    return niveaux
+
+
+def _b64(valeurs):
+    return base64.b64encode(np.ascontiguousarray(valeurs, dtype="<f8").tobytes()).decode("ascii")
+
+
+def traces_multiresolution(x, series, budget=2000, nb_niveaux=1, methode="lttb"):
+    """Construit des traces Scattergl sous-échantillonnées et les niveaux plus fins associés.
+
+    `series` associe à chaque nom ses ordonnées (abscisses `x`) ou un couple
+    (abscisses, ordonnées) propre à la série. Retourne (traces, niveaux) où
+    `niveaux` est à passer à `script_zoom`. Les abscisses temporelles sont
+    exprimées en millisecondes, l'axe x doit donc être de type « date ».
+    """
+    traces, niveaux = [], []
+    for nom, y in series.items():
+        x_serie, y = y if isinstance(y, tuple) else (x, y)
+        niveaux_trace = niveaux_resolution(x_serie, y, budget, nb_niveaux, methode)
+        xs, ys = niveaux_trace[0]
+        traces.append(go.Scattergl(x=xs, y=ys, mode='lines', name=nom))
+        niveaux.append([{"x": _b64(xs), "y": _b64(ys)} for xs, ys in niveaux_trace])
+    return traces, niveaux
+
+
+def script_zoom(niveaux, budget):
+    """Script (pour `post_script` de plotly) qui choisit la résolution selon la plage affichée."""
+    if all(len(n) < 2 for n in niveaux):
+        return ""
+    return """
+(function() {
+    var gd = document.getElementById('{plot_id}');
+    var niveaux = %s;
+    var budget = %d;
+    function decoder(b64) {
+        var brut = atob(b64), octets = new Uint8Array(brut.length);
+        for (var i = 0; i < brut.length; i++) octets[i] = brut.charCodeAt(i);
+        return new Float64Array(octets.buffer);
+    }
+    niveaux.forEach(function(nv) {
+        nv.forEach(function(n) { n.x = decoder(n.x); n.y = decoder(n.y); });
+    });
+    function ms(v) {
+        if (typeof v === 'number') return v;
+        var s = String(v);
+        return Date.parse(s.length > 10 ? s.replace(' ', 'T') + 'Z' : s);
+    }
+    function rang(x, v) {
+        var bas = 0, haut = x.length;
+        while (bas < haut) { var m = (bas + haut) >> 1; if (x[m] < v) bas = m + 1; else haut = m; }
+        return bas;
+    }
+    gd.on('plotly_relayout', function(ev) {
+        var a, b;
+        if (ev['xaxis.autorange']) { a = -Infinity; b = Infinity; }
+        else if (ev['xaxis.range[0]'] !== undefined) { a = ms(ev['xaxis.range[0]']); b = ms(ev['xaxis.range[1]']); }
+        else if (ev['xaxis.range']) { a = ms(ev['xaxis.range'][0]); b = ms(ev['xaxis.range'][1]); }
+        else return;
+        var xs = [], ys = [];
+        niveaux.forEach(function(nv) {
+            var choix = nv[0];
+            for (var i = nv.length - 1; i > 0; i--) {
+                if (rang(nv[i].x, b) - rang(nv[i].x, a) <= budget) { choix = nv[i]; break; }
+            }
+            xs.push(choix.x); ys.push(choix.y);
+        });
+        Plotly.restyle(gd, {x: xs, y: ys});
+    });
+})();
+""" % (json.dumps(niveaux), budget)
@@ -0,0 +1,249 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def kde_binnee(centres, comptes, ecart_type, largeur_bac_affiche, nb_points=200):
+    """Densité gaussienne (règle de Scott) évaluée à partir de bacs pondérés."""
+    n = comptes.sum()
+    if n < 2 or not ecart_type > 0:
+        return np.empty(0), np.empty(0)
+    bande = ecart_type * n ** (-1 / 5)
+    x = np.linspace(centres[0], centres[-1], nb_points)
+    noyau = np.exp(-0.5 * ((x[:, None] - centres[None, :]) / bande) ** 2)
+    densite = noyau @ comptes / (n * bande * math.sqrt(2 * math.pi))
+    return x, densite * n * largeur_bac_affiche
+
+
+class CroquisKLL:
+    """Croquis de quantiles KLL fusionnable.
+
+    L'erreur de rang attendue est d'environ `erreur` (fraction du nombre
+    d'observations); la mémoire reste en O(1/erreur · log(n)).
+    """
+
+    def __init__(self, erreur=0.01, graine=0):
+        self.erreur = erreur
+        self.k = max(8, int(math.ceil(2.0 / erreur)))
+        self.niveaux = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(graine)
+
+    def _capacite(self, h):
+        profondeur = len(self.niveaux) - h - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** profondeur)))
+
+    def ajouter(self, valeurs):
+        valeurs = np.asarray(valeurs, dtype=float)
+        valeurs = valeurs[~np.isnan(valeurs)]
+        if valeurs.size == 0:
+            return
+        self.n += valeurs.size
+        self.niveaux[0] = np.concatenate([self.niveaux[0], valeurs])
+        self._compacter()
+
+    def fusionner(self, autre):
+        while len(self.niveaux) < len(autre.niveaux):
+            self.niveaux.append(np.empty(0))
+        for h, tampon in enumerate(autre.niveaux):
+            self.niveaux[h] = np.concatenate([self.niveaux[h], tampon])
+        self.n += autre.n
+        self._compacter()
+
+    def _compacter(self):
+        h = 0
+        while h < len(self.niveaux):
+            tampon = self.niveaux[h]
+            if tampon.size > self._capacite(h):
+                tampon = np.sort(tampon)
+                # Un élément impair reste au niveau courant pour conserver le poids total.
+                reste = tampon[-1:] if tampon.size % 2 else tampon[:0]
+                pairs = tampon[:tampon.size - reste.size]
+                promus = pairs[self._rng.integers(2)::2]
+                if h + 1 == len(self.niveaux):
+                    self.niveaux.append(np.empty(0))
+                self.niveaux[h] = reste
+                self.niveaux[h + 1] = np.concatenate([self.niveaux[h + 1], promus])
+            h += 1
+
+    def quantiles(self, probabilites):
+        valeurs = np.concatenate(self.niveaux)
+        if valeurs.size == 0:
+            return {p: np.nan for p in probabilites}
+        poids = np.concatenate([np.full(t.size, 2.0 ** h) for h, t in enumerate(self.niveaux)])
+        ordre = np.argsort(valeurs, kind="stable")
+        valeurs, cumul = valeurs[ordre], np.cumsum(poids[ordre])
+        rangs = np.asarray(probabilites, dtype=float) * cumul[-1]
+        positions = np.minimum(np.searchsorted(cumul, rangs, side="left"), valeurs.size - 1)
+        return dict(zip(probabilites, valeurs[positions]))
+
+
+class HistogrammeFlux:
+    """Histogramme à pas fixe dont l'étendue double au besoin.
+
+    Les comptes restent exacts : lorsqu'une valeur sort de l'étendue, les
+    bacs voisins sont fusionnés deux à deux et l'étendue est doublée.
+    """
+
+    def __init__(self, nb_bacs=1024):
+        if nb_bacs % 2:
+            raise ValueError("nb_bacs doit être pair")
+        self.nb_bacs = nb_bacs
+        self.comptes = np.zeros(nb_bacs, dtype=np.int64)
+        self.debut = None
+        self.largeur = None
+
+    @property
+    def fin(self):
+        return self.debut + self.largeur * self.nb_bacs
+
+    def _doubler(self, vers_le_bas):
+        fusion = self.comptes.reshape(-1, 2).sum(axis=1)
+        moitie = self.nb_bacs // 2
+        self.comptes = np.zeros(self.nb_bacs, dtype=np.int64)
+        if vers_le_bas:
+            self.comptes[moitie:] = fusion
+            self.debut -= self.largeur * self.nb_bacs
+        else:
+            self.comptes[:moitie] = fusion
+        self.largeur *= 2
+
+    def _etendre(self, vmin, vmax):
+        while vmin < self.debut:
+            self._doubler(vers_le_bas=True)
+        while vmax >= self.fin:
+            self._doubler(vers_le_bas=False)
+
+    def _indices(self, valeurs):
+        return np.minimum(((valeurs - self.debut) // self.largeur).astype(np.int64), self.nb_bacs - 1)
+
+    def ajouter(self, valeurs):
+        valeurs = np.asarray(valeurs, dtype=float)
+        valeurs = valeurs[np.isfinite(valeurs)]
+        if valeurs.size == 0:
+            return
+        vmin, vmax = valeurs.min(), valeurs.max()
+        if self.debut is None:
+            self.debut = vmin
+            etendue = vmax - vmin
+            self.largeur = etendue / (self.nb_bacs - 1) if etendue > 0 else max(abs(vmin) * 1e-9, 1e-12)
+        self._etendre(vmin, vmax)
+        self.comptes += np.bincount(self._indices(valeurs), minlength=self.nb_bacs)
+
+    def fusionner(self, autre):
+        if autre.debut is None:
+            return
+        if self.debut is None:
+            self.debut, self.largeur, self.comptes = autre.debut, autre.largeur, autre.comptes.copy()
+            return
+        # Les comptes de l'autre histogramme sont reportés au centre de leurs bacs.
+        occupes = np.flatnonzero(autre.comptes)
+        centres = autre.debut + autre.largeur * (occupes + 0.5)
+        self._etendre(centres[0], centres[-1])
+        self.comptes += np.bincount(self._indices(centres), weights=autre.comptes[occupes],
+                                    minlength=self.nb_bacs).astype(np.int64)
+
+    def regrouper(self, nb_bacs=50):
+        """Retourne (bords, comptes) sur environ `nb_bacs` bacs couvrant les données."""
+        occupes = np.flatnonzero(self.comptes)
+        if occupes.size == 0:
+            return np.array([0.0, 1.0]), np.zeros(1, dtype=np.int64)
+        premier, dernier = occupes[0], occupes[-1] + 1
+        pas = max(1, int(math.ceil((dernier - premier) / nb_bacs)))
+        departs = np.arange(premier, dernier, pas)
+        comptes = np.add.reduceat(self.comptes[premier:dernier], departs - premier)
+        bords = self.debut + self.largeur * np.append(departs, min(departs[-1] + pas, self.nb_bacs))
+        return bords, comptes
+
+    def compter_hors(self, bas, haut):
+        """Nombre de valeurs hors de [bas, haut], à un bac près (chaque bac est rangé selon son centre)."""
+        if self.debut is None:
+            return 0
+        centres = self.debut + self.largeur * (np.arange(self.nb_bacs) + 0.5)
+        return int(self.comptes[(centres < bas) | (centres > haut)].sum())
+
+    def courbe_kde(self, ecart_type, largeur_bac_affiche, nb_points=200):
+        """Estimation de densité par noyau gaussien calculée sur les bacs fins.
+
+        La courbe est mise à l'échelle des comptes d'un bac de largeur
+        `largeur_bac_affiche`, comme le fait `seaborn.histplot(kde=True)`.
+        """
+        occupes = np.flatnonzero(self.comptes)
+        centres = self.debut + self.largeur * (occupes + 0.5) if occupes.size else np.empty(0)
+        return kde_binnee(centres, self.comptes[occupes], ecart_type, largeur_bac_affiche, nb_points)
+
+
+class AccumulateurColonne:
+    """Statistiques exactes (min, max, nombre, manquantes, somme) et approchées (quantiles, histogramme)."""
+
+    def __init__(self, erreur_quantile=0.01, nb_bacs=1024):
+        self.nombre = 0
+        self.manquantes = 0
+        self.somme = 0.0
+        self._m2 = 0.0
+        self.minimum = np.nan
+        self.maximum = np.nan
+        self.croquis = CroquisKLL(erreur_quantile)
+        self.histogramme = HistogrammeFlux(nb_bacs)
+
+    def ajouter(self, serie):
+        valeurs = np.asarray(pd.to_numeric(serie, errors="coerce"), dtype=float)
+        manquantes = np.isnan(valeurs)
+        self.manquantes += int(manquantes.sum())
+        valeurs = valeurs[~manquantes]
+        if valeurs.size == 0:
+            return
+        moyenne_bloc = valeurs.mean()
+        self._combiner(valeurs.size, valeurs.sum(), np.square(valeurs - moyenne_bloc).sum())
+        self.minimum = np.fmin(self.minimum, valeurs.min())
+        self.maximum = np.fmax(self.maximum, valeurs.max())
+        self.croquis.ajouter(valeurs)
+        self.histogramme.ajouter(valeurs)
+
+    def _combiner(self, nombre, somme, m2):
+        # Combinaison des variances par blocs (Chan et al.), stable numériquement.
+        if self.nombre:
+            delta = somme / nombre - self.moyenne
+            self._m2 += m2 + delta ** 2 * self.nombre * nombre / (self.nombre + nombre)
+        else:
+            self._m2 = m2
+        self.nombre += nombre
+        self.somme += somme
+
+    def fusionner(self, autre):
+        self.manquantes += autre.manquantes
+        if autre.nombre:
+            self._combiner(autre.nombre, autre.somme, autre._m2)
+        self.minimum = np.fmin(self.minimum, autre.minimum)
+        self.maximum = np.fmax(self.maximum, autre.maximum)
+        self.croquis.fusionner(autre.croquis)
+        self.histogramme.fusionner(autre.histogramme)
+
+    @property
+    def moyenne(self):
+        return self.somme / self.nombre if self.nombre else np.nan
+
+    @property
+    def ecart_type(self):
+        if self.nombre < 2:
+            return np.nan
+        return math.sqrt(self._m2 / (self.nombre - 1))
+
+    def quantiles(self, probabilites=(0.25, 0.5, 0.75)):
+        return self.croquis.quantiles(list(probabilites))
+
+
+def statistiques_en_flux(fichier, taille_bloc=500_000, erreur_quantile=0.01, encoding="latin1", sep=","):
+    """Parcourt le CSV horaire par blocs et retourne (colonnes, accumulateurs numériques)."""
+    colonnes = None
+    accumulateurs = {}
+    for bloc in pd.read_csv(fichier, encoding=encoding, sep=sep, chunksize=taille_bloc):
+        bloc.columns = bloc.columns.str.encode('latin1').str.decode('utf-8').str.strip()
+        if colonnes is None:
+            colonnes = bloc.columns.tolist()
+            for col in bloc.select_dtypes(include=[np.number]).columns:
+                accumulateurs[col] = AccumulateurColonne(erreur_quantile)
+        for col, acc in accumulateurs.items():
+            acc.ajouter(bloc[col])
+    return colonnes or [], accumulateurs
@@ -1,26 +1,40 @@
 import pandas as pd
 
-def nettoyer_virgule_vers_float(serie):
-    return pd.to_numeric(serie.astype(str).str.replace(",", "."), errors="coerce")
+from instrumentation import span
 
-df = pd.read_csv("0314397469_p_riode_2023-02-16_au_2025-04-05.csv", sep=';', encoding='iso-8859-1')
-
-colonnes = [
+COLONNES = [
     "Date de début", "Date de fin", "Jour", "kWh", "Montant ($)",
     "Moyenne $/j", "Moyenne kwh/j", "Température moyenne (°C)"
 ]
 
-df = df[colonnes].copy()
+def nettoyer_virgule_vers_float(serie):
+    return pd.to_numeric(serie.astype(str).str.replace(",", "."), errors="coerce")
+
+def nettoyer_consommation(df):
+    """Types des colonnes de facturation (dates, nombres à virgule) et intervalle de chaque période."""
+    df = df.copy()
+    df["Date de début"] = pd.to_datetime(df["Date de début"], errors="coerce")
+    df["Date de fin"] = pd.to_datetime(df["Date de fin"], errors="coerce")
+    df["Jour"] = pd.to_numeric(df["Jour"], errors="coerce")
+    df["kWh"] = nettoyer_virgule_vers_float(df["kWh"])
+    df["Montant ($)"] = nettoyer_virgule_vers_float(df["Montant ($)"])
+    df["Moyenne $/j"] = nettoyer_virgule_vers_float(df["Moyenne $/j"])
+    df["Moyenne kwh/j"] = nettoyer_virgule_vers_float(df["Moyenne kwh/j"])
+    df["Température moyenne (°C)"] = pd.to_numeric(df["Température moyenne (°C)"], errors="coerce")
+
+    df["Intervalle"] = df["Date de début"].dt.strftime("%Y-%m-%d") + " → " + df["Date de fin"].dt.strftime("%Y-%m-%d")
+    return df
 
-df["Date de début"] = pd.to_datetime(df["Date de début"], errors="coerce")
-df["Date de fin"] = pd.to_datetime(df["Date de fin"], errors="coerce")
-df["Jour"] = pd.to_numeric(df["Jour"], errors="coerce")
-df["kWh"] = nettoyer_virgule_vers_float(df["kWh"])
-df["Montant ($)"] = nettoyer_virgule_vers_float(df["Montant ($)"])
-df["Moyenne $/j"] = nettoyer_virgule_vers_float(df["Moyenne $/j"])
-df["Moyenne kwh/j"] = nettoyer_virgule_vers_float(df["Moyenne kwh/j"])
-df["Température moyenne (°C)"] = pd.to_numeric(df["Température moyenne (°C)"], errors="coerce")
+def normaliser_fichier(chemin):
+    df = pd.read_csv(chemin, sep=';', encoding='iso-8859-1')
+    return nettoyer_consommation(df[COLONNES])
 
-df["Intervalle"] = df["Date de début"].astype(str) + " → " + df["Date de fin"].astype(str)
+def lire_consommation_enrichie(chemin="consommation_enrichie01.csv"):
+    with span("lecture") as etape:
+        df = nettoyer_consommation(pd.read_csv(chemin))
+        etape.compter(len(df))
+    return df
 
-df.to_csv("consommation_enrichie01.csv", index=False)
+if __name__ == "__main__":
+    df = normaliser_fichier("0314397469_p_riode_2023-02-16_au_2025-04-05.csv")
+    df.to_csv("consommation_enrichie01.csv", index=False)
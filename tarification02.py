@@ -1,52 +1,60 @@
-import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
-TARIF_BASE = 0.06905
-TARIF_HAUT = 0.10652
-KWH_PAR_JOUR_TARIF_BASE = 40
-
-def to_float(serie):
-    return pd.to_numeric(serie.astype(str).str.replace(",", "."), errors="coerce")
-
-df = pd.read_csv("consommation_enrichie01.csv")
-df["Date de début"] = pd.to_datetime(df["Date de début"])
-df["Date de fin"] = pd.to_datetime(df["Date de fin"])
-df["Jour"] = pd.to_numeric(df["Jour"], errors="coerce")
-df["kWh"] = to_float(df["kWh"])
-df["Montant ($)"] = to_float(df["Montant ($)"])
-df["Moyenne $/j"] = to_float(df["Moyenne $/j"])
-df["Moyenne kwh/j"] = to_float(df["Moyenne kwh/j"])
-df["Température moyenne (°C)"] = pd.to_numeric(df["Température moyenne (°C)"], errors="coerce")
-
-df["Période"] = df["Date de début"].dt.strftime('%Y-%m-%d') + " au " + df["Date de fin"].dt.strftime('%Y-%m-%d')
-
-df["Seuil_kWh"] = df["Jour"] * KWH_PAR_JOUR_TARIF_BASE
-df["kWh_base"] = df[["kWh", "Seuil_kWh"]].min(axis=1)
-df["kWh_haut"] = (df["kWh"] - df["Seuil_kWh"]).clip(lower=0)
-df["Montant_simulé"] = df["kWh_base"] * TARIF_BASE + df["kWh_haut"] * TARIF_HAUT
-df["Écart_facture_vs_simulé"] = df["Montant ($)"] - df["Montant_simulé"]
-
-correlation = df["kWh"].corr(df["Température moyenne (°C)"])
-stats = {
-    "Corrélation température ↔ kWh": correlation,
-    "Consommation totale (kWh)": df["kWh"].sum(),
-    "Montant total facturé ($)": df["Montant ($)"].sum(),
-    "Montant total simulé ($)": df["Montant_simulé"].sum(),
-    "Économie estimée ($)": (df["Montant ($)"] - df["Montant_simulé"]).sum()
-}
-
-fig1 = px.scatter(df, x="Température moyenne (°C)", y="kWh", hover_name="Période", trendline="ols", title="Corrélation entre température moyenne et consommation (kWh)")
-graph_temp_vs_kwh = fig1.to_html(full_html=False, include_plotlyjs='cdn')
-
-fig2 = px.line(df.sort_values("Date de début"), x="Date de début", y="kWh", title="Évolution de la consommation dans le temps", markers=True)
-fig2.add_scatter(x=df["Date de début"], y=df["Jour"] * 40, mode="lines+markers", name="Seuil (40 kWh/jour * jours)", line=dict(dash="dash", color="black"))
-fig2.update_layout(xaxis_title="Date", yaxis_title="Consommation (kWh)")
-graph_kwh_temps = fig2.to_html(full_html=False, include_plotlyjs=False)
-
-fig3 = px.line(df.sort_values("Date de début"), x="Date de début", y="Écart_facture_vs_simulé", title="Écart entre montant facturé et simulé", markers=True)
-fig3.update_layout(xaxis_title="Date", yaxis_title="Écart ($)")
-graph_ecart = fig3.to_html(full_html=False, include_plotlyjs=False)
+from cache_figures import CacheFigures
+from facturation import grille_tarifaire, simuler_factures
+from incremental import EtatFacturation, charger_etat, sauver_etat
+from instrumentation import span
+from paquet_plotly import PaquetPlotly
+from regression import ajouter_droites, ajuster_degres_jours
+from tarification01 import lire_consommation_enrichie
+
+# Grille tarifaire datée (CSV : date_effet, tarif_base, tarif_haut, kwh_par_jour); None = tarifs de constantes.py.
+FICHIER_GRILLE = None
+# Mode incrémental : corrélation et totaux mis à jour avec les seules nouvelles périodes.
+MODE_INCREMENTAL = False
+# Graphiques : plotly.js intégré une seule fois; COMPRESSER_GRAPHIQUES compresse aussi la page en gzip.
+COMPRESSER_GRAPHIQUES = False
+# Cache des figures : les graphiques dont les données n'ont pas changé sont relus depuis le disque.
+CACHE_FIGURES = True
+
+FICHIER = "consommation_enrichie01.csv"
+SORTIE = "rapport_dynamique.html"
+
+
+def simuler_tarifs(df, fichier_grille=FICHIER_GRILLE):
+    """Ajoute la facture simulée (tarif D ou grille `fichier_grille`), l'écart avec la facture réelle et la période."""
+    with span("simulation tarifaire", lignes=len(df)):
+        df = simuler_factures(df, grille_tarifaire(fichier_grille))
+        df["Écart_facture_vs_simulé"] = df["Montant ($)"] - df["Montant_simulé"]
+        df["Période"] = df["Date de début"].dt.strftime('%Y-%m-%d') + " au " + df["Date de fin"].dt.strftime('%Y-%m-%d')
+    return df
+
+
+def indicateurs(df, fichier=FICHIER, incremental=MODE_INCREMENTAL):
+    """Corrélation température ↔ kWh et totaux, mis à jour incrémentalement si `incremental`."""
+    if incremental:
+        etat = charger_etat(fichier, "facturation")
+        nouvelles = etat.nouvelles_periodes(df) if etat is not None else None
+        if nouvelles is None:
+            etat = EtatFacturation()
+            nouvelles = df
+        etat.integrer(nouvelles)
+        sauver_etat(fichier, "facturation", etat)
+        return etat.correlation.correlation, etat.totaux
+    return df["kWh"].corr(df["Température moyenne (°C)"]), df[["kWh", "Montant ($)", "Montant_simulé"]].sum()
+
+
+def libelle_seuil(df):
+    """Seuil de première tranche par jour des périodes simulées (« 40 kWh/jour », ou l'étendue selon la grille)."""
+    par_jour = (df["Seuil_kWh"] / df["Jour"]).replace([np.inf, -np.inf], np.nan).dropna().round(2)
+    if par_jour.empty:
+        return "seuil inconnu"
+    if par_jour.min() == par_jour.max():
+        return f"{par_jour.iloc[0]:g} kWh/jour"
+    return f"{par_jour.min():g} à {par_jour.max():g} kWh/jour selon la grille"
+
 
 def get_conso_color(val, min_val, max_val):
     ratio = (val - min_val) / (max_val - min_val)
@@ -58,30 +66,75 @@ def get_temp_color(val, min_val, max_val):
     b = int(255 * (1 - ratio))
     return f"rgb({r},0,{b})"
 
-min_kwh, max_kwh = df["kWh"].min(), df["kWh"].max()
-min_temp, max_temp = df["Température moyenne (°C)"].min(), df["Température moyenne (°C)"].max()
-df["couleur_kWh"] = df["kWh"].apply(lambda x: get_conso_color(x, min_kwh, max_kwh))
-df["couleur_temp"] = df["Température moyenne (°C)"].apply(lambda x: get_temp_color(x, min_temp, max_temp))
-
-fig4 = go.Figure()
-fig4.add_trace(go.Bar(x=df["Date de début"], y=df["kWh"], name="Consommation (kWh)", marker_color=df["couleur_kWh"], yaxis="y1"))
-fig4.add_trace(go.Scatter(x=df["Date de début"], y=df["Température moyenne (°C)"], name="Température moyenne (°C)", mode="lines+markers", marker=dict(color=df["couleur_temp"]), line=dict(width=2), yaxis="y2"))
-fig4.update_layout(
-    title="Consommation et température moyenne",
-    xaxis=dict(title="Date"),
-    yaxis=dict(title="kWh", side="left"),
-    yaxis2=dict(title="Température (°C)", overlaying="y", side="right"),
-    legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
-    template="plotly_white", height=500
-)
-graph_conso_temp_colore = fig4.to_html(full_html=False, include_plotlyjs=False)
-
-html_content = f"""
+
+def rapport_dynamique(df, fichier=FICHIER, sortie=SORTIE, cache=None, incremental=MODE_INCREMENTAL,
+                      compresser=COMPRESSER_GRAPHIQUES):
+    """Écrit le rapport de consommation à partir des périodes simulées (`simuler_tarifs`).
+
+    Les graphiques sont préparés en parallèle; `df` n'est pas modifié.
+    """
+    with span("indicateurs", lignes=len(df)):
+        correlation, totaux = indicateurs(df, fichier, incremental)
+        modele = ajuster_degres_jours(df["Température moyenne (°C)"], df["kWh"] / df["Jour"], poids=df["Jour"])
+    stats = {
+        "Corrélation température ↔ kWh": correlation,
+        "Consommation totale (kWh)": totaux["kWh"],
+        "Montant total facturé ($)": totaux["Montant ($)"],
+        "Montant total simulé ($)": totaux["Montant_simulé"],
+        "Économie estimée ($)": totaux["Montant ($)"] - totaux["Montant_simulé"],
+        "Température d'équilibre du chauffage (°C)": modele.temperature_equilibre[0],
+        "Consommation de base (kWh/jour)": modele.base[0],
+        "Consommation de chauffage (kWh par degré-jour)": modele.pente[0],
+    }
+
+    seuil = libelle_seuil(df)
+
+    def figure_consommation():
+        fig2 = px.line(df.sort_values("Date de début"), x="Date de début", y="kWh", title="Évolution de la consommation dans le temps", markers=True)
+        fig2.add_scatter(x=df["Date de début"], y=df["Seuil_kWh"], mode="lines+markers", name=f"Seuil ({seuil} * jours)", line=dict(dash="dash", color="black"))
+        fig2.update_layout(xaxis_title="Date", yaxis_title="Consommation (kWh)")
+        return fig2
+
+    def figure_ecart():
+        fig3 = px.line(df.sort_values("Date de début"), x="Date de début", y="Écart_facture_vs_simulé", title="Écart entre montant facturé et simulé", markers=True)
+        fig3.update_layout(xaxis_title="Date", yaxis_title="Écart ($)")
+        return fig3
+
+    def figure_conso_temp():
+        min_kwh, max_kwh = df["kWh"].min(), df["kWh"].max()
+        min_temp, max_temp = df["Température moyenne (°C)"].min(), df["Température moyenne (°C)"].max()
+        couleur_kwh = df["kWh"].apply(lambda x: get_conso_color(x, min_kwh, max_kwh))
+        couleur_temp = df["Température moyenne (°C)"].apply(lambda x: get_temp_color(x, min_temp, max_temp))
+
+        fig4 = go.Figure()
+        fig4.add_trace(go.Bar(x=df["Date de début"], y=df["kWh"], name="Consommation (kWh)", marker_color=couleur_kwh, yaxis="y1"))
+        fig4.add_trace(go.Scatter(x=df["Date de début"], y=df["Température moyenne (°C)"], name="Température moyenne (°C)", mode="lines+markers", marker=dict(color=couleur_temp), line=dict(width=2), yaxis="y2"))
+        fig4.update_layout(
+            title="Consommation et température moyenne",
+            xaxis=dict(title="Date"),
+            yaxis=dict(title="kWh", side="left"),
+            yaxis2=dict(title="Température (°C)", overlaying="y", side="right"),
+            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
+            template="plotly_white", height=500
+        )
+        return fig4
+
+    paquet = PaquetPlotly(compresser, cache)
+    with span("graphiques", lignes=len(df)):
+        graph_temp_vs_kwh, graph_kwh_temps, graph_ecart, graph_conso_temp_colore = paquet.figures([
+            {"fig": lambda: ajouter_droites(px.scatter(df, x="Température moyenne (°C)", y="kWh", hover_name="Période", title="Corrélation entre température moyenne et consommation (kWh)")),
+             "cle": df[["Température moyenne (°C)", "kWh", "Période"]]},
+            figure_consommation,
+            figure_ecart,
+            figure_conso_temp,
+        ])
+
+    html_content = f"""
 <html>
 <head>
     <meta charset="utf-8">
     <title>Rapport de consommation électrique</title>
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    {paquet.script()}
 </head>
 <body style="font-family:Arial, sans-serif; padding:20px; max-width:1000px; margin:auto;">
     <h1>Rapport de consommation électrique</h1>
@@ -96,7 +149,7 @@ html_content = f"""
     {graph_temp_vs_kwh}
 
     <h2>Consommation dans le temps</h2>
-    <p>Avec seuil de base (40 kWh/jour * durée).</p>
+    <p>Avec seuil de base ({seuil} * durée).</p>
     {graph_kwh_temps}
 
     <h2>Écart entre facturation réelle et simulation tarifaire</h2>
@@ -114,7 +167,15 @@ html_content = f"""
 </html>
 """
 
-with open("rapport_dynamique.html", "w", encoding="utf-8") as f:
-    f.write(html_content)
+    with span("écriture du rapport"), open(sortie, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    return sortie
+
+
+if __name__ == "__main__":
+    cache = CacheFigures() if CACHE_FIGURES else None
+    rapport_dynamique(simuler_tarifs(lire_consommation_enrichie(FICHIER)), FICHIER, SORTIE, cache)
 
-print("✅ Rapport standalone généré avec succès : rapport_dynamique.html")
+    print("✅ Rapport standalone généré avec succès : rapport_dynamique.html")
+    if cache is not None:
+        print(cache.resume())
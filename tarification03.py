@@ -2,167 +2,196 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-from datetime import timedelta
-import matplotlib.pyplot as plt
-import io, base64
-
-
-df = pd.read_csv("consommation_enrichie01.csv")
-df["Date de début"] = pd.to_datetime(df["Date de début"])
-df["Date de fin"] = pd.to_datetime(df["Date de fin"])
-df["Intervalle"] = df["Date de début"].dt.strftime("%Y-%m-%d") + " → " + df["Date de fin"].dt.strftime("%Y-%m-%d")
-df["Température moyenne (°C)"] = pd.to_numeric(df["Température moyenne (°C)"], errors="coerce")
-df["Montant ($)"] = pd.to_numeric(df["Montant ($)"].astype(str).str.replace(",", "."), errors="coerce")
-df["kWh"] = pd.to_numeric(df["kWh"].astype(str).str.replace(",", "."), errors="coerce")
-
-jours = []
-for _, row in df.iterrows():
-    for i in range(int(row["Jour"])):
-        date = row["Date de début"] + timedelta(days=i)
-        jours.append({
-            "date": date,
-            "Intervalle": row["Intervalle"],
-            "kWh": row["kWh"] / row["Jour"],
-            "Montant ($)": row["Montant ($)"] / row["Jour"],
-            "Température moyenne (°C)": row["Température moyenne (°C)"]
-        })
-
-dfj = pd.DataFrame(jours)
-dfj["mois"] = dfj["date"].dt.to_period("M").astype(str)
-dfj["année"] = dfj["date"].dt.year
-dfj["jour"] = dfj["date"].dt.dayofyear
-
-jours_proj = pd.date_range("2025-04-06", periods=3650, freq="D")
-moy_par_jour = dfj.groupby("jour").agg({
-    "kWh": "mean",
-    "Montant ($)": "mean",
-    "Température moyenne (°C)": "mean"
-}).reindex(range(1, 367)).fillna(method="ffill")
-
-proj = []
-for i, date in enumerate(jours_proj):
-    jour = date.timetuple().tm_yday
-    base = moy_par_jour.loc[jour]
-    bruit = np.random.normal(0, 0.05)
-    proj.append({
-        "date": date,
-        "kWh": base["kWh"] * (1 + bruit),
-        "Montant ($)": base["Montant ($)"] * (1 + bruit),
-        "Température moyenne (°C)": base["Température moyenne (°C)"] + np.random.normal(0, 1)
-    })
-
-dfp = pd.DataFrame(proj)
-dfp["mois"] = dfp["date"].dt.to_period("M").astype(str)
-dfp["année"] = dfp["date"].dt.year
-dfp["jour"] = dfp["date"].dt.dayofyear
-
-fig1 = px.scatter(dfj, x="kWh", y="Montant ($)", color="Intervalle", title="Coût vs Consommation (journalier)", trendline="ols")
-g1 = fig1.to_html(full_html=False, include_plotlyjs='cdn')
-
-dfm = dfj.groupby("mois")[["kWh", "Montant ($)"]].sum().reset_index()
-fig2 = px.scatter(dfm, x="kWh", y="Montant ($)", title="Coût vs Consommation (mensuel)", trendline="ols")
-g2 = fig2.to_html(full_html=False, include_plotlyjs=False)
-
-fig3 = px.violin(
-    dfj,
-    y="Montant ($)",
-    box=True,
-    points="all",
-    title="Distribution du coût journalier (densité + boîte à moustache)"
-)
-fig3.update_layout(yaxis_title="Montant ($)", xaxis_visible=False)
-g3 = fig3.to_html(full_html=False, include_plotlyjs=False)
-
-corrs = dfj[["kWh", "Montant ($)", "Température moyenne (°C)"]].corr().round(2)
-fig4 = go.Figure(data=go.Heatmap(z=corrs.values, x=corrs.columns, y=corrs.columns, colorscale='RdBu', zmin=-1, zmax=1))
-fig4.update_layout(title="Matrice de corrélation")
-g4 = fig4.to_html(full_html=False, include_plotlyjs=False)
-
-dfj["source"] = "Historique"
-dfp["source"] = "Projection"
-df_all = pd.concat([dfj, dfp])
-df_all_mensuel = df_all.groupby(["mois", "source"])[["kWh", "Montant ($)", "Température moyenne (°C)"]].mean().reset_index()
-
-fig5 = go.Figure()
-for src, couleur in [("Historique", "green"), ("Projection", "red")]:
-    df_src = df_all_mensuel[df_all_mensuel["source"] == src]
-    fig5.add_trace(go.Bar(x=df_src["mois"], y=df_src["kWh"], name=f"Conso {src}", marker_color=couleur))
-    fig5.add_trace(go.Scatter(x=df_src["mois"], y=df_src["Température moyenne (°C)"],
-                              name=f"Temp {src}", yaxis="y2", mode="lines+markers"))
-fig5.update_layout(
-    title="Consommation et température (mensuelle, réel vs simulé)",
-    xaxis_title="Mois", yaxis=dict(title="kWh"), yaxis2=dict(title="Température (°C)", overlaying="y", side="right"),
-    legend=dict(orientation="h", yanchor="bottom", y=-0.4, xanchor="center", x=0.5),
-    template="plotly_white", barmode="group"
-)
-g5 = fig5.to_html(full_html=False, include_plotlyjs=False)
-
-df_proj_mensuel = dfp.groupby("mois")[["kWh", "Montant ($)"]].sum().reset_index()
-fig6 = px.line(df_proj_mensuel, x="mois", y="Montant ($)", title="Projection des coûts mensuels simulés")
-g6 = fig6.to_html(full_html=False, include_plotlyjs=False)
-
-fig7 = px.scatter(dfp, x="Température moyenne (°C)", y="kWh", title="Simulation : Température vs Consommation", trendline="ols")
-g7 = fig7.to_html(full_html=False, include_plotlyjs=False)
-
-# Ajout des saisons
-def attribuer_saison(date):
-    mois = date.month
-    jour = date.day
-    if (mois == 12 and jour >= 21) or (mois <= 3 and (mois != 3 or jour < 20)):
-        return "Hiver"
-    elif (mois == 3 and jour >= 20) or (4 <= mois <= 5) or (mois == 6 and jour < 21):
-        return "Printemps"
-    elif (mois == 6 and jour >= 21) or (7 <= mois <= 8) or (mois == 9 and jour < 22):
-        return "Été"
-    else:
-        return "Automne"
-
-dfj["Saison"] = dfj["date"].apply(attribuer_saison)
-
-# Répartition saisonnière dans le HTML
-rapport_saisons = "<h2>Répartition saisonnière annuelle</h2>"
-col_prod = "kWh"
-
-for annee in sorted(dfj["année"].dropna().unique()):
-    data_annee = dfj[dfj["année"] == annee]
-    total_par_saison = data_annee.groupby("Saison")[col_prod].sum().reindex(["Hiver", "Printemps", "Été", "Automne"])
-    if total_par_saison.notna().sum() == 4:
-        plt.figure()
-        plt.pie(total_par_saison, labels=total_par_saison.index, autopct='%1.1f%%', startangle=90)
-        plt.title(f"Répartition par saison - {annee}")
-        plt.tight_layout()
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        plt.close()
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-        rapport_saisons += f'<img src="data:image/png;base64,{image_base64}" width="400" style="margin:10px;"/>'
-
-rapport_saisons += "<h2>Répartition saisonnière globale</h2>"
-
-total_global_saisons = dfj.groupby("Saison")[col_prod].sum().reindex(["Hiver", "Printemps", "Été", "Automne"])
-if total_global_saisons.notna().sum() == 4:
-    plt.figure()
-    plt.pie(total_global_saisons, labels=total_global_saisons.index, autopct='%1.1f%%', startangle=90)
-    plt.title("Répartition par saison - Toutes années")
-    plt.tight_layout()
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    plt.close()
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    rapport_saisons += f'<img src="data:image/png;base64,{image_base64}" width="400" style="margin:10px;"/>'
-
-
-
-total_kwh = dfp["kWh"].sum()
-total_cout = dfp["Montant ($)"].sum()
-moy_annuelle = dfp.groupby("année")["Montant ($)"].sum().mean()
-std_annuelle = dfp.groupby("année")["Montant ($)"].sum().std()
-
-html = f"""
+
+from cache_figures import CacheFigures
+from calendrier import BASE_DEGRES_JOURS, joindre_calendrier, table_calendrier
+from cube_agregats import CubeAgregats
+from expansion_journaliere import etendre_periodes
+from incremental import EtatJournalier, charger_etat, sauver_etat
+from instrumentation import span
+from paquet_plotly import PaquetPlotly
+from projection import profil_journalier, projeter_scenarios, trajectoire
+from regression import ajouter_droites
+from rendu_figures import SpecCamembert, rendre_figure
+from tarification01 import lire_consommation_enrichie
+from types_compacts import SAISONS, SCHEMA_JOURNALIER, compacter, rapport_memoire
+
+DEBUT_PROJECTION = "2025-04-06"
+NB_JOURS_PROJECTION = 3650
+NB_SCENARIOS = 1000
+GRAINE = 42
+BUDGET_MEMOIRE_PROJECTION = 256 * 2 ** 20
+# Mode incrémental : seules les nouvelles périodes sont développées en jours.
+MODE_INCREMENTAL = False
+# Graphiques : plotly.js intégré une seule fois; COMPRESSER_GRAPHIQUES compresse aussi la page en gzip.
+COMPRESSER_GRAPHIQUES = False
+# Cache des figures : les graphiques dont les données n'ont pas changé sont relus depuis le disque.
+CACHE_FIGURES = True
+
+FICHIER = "consommation_enrichie01.csv"
+SORTIE = "rapport_economique.html"
+
+
+def developper(periodes, cle_compte=None):
+    return etendre_periodes(
+        periodes,
+        colonnes_reparties=["kWh", "Montant ($)"],
+        colonnes_constantes=["Intervalle", "Température moyenne (°C)"],
+        cle_compte=cle_compte
+    )
+
+
+def developper_journalier(df, fichier=FICHIER, cle_compte=None, incremental=MODE_INCREMENTAL):
+    """Table journalière (mois, année, jour de l'année, saison, degrés-jours) des périodes de facturation nettoyées.
+
+    Avec `cle_compte`, les périodes de plusieurs comptes sont développées
+    ensemble (sans mode incrémental) : les degrés-jours de chaque jour sont
+    tirés de la température de sa propre période.
+    """
+    with span("expansion journalière", lignes=len(df)):
+        if cle_compte is not None:
+            dfj = developper(df, cle_compte)
+        elif incremental:
+            etat = charger_etat(fichier, "journalier")
+            nouvelles = etat.nouvelles_periodes(df) if etat is not None else None
+            if nouvelles is None:
+                etat = EtatJournalier()
+                nouvelles = df
+            etat.integrer(nouvelles, developper(nouvelles))
+            sauver_etat(fichier, "journalier", etat)
+            dfj = etat.dfj.copy()
+        else:
+            dfj = developper(df)
+    with span("calendrier", lignes=len(dfj)):
+        if cle_compte is not None:
+            calendrier = joindre_calendrier(dfj["date"], ["mois", "année", "jour", "Saison"])
+            temperature = pd.to_numeric(dfj["Température moyenne (°C)"], errors="coerce").to_numpy(dtype=float)
+            calendrier["Degrés-jours"] = np.clip(BASE_DEGRES_JOURS - temperature, 0, None)
+        else:
+            table = table_calendrier(dfj["date"].min(), dfj["date"].max(), periodes=df)
+            calendrier = joindre_calendrier(dfj["date"], ["mois", "année", "jour", "Saison", "Degrés-jours"], table)
+        for col in calendrier.columns:
+            dfj[col] = calendrier[col]
+    return compacter(dfj, SCHEMA_JOURNALIER)
+
+
+def projeter(dfj):
+    """Trajectoire simulée, bandes mensuelles et totaux des scénarios à partir du profil historique."""
+    with span("projection", lignes=len(dfj), scenarios=NB_SCENARIOS):
+        moy_par_jour = profil_journalier(dfj)
+        generateur = np.random.default_rng(GRAINE)
+        dfp = trajectoire(moy_par_jour, DEBUT_PROJECTION, NB_JOURS_PROJECTION, generateur)
+        bandes, totaux_scenarios = projeter_scenarios(
+            moy_par_jour, DEBUT_PROJECTION, NB_JOURS_PROJECTION,
+            nb_scenarios=NB_SCENARIOS, graine=GRAINE, budget_memoire=BUDGET_MEMOIRE_PROJECTION
+        )
+
+    calendrier = joindre_calendrier(dfp["date"], ["mois", "année", "jour"])
+    for col in calendrier.columns:
+        dfp[col] = calendrier[col]
+    return dfp, bandes, totaux_scenarios
+
+
+def rapport_economique(dfj, projection, sortie=SORTIE, cache=None, compresser=COMPRESSER_GRAPHIQUES):
+    """Écrit le rapport économique (historique journalier et projection).
+
+    Les graphiques sont préparés en parallèle; `dfj` et la projection ne sont pas modifiés.
+    """
+    dfp, bandes, totaux_scenarios = projection
+    with span("cube", lignes=len(dfj)):
+        cube = CubeAgregats.construire(dfj, ["année", "mois", "Saison"], ["kWh", "Montant ($)"])
+        dfm = cube.cumuler("mois").mesures.xs("somme", axis=1, level=1).reset_index()
+
+    def figure_violon():
+        fig3 = px.violin(
+            dfj,
+            y="Montant ($)",
+            box=True,
+            points="all",
+            title="Distribution du coût journalier (densité + boîte à moustache)"
+        )
+        fig3.update_layout(yaxis_title="Montant ($)", xaxis_visible=False)
+        return fig3
+
+    def figure_correlations():
+        corrs = dfj[["kWh", "Montant ($)", "Température moyenne (°C)"]].corr().round(2)
+        fig4 = go.Figure(data=go.Heatmap(z=corrs.values, x=corrs.columns, y=corrs.columns, colorscale='RdBu', zmin=-1, zmax=1))
+        fig4.update_layout(title="Matrice de corrélation")
+        return fig4
+
+    def figure_mensuelle():
+        df_all = pd.concat([dfj.assign(source="Historique"), dfp.assign(source="Projection")])
+        df_all_mensuel = df_all.groupby(["mois", "source"])[["kWh", "Montant ($)", "Température moyenne (°C)"]].mean().reset_index()
+
+        fig5 = go.Figure()
+        for src, couleur in [("Historique", "green"), ("Projection", "red")]:
+            df_src = df_all_mensuel[df_all_mensuel["source"] == src]
+            fig5.add_trace(go.Bar(x=df_src["mois"], y=df_src["kWh"], name=f"Conso {src}", marker_color=couleur))
+            fig5.add_trace(go.Scatter(x=df_src["mois"], y=df_src["Température moyenne (°C)"],
+                                      name=f"Temp {src}", yaxis="y2", mode="lines+markers"))
+        fig5.update_layout(
+            title="Consommation et température (mensuelle, réel vs simulé)",
+            xaxis_title="Mois", yaxis=dict(title="kWh"), yaxis2=dict(title="Température (°C)", overlaying="y", side="right"),
+            legend=dict(orientation="h", yanchor="bottom", y=-0.4, xanchor="center", x=0.5),
+            template="plotly_white", barmode="group"
+        )
+        return fig5
+
+    def figure_bandes():
+        fig6 = go.Figure()
+        fig6.add_trace(go.Scatter(x=bandes["mois"], y=bandes["Montant ($)_P95"], name="P95", mode="lines", line=dict(width=0, color="red")))
+        fig6.add_trace(go.Scatter(x=bandes["mois"], y=bandes["Montant ($)_P5"], name="P5 – P95", mode="lines", line=dict(width=0, color="red"),
+                                  fill="tonexty", fillcolor="rgba(255,0,0,0.2)"))
+        fig6.add_trace(go.Scatter(x=bandes["mois"], y=bandes["Montant ($)_P50"], name="Médiane (P50)", mode="lines", line=dict(color="red")))
+        fig6.update_layout(title=f"Projection des coûts mensuels simulés ({NB_SCENARIOS} scénarios)",
+                           xaxis_title="mois", yaxis_title="Montant ($)", template="plotly_white")
+        return fig6
+
+    paquet = PaquetPlotly(compresser, cache)
+    with span("graphiques", lignes=len(dfj)):
+        g1, g2, g3, g4, g5, g6, g7 = paquet.figures([
+            {"fig": lambda: ajouter_droites(px.scatter(dfj, x="kWh", y="Montant ($)", color="Intervalle", title="Coût vs Consommation (journalier)")),
+             "cle": dfj[["kWh", "Montant ($)", "Intervalle"]]},
+            {"fig": lambda: ajouter_droites(px.scatter(dfm, x="kWh", y="Montant ($)", title="Coût vs Consommation (mensuel)")),
+             "cle": dfm},
+            figure_violon,
+            figure_correlations,
+            figure_mensuelle,
+            figure_bandes,
+            {"fig": lambda: ajouter_droites(px.scatter(dfp, x="Température moyenne (°C)", y="kWh", title="Simulation : Température vs Consommation")),
+             "cle": dfp[["Température moyenne (°C)", "kWh"]]},
+        ])
+
+    # Répartition saisonnière dans le HTML
+    rapport_saisons = "<h2>Répartition saisonnière annuelle</h2>"
+    col_prod = "kWh"
+    with span("camemberts"):
+        sommes_saisons = cube.sommes(col_prod, ["année", "Saison"])
+
+        for annee in sorted(sommes_saisons.index.get_level_values("année").unique()):
+            total_par_saison = sommes_saisons.xs(annee, level="année").reindex(SAISONS)
+            if total_par_saison.notna().sum() == 4:
+                image_base64 = rendre_figure(SpecCamembert(f"Répartition par saison - {annee}", total_par_saison.tolist(),
+                                                           total_par_saison.index.tolist(), startangle=90), cache)
+                rapport_saisons += f'<img src="data:image/png;base64,{image_base64}" width="400" style="margin:10px;"/>'
+
+        rapport_saisons += "<h2>Répartition saisonnière globale</h2>"
+
+        total_global_saisons = cube.sommes(col_prod, "Saison").reindex(SAISONS)
+        if total_global_saisons.notna().sum() == 4:
+            image_base64 = rendre_figure(SpecCamembert("Répartition par saison - Toutes années", total_global_saisons.tolist(),
+                                                       total_global_saisons.index.tolist(), startangle=90), cache)
+            rapport_saisons += f'<img src="data:image/png;base64,{image_base64}" width="400" style="margin:10px;"/>'
+
+    total_kwh = dfp["kWh"].sum()
+    total_cout = dfp["Montant ($)"].sum()
+    moy_annuelle = dfp.groupby("année")["Montant ($)"].sum().mean()
+    std_annuelle = dfp.groupby("année")["Montant ($)"].sum().std()
+    cout_p5, cout_p95 = np.percentile(totaux_scenarios["Montant ($)"], [5, 95])
+
+    html = f"""
 <html><head><meta charset="utf-8"><title>Rapport économique</title>
-<script src="https://cdn.plot.ly/plotly-latest.min.js"></script></head>
+{paquet.script()}</head>
 <body style="font-family:Arial;padding:20px;max-width:1000px;margin:auto;">
 <h1>Rapport économique – Analyse et Simulation</h1>
 
@@ -172,6 +201,7 @@ html = f"""
 <li><b>Consommation totale simulée</b> : {total_kwh:,.2f} kWh</li>
 <li><b>Coût annuel moyen</b> : {moy_annuelle:,.2f} $</li>
 <li><b>Écart-type annuel</b> : {std_annuelle:,.2f} $</li>
+<li><b>Coût total sur 10 ans (P5 – P95, {NB_SCENARIOS} scénarios)</b> : {cout_p5:,.2f} $ – {cout_p95:,.2f} $</li>
 </ul>
 
 <h2>Analyse : Coût vs Consommation (journalier)</h2>
@@ -192,7 +222,9 @@ html = f"""
 <p>Confrontation des données observées à une projection de 10 ans à climat constant + bruit aléatoire.</p>
 {g5}
 
-<h2>Projection des coûts mensuels</h2>{g6}
+<h2>Projection des coûts mensuels</h2>
+<p>Bande P5 – P95 et médiane des coûts mensuels sur l'ensemble des scénarios simulés.</p>
+{g6}
 
 <h2>Corrélation température vs consommation simulée</h2>
 <p>Vérifie si le lien température-consommation se maintient sur 10 ans simulés.</p>
@@ -205,7 +237,17 @@ Rapport généré automatiquement avec Python (Pandas, NumPy, Plotly).
 </footer></body></html>
 """
 
-with open("rapport_economique.html", "w", encoding="utf-8") as f:
-    f.write(html)
+    with span("écriture du rapport"), open(sortie, "w", encoding="utf-8") as f:
+        f.write(html)
+    return sortie
+
+
+if __name__ == "__main__":
+    cache = CacheFigures() if CACHE_FIGURES else None
+    dfj = developper_journalier(lire_consommation_enrichie(FICHIER), FICHIER)
+    print(f"📦 {rapport_memoire(dfj, 'table journalière')}")
+    rapport_economique(dfj, projeter(dfj), SORTIE, cache)
 
-print("✅ Rapport économique standalone généré avec succès : rapport_economique.html")
+    print("✅ Rapport économique standalone généré avec succès : rapport_economique.html")
+    if cache is not None:
+        print(cache.resume())
@@ -0,0 +1,14 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+RACINE = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def facturation_csv(tmp_path):
+    """Copie du CSV de facturation du dépôt dans un dossier temporaire (l'état incrémental s'écrit à côté)."""
+    chemin = tmp_path / "consommation_enrichie01.csv"
+    shutil.copy(RACINE / "consommation_enrichie01.csv", chemin)
+    return chemin
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calendrier import joindre_calendrier, jours_feries, table_calendrier
+
+
+def _attribuer_saison(date):
+    """Saison astronomique du script d'origine (tarification03)."""
+    mois, jour = date.month, date.day
+    if (mois == 12 and jour >= 21) or (mois <= 3 and (mois != 3 or jour < 20)):
+        return "Hiver"
+    elif (mois == 3 and jour >= 20) or (4 <= mois <= 5) or (mois == 6 and jour < 21):
+        return "Printemps"
+    elif (mois == 6 and jour >= 21) or (7 <= mois <= 8) or (mois == 9 and jour < 22):
+        return "Été"
+    return "Automne"
+
+
+SAISON_METEO_D_ORIGINE = {12: "Hiver", 1: "Hiver", 2: "Hiver", 3: "Printemps", 4: "Printemps", 5: "Printemps",
+                          6: "Été", 7: "Été", 8: "Été", 9: "Automne", 10: "Automne", 11: "Automne"}
+
+
+def test_saisons_comme_les_scripts_d_origine():
+    dates = pd.Series(pd.date_range("2023-01-01", "2024-12-31", freq="D"))
+    calendrier = joindre_calendrier(dates, ["Saison", "Saison météo"])
+    assert calendrier["Saison"].astype(str).tolist() == [_attribuer_saison(d) for d in dates]
+    assert calendrier["Saison météo"].astype(str).tolist() == dates.dt.month.map(SAISON_METEO_D_ORIGINE).tolist()
+
+
+@pytest.mark.parametrize("date, saison", [
+    ("2024-03-19", "Hiver"), ("2024-03-20", "Printemps"), ("2024-06-20", "Printemps"), ("2024-06-21", "Été"),
+    ("2024-09-21", "Été"), ("2024-09-22", "Automne"), ("2024-12-20", "Automne"), ("2024-12-21", "Hiver"),
+])
+def test_jours_de_changement_de_saison(date, saison):
+    assert joindre_calendrier(pd.Series([pd.Timestamp(date)]), ["Saison"])["Saison"].iloc[0] == saison
+
+
+def test_jours_feries_du_quebec():
+    feries = jours_feries([2023, 2024])
+    par_nom = {nom: sorted(dates.strftime("%Y-%m-%d")) for nom, dates in feries.index.groupby(feries).items()}
+    assert par_nom["Fête nationale"] == ["2023-06-24", "2024-06-24"]
+    assert par_nom["Fête du Travail"] == ["2023-09-04", "2024-09-02"]
+    assert par_nom["Vendredi saint"] == ["2023-04-07", "2024-03-29"]
+    assert par_nom["Lundi de Pâques"] == ["2023-04-10", "2024-04-01"]
+    assert par_nom["Journée nationale des patriotes"] == ["2023-05-22", "2024-05-20"]
+    assert par_nom["Action de grâce"] == ["2023-10-09", "2024-10-14"]
+    assert len(feries) == 18
+    table = table_calendrier("2024-01-01", "2024-12-31")
+    assert table["Férié"].sum() == 9 and table.at[pd.Timestamp("2024-06-24"), "Jour férié"] == "Fête nationale"
+
+
+def test_appartenance_aux_periodes_de_facturation():
+    periodes = pd.DataFrame({
+        "Date de début": pd.to_datetime(["2024-01-10", "2024-01-20"]),
+        "Jour": [10, 3],
+        "Température moyenne (°C)": [-2.0, 25.0],
+        "Intervalle": ["p1", "p2"],
+    })
+    table = table_calendrier("2024-01-01", "2024-01-31", periodes=periodes)
+    janvier = table.loc["2024-01-08":"2024-01-23"]
+    assert janvier["Période"].tolist() == [-1, -1] + [0] * 10 + [1] * 3 + [-1]
+    assert janvier["Intervalle"].astype(object).where(janvier["Période"] >= 0).dropna().unique().tolist() == ["p1", "p2"]
+    assert janvier["Degrés-jours"].tolist()[2:15] == [20.0] * 10 + [0.0] * 3
+    assert np.isnan(janvier["Degrés-jours"].iloc[0]) and np.isnan(janvier["Degrés-jours"].iloc[-1])
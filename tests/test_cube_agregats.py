@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube_agregats import CubeAgregats, etendre_bords
+
+
+def _lignes(valeurs, groupe="A"):
+    return pd.DataFrame({"groupe": groupe, "valeur": np.asarray(valeurs, dtype=float)})
+
+
+def _largeur(cube):
+    return cube.bords["valeur"][1] - cube.bords["valeur"][0]
+
+
+def test_quantiles_a_une_largeur_de_bac_pres():
+    generateur = np.random.default_rng(0)
+    df = _lignes(generateur.lognormal(3, 1, 50_000))
+    cube = CubeAgregats.construire(df, ["groupe"], ["valeur"])
+    probabilites = [0.05, 0.25, 0.5, 0.75, 0.95]
+    approches = cube.quantiles("valeur", "groupe", probabilites).iloc[0]
+    exacts = df["valeur"].quantile(probabilites)
+    assert np.abs(approches.to_numpy() - exacts.to_numpy()).max() <= _largeur(cube)
+
+
+def test_fusion_avec_valeurs_hors_des_bords():
+    generateur = np.random.default_rng(1)
+    premier = _lignes(generateur.uniform(0, 10, 10_000))
+    # Le second lot sort largement des bords du premier, dans les deux sens.
+    second = _lignes(generateur.uniform(-50, 200, 10_000))
+    cube = CubeAgregats.construire(premier, ["groupe"], ["valeur"])
+    ajout = CubeAgregats.construire(second, ["groupe"], ["valeur"], bords=cube.bords)
+    fusion = cube.fusionner(ajout)
+
+    tout = pd.concat([premier, second])
+    assert fusion.bords["valeur"][0] <= tout["valeur"].min()
+    assert fusion.bords["valeur"][-1] >= tout["valeur"].max()
+    assert fusion.histogrammes["valeur"].sum() == len(tout)
+    probabilites = [0.1, 0.5, 0.9, 0.99]
+    approches = fusion.quantiles("valeur", "groupe", probabilites).iloc[0]
+    exacts = tout["valeur"].quantile(probabilites)
+    assert np.abs(approches.to_numpy() - exacts.to_numpy()).max() <= _largeur(fusion)
+
+
+def test_etendre_bords_aligne_les_bacs():
+    bords = np.linspace(0, 8, 9)
+    # Vers le bas (largeur 2), puis vers le haut (largeur 4) : les anciens bords 0, 4 et 8 sont conservés.
+    assert etendre_bords(bords, -3, 20) == pytest.approx(np.linspace(-8, 24, 9))
+    assert etendre_bords(bords, 1, 7) is bords
+
+
+def test_boites_a_un_bac_pres_des_statistiques_exactes():
+    from rendu_figures import stats_boites
+
+    generateur = np.random.default_rng(2)
+    df = pd.DataFrame({"groupe": generateur.integers(0, 3, 30_000),
+                       "valeur": np.r_[generateur.normal(100, 10, 29_990), generateur.normal(300, 5, 10)]})
+    cube = CubeAgregats.construire(df, ["groupe"], ["valeur"])
+    largeur = _largeur(cube)
+    etiquettes, approchees = cube.stats_boites("valeur", "groupe")
+    etiquettes_exactes, exactes = stats_boites(df, "groupe", "valeur")
+    assert etiquettes == etiquettes_exactes
+    for approchee, exacte, (_, groupe) in zip(approchees, exactes, df.groupby("groupe")["valeur"]):
+        for cle in ("q1", "med", "q3", "whislo", "whishi"):
+            assert abs(approchee[cle] - exacte[cle]) <= largeur
+        # Les points tracés sont les extrêmes réels; le compte est à un bac près.
+        assert approchee["fliers"].tolist() == [groupe.min(), groupe.max()]
+        pres_des_bornes = ((groupe - (exacte["q1"] - 1.5 * (exacte["q3"] - exacte["q1"]))).abs() <= 2 * largeur).sum() + \
+            ((groupe - (exacte["q3"] + 1.5 * (exacte["q3"] - exacte["q1"]))).abs() <= 2 * largeur).sum()
+        assert abs(approchee["aberrants"] - len(exacte["fliers"])) <= pres_des_bornes
+
+
+def test_boites_sans_aberrants_moustaches_exactes():
+    df = _lignes(np.linspace(0, 10, 1001))
+    _, (stats,) = CubeAgregats.construire(df, ["groupe"], ["valeur"]).stats_boites("valeur", "groupe")
+    assert (stats["whislo"], stats["whishi"]) == (0.0, 10.0)
+    assert stats["fliers"].size == 0 and stats["aberrants"] == 0
@@ -0,0 +1,51 @@
+from cache_figures import CacheFigures
+from ecriture_rapport import RapportHTML
+from rendu_figures import RenduFigures, SpecCamembert
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 16
+
+
+class ImageLente:
+    def __init__(self, donnees=PNG):
+        self.donnees = donnees
+        self.lue = False
+
+    def prete(self):
+        return False
+
+    def resultat(self):
+        self.lue = True
+        return self.donnees
+
+
+def test_texte_retenu_derriere_une_image_en_attente(tmp_path):
+    chemin = tmp_path / "r.html"
+    image = ImageLente()
+    with RapportHTML(chemin, "unique", images_en_attente_max=2) as rapport:
+        rapport.ecrire("<h1>a</h1>")
+        rapport.image(image)
+        rapport.ecrire("<h2>b</h2>")
+        rapport._fichier.flush()
+        assert chemin.read_text(encoding="utf-8") == "<h1>a</h1>"
+    contenu = chemin.read_text(encoding="utf-8")
+    assert image.lue and contenu.startswith("<h1>a</h1><img src=\"data:image/png;base64,")
+    assert contenu.endswith("<h2>b</h2>")
+
+
+def test_nombre_d_images_en_attente_borne(tmp_path):
+    images = [ImageLente() for _ in range(4)]
+    with RapportHTML(tmp_path / "r.html", "externe", images_en_attente_max=2) as rapport:
+        for image in images:
+            rapport.image(image)
+        assert [image.lue for image in images] == [True, True, False, False]
+    assert rapport.nb_images == 4
+
+
+def test_rendu_relu_depuis_le_cache(tmp_path):
+    cache = CacheFigures(tmp_path / "cache")
+    spec = SpecCamembert("Saisons", [1, 2], ["a", "b"])
+    with RenduFigures(1, cache=cache) as rendu:
+        premiere = rendu.soumettre(spec).resultat()
+        seconde = rendu.soumettre(spec)
+        assert seconde.prete() and seconde.resultat() == premiere
+    assert (cache.succes, cache.echecs) == (1, 1)
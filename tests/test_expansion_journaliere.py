@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from expansion_journaliere import etendre_periodes, poids_degres_jours
+
+TEMPERATURE = "Température moyenne (°C)"
+
+
+@pytest.fixture
+def periodes():
+    """Trois périodes : une à cheval sur fin janvier, une d'un jour et une d'été (sans degré-jour)."""
+    return pd.DataFrame({
+        "Date de début": pd.to_datetime(["2024-01-25", "2024-02-29", "2024-07-01"]),
+        "Jour": [10, 1, 3],
+        "kWh": [500.0, 30.0, 90.0],
+        "Montant ($)": [40.0, 2.5, 6.0],
+        TEMPERATURE: [-8.0, 2.0, 24.0],
+        "Intervalle": ["a", "b", "c"],
+    })
+
+
+def _iterrows(df):
+    """Expansion ligne par ligne du script d'origine (tarification03)."""
+    jours = []
+    for _, row in df.iterrows():
+        for i in range(int(row["Jour"])):
+            jours.append({
+                "date": row["Date de début"] + timedelta(days=i),
+                "Intervalle": row["Intervalle"],
+                "kWh": row["kWh"] / row["Jour"],
+                "Montant ($)": row["Montant ($)"] / row["Jour"],
+                TEMPERATURE: row[TEMPERATURE],
+            })
+    return pd.DataFrame(jours)
+
+
+def test_comme_la_boucle_d_origine(periodes):
+    dfj = etendre_periodes(periodes, colonnes_constantes=["Intervalle", TEMPERATURE])
+    attendu = _iterrows(periodes)
+    pd.testing.assert_frame_equal(dfj[attendu.columns], attendu, check_dtype=False)
+
+
+def test_jours_de_debut_a_fin_inclus(periodes):
+    dfj = etendre_periodes(periodes)
+    dates = dfj["date"].dt.strftime("%Y-%m-%d").tolist()
+    assert dates[:10] == [f"2024-01-{j}" for j in range(25, 32)] + ["2024-02-01", "2024-02-02", "2024-02-03"]
+    assert dates[10:] == ["2024-02-29", "2024-07-01", "2024-07-02", "2024-07-03"]
+    assert dfj.groupby(dfj["date"].dt.month)["kWh"].sum().to_dict() == pytest.approx({1: 350, 2: 180, 7: 90})
+
+
+def test_poids_degres_jours(periodes):
+    temperatures = pd.Series([-20.0, -10.0], index=pd.to_datetime(["2024-01-25", "2024-01-26"]))
+    dfj = etendre_periodes(periodes, colonnes_constantes=[TEMPERATURE], poids=poids_degres_jours(temperatures))
+    sommes = dfj.groupby(dfj["date"].dt.month)["kWh"].sum()
+    assert dfj["kWh"].sum() == pytest.approx(periodes["kWh"].sum())
+    # Degrés-jours (base 18) de la première période : 38, 28 puis 26 pour les 8 autres jours, 274 au total.
+    assert dfj["kWh"].iloc[:3].tolist() == pytest.approx([500 * 38 / 274, 500 * 28 / 274, 500 * 26 / 274])
+    assert sommes[1] + sommes[2] - 30 == pytest.approx(500)
+    # Période sans degré-jour : répartition uniforme.
+    assert dfj["kWh"].iloc[-3:].tolist() == pytest.approx([30.0, 30.0, 30.0])
+
+
+def test_plusieurs_comptes_et_jours_manquants(periodes):
+    periodes["Compte"] = ["x", "x", "y"]
+    periodes.loc[1, "Jour"] = np.nan
+    dfj = etendre_periodes(periodes, cle_compte="Compte")
+    assert dfj.groupby("Compte")["kWh"].sum().to_dict() == pytest.approx({"x": 500, "y": 90})
+    assert len(dfj) == 13
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from constantes import KWH_PAR_JOUR_TARIF_BASE, TARIF_BASE, TARIF_HAUT
+from facturation import grille_unique, simuler_factures
+from tarification01 import lire_consommation_enrichie
+
+
+def test_periode_decoupee_a_la_date_d_effet():
+    grille = pd.DataFrame({
+        "date_effet": pd.to_datetime(["2000-01-01", "2024-04-01"]),
+        "tarif_base": [0.06, 0.07],
+        "tarif_haut": [0.09, 0.10],
+        "kwh_par_jour": [40, 40],
+    })
+    # 10 jours dont 4 avant le changement : 400 kWh et 160 kWh de seuil au premier tarif, le reste au second.
+    df = pd.DataFrame({"Date de début": pd.to_datetime(["2024-03-28"]), "Jour": [10], "kWh": [1000.0]})
+    resultat = simuler_factures(df, grille).iloc[0]
+    assert resultat["Seuil_kWh"] == pytest.approx(400)
+    assert resultat["kWh_base"] == pytest.approx(400)
+    assert resultat["kWh_haut"] == pytest.approx(600)
+    assert resultat["Montant_simulé"] == pytest.approx(160 * 0.06 + 240 * 0.09 + 240 * 0.07 + 360 * 0.10)
+
+
+def test_grille_unique_comme_la_formule_d_origine(facturation_csv):
+    df = lire_consommation_enrichie(facturation_csv)
+    df.loc[df.index[2], "Jour"] = np.nan
+    resultat = simuler_factures(df, grille_unique(TARIF_BASE, TARIF_HAUT, KWH_PAR_JOUR_TARIF_BASE))
+
+    seuil = df["Jour"] * KWH_PAR_JOUR_TARIF_BASE
+    kwh_base = pd.concat([df["kWh"], seuil], axis=1).min(axis=1)
+    kwh_haut = (df["kWh"] - seuil).clip(lower=0)
+    montant = kwh_base * TARIF_BASE + kwh_haut * TARIF_HAUT
+    pd.testing.assert_series_equal(resultat["Seuil_kWh"], seuil, check_names=False)
+    pd.testing.assert_series_equal(resultat["kWh_haut"], kwh_haut, check_names=False)
+    pd.testing.assert_series_equal(resultat["Montant_simulé"], montant, check_names=False)
+    assert np.isnan(resultat["Montant_simulé"].iloc[2])
+
+
+def test_rapport_trace_le_seuil_de_la_grille(facturation_csv, tmp_path):
+    import tarification02
+
+    grille = tmp_path / "grille.csv"
+    grille_unique(TARIF_BASE, TARIF_HAUT, 30).to_csv(grille, index=False)
+    df = tarification02.simuler_tarifs(lire_consommation_enrichie(facturation_csv), grille)
+    assert tarification02.libelle_seuil(df) == "30 kWh/jour"
+    html = tarification02.rapport_dynamique(df, facturation_csv, tmp_path / "rapport.html").read_text(encoding="utf-8")
+    assert "30 kWh/jour" in html and "40 kWh/jour" not in html
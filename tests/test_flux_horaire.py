@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import donneeHydroQC01
+from constantes import col_prod
+from donnees_synthetiques import generer_horaire
+from ingestion_horaire import lire_horaire_csv
+from qualite_donnees import analyser
+
+
+@pytest.fixture(scope="module")
+def horaire_csv(tmp_path_factory):
+    chemin = tmp_path_factory.mktemp("flux") / "horaire.csv"
+    generer_horaire(chemin, 24 * 400, taux_trous=2e-3)
+    return chemin
+
+
+def test_agregats_par_blocs_comme_la_lecture_complete(horaire_csv):
+    colonnes, accumulateurs, cube, dates, series = donneeHydroQC01.agreger_par_blocs(horaire_csv, 1000)
+    df = lire_horaire_csv(horaire_csv).dropna(subset=["Datetime"]).sort_values("Datetime")
+
+    assert np.array_equal(dates, df["Datetime"].to_numpy())
+    col = col_prod
+    assert accumulateurs[col].nombre == len(df)
+    assert accumulateurs[col].minimum == df[col].min()
+    assert accumulateurs[col].maximum == df[col].max()
+    assert cube.sommes(col, "Année").sum() == pytest.approx(df[col].sum(), rel=1e-12)
+    assert cube.histogrammes[col].sum() == len(df)
+    x, y = series[col]
+    assert np.all(np.diff(x) >= 0) and x.size <= len(df)
+
+    bilan_flux = analyser(pd.DataFrame({"Datetime": dates}), [col], accumulateurs=accumulateurs)
+    bilan = analyser(df, [col])
+    pd.testing.assert_frame_equal(bilan_flux.trous, bilan.trous)
+    assert bilan_flux.hors_limites["Manquantes"].tolist() == bilan.hors_limites["Manquantes"].tolist()
+
+
+def test_statistiques_du_rapport_identiques_au_csv(horaire_csv):
+    brut = pd.read_csv(horaire_csv)[col_prod]
+    assert brut.max() > 2 ** 14
+    minimum, maximum, quantiles, _ = donneeHydroQC01.statistiques_colonne(col_prod, lire_horaire_csv(horaire_csv)[col_prod])
+    assert (minimum, maximum) == (brut.min(), brut.max())
+    assert quantiles == brut.quantile([0.25, 0.5, 0.75]).to_dict()
+
+
+def test_budget_depasse_calcul_par_blocs(horaire_csv, tmp_path, monkeypatch):
+    appels = []
+
+    def agreger(fichier, taille_bloc):
+        appels.append(taille_bloc)
+        return agreger_par_blocs(fichier, taille_bloc)
+
+    def charger(*args, **kwargs):
+        raise AssertionError("table entière chargée malgré le budget")
+
+    agreger_par_blocs = donneeHydroQC01.agreger_par_blocs
+    monkeypatch.setattr(donneeHydroQC01, "agreger_par_blocs", agreger)
+    monkeypatch.setattr(donneeHydroQC01, "charger_horaire", charger)
+    sortie = donneeHydroQC01.rapport_horaire(horaire_csv, tmp_path / "rapport.html", nb_processus=1, budget_memoire=1)
+    assert appels and appels[0] is not None
+    assert "Analyse des trous temporels" in sortie.read_text(encoding="utf-8")
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tarification02
+from incremental import EtatHoraire
+from tarification01 import lire_consommation_enrichie
+
+
+def _indicateurs(chemin, incremental):
+    df = tarification02.simuler_tarifs(lire_consommation_enrichie(chemin))
+    correlation, totaux = tarification02.indicateurs(df, chemin, incremental)
+    return correlation, {col: float(totaux[col]) for col in ("kWh", "Montant ($)", "Montant_simulé")}
+
+
+def test_facturation_correction_ancienne_periode(facturation_csv):
+    _indicateurs(facturation_csv, True)
+    brut = pd.read_csv(facturation_csv)
+    brut.loc[3, "kWh"] += 10000
+    brut.to_csv(facturation_csv, index=False)
+
+    correlation, totaux = _indicateurs(facturation_csv, True)
+    correlation_complete, totaux_complets = _indicateurs(facturation_csv, False)
+    assert totaux == pytest.approx(totaux_complets)
+    assert totaux["kWh"] == pytest.approx(brut["kWh"].sum())
+    assert correlation == pytest.approx(correlation_complete)
+
+
+def test_facturation_ajout_de_periode(facturation_csv):
+    brut = pd.read_csv(facturation_csv)
+    brut.iloc[1:].to_csv(facturation_csv, index=False)
+    _indicateurs(facturation_csv, True)
+    brut.to_csv(facturation_csv, index=False)
+
+    correlation, totaux = _indicateurs(facturation_csv, True)
+    correlation_complete, totaux_complets = _indicateurs(facturation_csv, False)
+    assert totaux == pytest.approx(totaux_complets)
+    assert correlation == pytest.approx(correlation_complete)
+
+
+def _horaire(nb_heures):
+    dates = pd.date_range("2023-01-01", periods=nb_heures, freq="h")
+    return pd.DataFrame({
+        "Datetime": dates,
+        "Année": dates.year, "mois": dates.month, "Heure": dates.hour,
+        "Saison": np.where(dates.month < 6, "Hiver", "Été"),
+        "MWh": np.arange(nb_heures, dtype=float),
+    })
+
+
+def test_horaire_nouvelles_lignes_et_correction():
+    df = _horaire(100)
+    etat = EtatHoraire(["MWh"], ["MWh"], ["Année", "mois", "Heure", "Saison"])
+    etat.integrer(etat.nouvelles_lignes(df.iloc[:80]))
+
+    nouvelles = etat.nouvelles_lignes(df)
+    assert nouvelles is not None and len(nouvelles) == 20
+
+    corrige = df.copy()
+    corrige.loc[3, "MWh"] += 1.0
+    assert etat.nouvelles_lignes(corrige) is None
+    assert etat.nouvelles_lignes(df.drop(index=10)) is None
+
+
+def test_rapport_horaire_n_analyse_que_les_lignes_ajoutees(tmp_path, monkeypatch):
+    import donneeHydroQC01
+    import incremental
+    from constantes import col_prod
+    from donnees_synthetiques import generer_horaire
+    from ingestion_horaire import lire_horaire_csv
+    from qualite_donnees import analyser
+
+    complet = tmp_path / "complet.csv"
+    generer_horaire(complet, 24 * 60, taux_trous=5e-3)
+    lignes = complet.read_text(encoding="latin1").splitlines(keepends=True)
+    chemin = tmp_path / "horaire.csv"
+    chemin.write_text("".join(lignes[:24 * 45]), encoding="latin1")
+    donneeHydroQC01.rapport_horaire(chemin, tmp_path / "r1.html", nb_processus=1, incremental=True)
+    deja_integrees = incremental.charger_etat(chemin, "horaire").nb_lignes
+
+    analysees = []
+
+    def analyser_trace(df, *args, **kwargs):
+        analysees.append(len(df))
+        return analyser(df, *args, **kwargs)
+
+    def compacter(*args):
+        raise AssertionError("table entière recompactée en mode incrémental")
+
+    monkeypatch.setattr(incremental, "analyser", analyser_trace)
+    monkeypatch.setattr(donneeHydroQC01, "compacter", compacter)
+    chemin.write_text("".join(lignes), encoding="latin1")
+    sortie = donneeHydroQC01.rapport_horaire(chemin, tmp_path / "r2.html", nb_processus=1, incremental=True)
+
+    etat = incremental.charger_etat(chemin, "horaire")
+    df = lire_horaire_csv(chemin).dropna(subset=["Datetime"]).sort_values("Datetime")
+    # Les lignes ajoutées, précédées du dernier horodatage déjà intégré.
+    assert analysees == [len(df) - deja_integrees + 1]
+    bilan = analyser(df, [col_prod])
+    pd.testing.assert_frame_equal(etat.bilan.trous, bilan.trous)
+    assert (etat.bilan.nb_lignes, etat.bilan.nb_attendues) == (bilan.nb_lignes, bilan.nb_attendues)
+    x, y = etat.series[col_prod]
+    assert np.all(np.diff(x) >= 0) and x[-1] == df["Datetime"].iloc[-1]
+    assert "Quartiles approchés" in sortie.read_text(encoding="utf-8")
@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+import pytest
+
+import ingestion_horaire
+from donnees_synthetiques import generer_horaire
+from ingestion_horaire import charger_horaire, lire_horaire_csv
+
+
+@pytest.fixture
+def export(tmp_path):
+    """Export horaire complet et copie réduite à ses premières lignes (l'export « avant ajout »)."""
+    complet = tmp_path / "complet.csv"
+    generer_horaire(complet, 24 * 60)
+    lignes = complet.read_bytes().splitlines(keepends=True)
+    chemin = tmp_path / "horaire.csv"
+    chemin.write_bytes(b"".join(lignes[:24 * 30]))
+    return chemin, complet
+
+
+def _charger(chemin, monkeypatch, lecture_complete=True):
+    """Charge via le cache; avec `lecture_complete=False`, échoue si le CSV est relu en entier."""
+    with monkeypatch.context() as m:
+        if not lecture_complete:
+            m.setattr(ingestion_horaire, "lire_horaire_csv", _interdite)
+        return charger_horaire(chemin, dossier_cache=chemin.parent / "cache")
+
+
+def _interdite(*args, **kwargs):
+    raise AssertionError("CSV relu en entier")
+
+
+def test_cache_relu_puis_lignes_ajoutees(export, monkeypatch):
+    chemin, complet = export
+    premier = _charger(chemin, monkeypatch)
+    pd.testing.assert_frame_equal(_charger(chemin, monkeypatch, lecture_complete=False), premier)
+
+    chemin.write_bytes(complet.read_bytes())
+    ajoute = _charger(chemin, monkeypatch, lecture_complete=False)
+    pd.testing.assert_frame_equal(ajoute, lire_horaire_csv(complet), check_categorical=False)
+
+
+def test_cache_reconstruit_apres_modification(export, monkeypatch):
+    chemin, _ = export
+    avant = _charger(chemin, monkeypatch)
+    lignes = chemin.read_bytes().splitlines(keepends=True)
+    champs = lignes[5].split(b",")
+    champs[-1] = b"123456.5\n"
+    lignes[5] = b",".join(champs)
+    chemin.write_bytes(b"".join(lignes))
+    apres = _charger(chemin, monkeypatch)
+    assert 123456.5 in apres.iloc[4].to_numpy() and 123456.5 not in avant.iloc[4].to_numpy()
+    pd.testing.assert_frame_equal(apres, lire_horaire_csv(chemin))
+
+
+def test_fichier_touche_garde_son_cache(export, monkeypatch):
+    chemin, _ = export
+    premier = _charger(chemin, monkeypatch)
+    stat = os.stat(chemin)
+    os.utime(chemin, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    pd.testing.assert_frame_equal(_charger(chemin, monkeypatch, lecture_complete=False), premier)
@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
+
+import instrumentation
+from rendu_figures import RenduFigures, SpecCamembert
+
+
+@pytest.fixture
+def traceur():
+    traceur = instrumentation.activer()
+    yield traceur
+    instrumentation.desactiver()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="rendu en série sans fork")
+def test_rendu_en_parallele_dans_la_trace(traceur):
+    with RenduFigures(2) as rendu:
+        images = [rendu.soumettre(SpecCamembert(f"t{i}", [1, 2, 3], ["a", "b", "c"])) for i in range(3)]
+        assert all(image.resultat() for image in images)
+    assert not rendu.en_serie
+    evenements = traceur.evenements()
+    rendus = [e for e in evenements if e["name"] == "rendu SpecCamembert"]
+    assert len(rendus) == 3 and len([e for e in evenements if e["name"] == "savefig"]) == 3
+    assert all(e["pid"] != os.getpid() and e["dur"] > 0 for e in rendus)
+    assert "rendu SpecCamembert" in traceur.resume()
+
+
+def test_import_sans_resource():
+    """Sans le module `resource` (Windows), la trace fonctionne sans pic RSS."""
+    code = ("import sys; sys.modules['resource'] = None\n"
+            "import instrumentation\n"
+            "traceur = instrumentation.activer()\n"
+            "with instrumentation.span('étape'): pass\n"
+            "assert 'rss_max_mio' not in traceur.evenements()[0]['args']\n")
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(instrumentation.__file__), check=True)
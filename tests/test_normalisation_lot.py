@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from normalisation_lot import lire_lot, normaliser_lot
+from tarification01 import COLONNES
+
+
+def _export_hydro(facturation_csv, chemin):
+    """Réécrit le CSV de facturation au format d'export Hydro-Québec (point-virgule, virgule décimale, latin-1)."""
+    df = pd.read_csv(facturation_csv)[COLONNES]
+    df.to_csv(chemin, sep=";", decimal=",", index=False, encoding="iso-8859-1")
+
+
+def test_un_export_mal_forme_n_interrompt_pas_le_lot(tmp_path, facturation_csv):
+    source = tmp_path / "exports"
+    source.mkdir()
+    _export_hydro(facturation_csv, source / "0314397469_p_riode_a.csv")
+    _export_hydro(facturation_csv, source / "0314397470_p_riode_b.csv")
+    mal_forme = source / "0314397471_p_riode_c.csv"
+    mal_forme.write_text("colonne;inattendue\n1;2\n", encoding="iso-8859-1")
+    destination = tmp_path / "lot"
+
+    resume = normaliser_lot(str(source), str(destination), nb_processus=2)
+
+    assert list(resume.echecs) == [str(mal_forme)]
+    assert resume.echecs[str(mal_forme)].startswith("KeyError")
+    assert resume.reussis == [str(source / "0314397469_p_riode_a.csv"), str(source / "0314397470_p_riode_b.csv")]
+    assert sorted(p.name for p in destination.iterdir()) == ["Compte=0314397469", "Compte=0314397470"]
+
+    lot = lire_lot(destination)
+    attendu = len(pd.read_csv(facturation_csv))
+    assert lot["Compte"].value_counts().to_dict() == {"0314397469": attendu, "0314397470": attendu}
+    assert resume.nb_lignes == 2 * attendu
+    assert lot["kWh"].notna().all()
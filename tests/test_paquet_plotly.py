@@ -0,0 +1,26 @@
+import pandas as pd
+import plotly.express as px
+
+from cache_figures import CacheFigures
+from paquet_plotly import PaquetPlotly, empreinte_code
+
+DONNEES = pd.DataFrame({"x": [1.0, 2.0, 3.0], "y": [2.0, 4.0, 5.0]})
+
+
+def test_cache_plotly_suit_le_code_de_la_figure(tmp_path):
+    paquet = PaquetPlotly(cache=CacheFigures(tmp_path))
+    partie_a = paquet.preparer(lambda: px.scatter(DONNEES, x="x", y="y", title="Titre A"), cle=DONNEES)
+    partie_b = paquet.preparer(lambda: px.scatter(DONNEES, x="x", y="y", title="Titre B"), cle=DONNEES)
+    assert "Titre A" in partie_a["charge"] and "Titre B" in partie_b["charge"]
+    assert paquet.cache.succes == 0
+
+    paquet.preparer(lambda: px.scatter(DONNEES, x="x", y="y", title="Titre A"), cle=DONNEES)
+    assert paquet.cache.succes == 1
+
+
+def test_empreinte_code_parametres_captures():
+    def construire(couleur):
+        return lambda: px.scatter(DONNEES, x="x", y="y", color_discrete_sequence=[couleur])
+
+    assert empreinte_code(construire("red")) == empreinte_code(construire("red"))
+    assert empreinte_code(construire("red")) != empreinte_code(construire("blue"))
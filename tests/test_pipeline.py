@@ -0,0 +1,69 @@
+import importlib
+import sys
+
+import pytest
+
+import pipeline
+from pipeline import Etape, Pipeline
+
+
+@pytest.fixture
+def projet(tmp_path, monkeypatch):
+    """Petit projet temporaire : `etape.py` utilise `aide.py`, qui lit une constante."""
+    monkeypatch.setattr(pipeline, "RACINE_PROJET", tmp_path.resolve())
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "aide.py").write_text("FACTEUR = 2\n\ndef doubler(x):\n    return FACTEUR * x\n")
+    (tmp_path / "etape.py").write_text("from aide import doubler\n\ndef calculer(x):\n    return doubler(x)\n")
+    yield tmp_path
+    for nom in ("aide", "etape", "taux"):
+        sys.modules.pop(nom, None)
+
+
+def _executer(projet, **fichiers):
+    for nom in ("aide", "etape", "taux"):
+        sys.modules.pop(nom, None)
+    etape = importlib.import_module("etape")
+    etapes = [Etape("calcul", etape.calculer, parametres={"x": 21}, **fichiers)]
+    resultats, bilans = Pipeline(etapes, projet / "etat", nb_fils=1).executer()
+    return resultats.get("calcul"), bilans[0].executee
+
+
+def test_modification_d_un_module_utilise(projet):
+    assert _executer(projet) == (42, True)
+    assert _executer(projet) == (None, False)
+    (projet / "aide.py").write_text("FACTEUR = 3\n\ndef doubler(x):\n    return FACTEUR * x\n")
+    assert _executer(projet) == (63, True)
+
+
+def test_modification_d_une_constante_importee(projet):
+    (projet / "taux.py").write_text("FACTEUR = 2\n")
+    (projet / "aide.py").write_text("from taux import FACTEUR\n\ndef doubler(x):\n    return FACTEUR * x\n")
+    assert _executer(projet) == (42, True)
+    assert _executer(projet) == (None, False)
+    (projet / "taux.py").write_text("FACTEUR = 3\n")
+    assert _executer(projet) == (63, True)
+
+
+def test_modification_d_un_fichier_lu(projet):
+    grille = projet / "grille.csv"
+    grille.write_text("a\n1\n")
+    assert _executer(projet, fichiers=(grille,))[1]
+    assert not _executer(projet, fichiers=(grille,))[1]
+    grille.write_text("a\n2\n")
+    assert _executer(projet, fichiers=(grille,))[1]
+
+
+def test_etapes_facturation_grille():
+    simulation = {e.nom: e for e in pipeline.etapes_facturation(fichier_grille="grille.csv")}["simulation"]
+    assert "grille.csv" in simulation.fichiers
+    assert simulation.parametres["fichier_grille"] == "grille.csv"
+
+
+def test_options_dans_l_empreinte(facturation_csv, tmp_path):
+    def empreintes(**options):
+        return Pipeline(pipeline.etapes_facturation(facturation_csv, **options), tmp_path / "etat")._empreintes()
+
+    simple, compresse = empreintes(), empreintes(compresser=True)
+    assert simple == empreintes()
+    assert simple["rapport_dynamique"] != compresse["rapport_dynamique"]
+    assert simple["simulation"] == compresse["simulation"]
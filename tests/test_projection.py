@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from projection import profil_journalier, projeter_scenarios, trajectoire
+
+DEBUT = "2025-04-06"
+
+
+@pytest.fixture(scope="module")
+def profil():
+    dates = pd.date_range("2022-01-01", "2024-12-31", freq="D")
+    saison = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 15) / 365.25)
+    dfj = pd.DataFrame({"date": dates, "kWh": 60 + 40 * saison, "Montant ($)": 5 + 3 * saison,
+                        "Température moyenne (°C)": 7 - 15 * saison})
+    return profil_journalier(dfj)
+
+
+def test_graine_reproductible(profil):
+    premier = projeter_scenarios(profil, DEBUT, 400, nb_scenarios=200, graine=3)
+    second = projeter_scenarios(profil, DEBUT, 400, nb_scenarios=200, graine=3)
+    autre = projeter_scenarios(profil, DEBUT, 400, nb_scenarios=200, graine=4)
+    for a, b in zip(premier, second):
+        pd.testing.assert_frame_equal(a, b)
+    assert not premier[1].equals(autre[1])
+    pd.testing.assert_frame_equal(trajectoire(profil, DEBUT, 50, np.random.default_rng(1)),
+                                  trajectoire(profil, DEBUT, 50, np.random.default_rng(1)))
+
+
+@pytest.mark.parametrize("budget", [400 * 8 * 3, 7 * 400 * 8 * 3, 2 ** 30])
+def test_independant_du_budget_memoire(profil, budget):
+    reference = projeter_scenarios(profil, DEBUT, 400, nb_scenarios=50, graine=0, budget_memoire=2 ** 30)
+    bandes, totaux = projeter_scenarios(profil, DEBUT, 400, nb_scenarios=50, graine=0, budget_memoire=budget)
+    pd.testing.assert_frame_equal(bandes, reference[0], rtol=1e-12)
+    pd.testing.assert_frame_equal(totaux, reference[1], rtol=1e-12)
+
+
+def test_bandes_ordonnees(profil):
+    bandes, totaux = projeter_scenarios(profil, DEBUT, 365, nb_scenarios=500, graine=0, centiles=(10, 50, 90))
+    assert len(bandes) == 13 and len(totaux) == 500
+    assert bandes["mois"].iloc[0] == "2025-04" and bandes["mois"].iloc[-1] == "2026-04"
+    for nom in ("kWh", "Montant ($)"):
+        assert (bandes[f"{nom}_P10"] <= bandes[f"{nom}_P50"]).all()
+        assert (bandes[f"{nom}_P50"] <= bandes[f"{nom}_P90"]).all()
+        assert (bandes[f"{nom}_P10"] < bandes[f"{nom}_P90"]).all()
+    # La médiane mensuelle reste proche du profil (bruit relatif de 5 % par jour).
+    attendu = trajectoire(profil, DEBUT, 365, np.random.default_rng(0), ecart_bruit=0, ecart_temperature=0)
+    mensuel = attendu.groupby(attendu["date"].dt.to_period("M").astype(str))["kWh"].sum()
+    assert bandes.set_index("mois")["kWh_P50"].to_numpy() == pytest.approx(mensuel.to_numpy(), rel=0.01)
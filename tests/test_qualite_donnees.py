@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from qualite_donnees import analyser
+
+
+@pytest.fixture(scope="module")
+def bilan():
+    """Série de mars à novembre 2023 : trou de 54 h en juin, heure avancée sautée, heure normale répétée."""
+    heures = pd.date_range("2023-03-01", "2023-11-30 23:00", freq="h")
+    heures = heures[(heures < "2023-06-01") | (heures > "2023-06-03 05:00")]
+    heures = heures[heures != pd.Timestamp("2023-03-12 02:00")]
+    heures = heures.append(pd.DatetimeIndex([pd.Timestamp("2023-11-05 01:00")]))
+    return analyser(pd.DataFrame({"Datetime": heures}))
+
+
+def test_trou_seul_rapporte(bilan):
+    assert len(bilan.trous) == 1
+    trou = bilan.trous.iloc[0]
+    assert (trou["Début"], trou["Fin"]) == (pd.Timestamp("2023-06-01"), pd.Timestamp("2023-06-03 05:00"))
+    assert trou["Heures manquantes"] == 54 == bilan.heures_manquantes
+    assert bilan.doublons.empty
+    assert bilan.nb_attendues - bilan.nb_lignes == 54 - 1
+
+
+def test_changements_d_heure(bilan):
+    constats = dict(zip(bilan.changements_heure["Changement"], bilan.changements_heure["Constat"]))
+    assert constats == {"heure avancée": "heure sautée", "heure normale": "heure répétée : 2 ligne(s)"}
+
+
+@pytest.mark.parametrize("debut, fin, attendu", [
+    ("2023-03-11", "2023-03-13", True),
+    ("2023-10-01", "2023-11-10", True),
+    ("2023-05-31", "2023-06-01", False),
+    ("2023-06-02", "2023-06-02 12:00", False),
+    ("2023-06-03 05:00", "2023-06-10", False),
+    ("2023-06-03 06:00", "2023-06-10", True),
+    ("2023-02-28", "2023-03-02", False),
+])
+def test_est_complet(bilan, debut, fin, attendu):
+    assert bilan.est_complet(debut, fin) == attendu
+
+
+@pytest.mark.parametrize("coupe", ["2023-03-12 01:00", "2023-05-31 23:00", "2023-06-03 06:00", "2023-11-05 01:00",
+                                   "2023-11-05 00:00", "2023-11-29 00:00"])
+def test_bilan_prolonge_comme_le_bilan_complet(coupe):
+    heures = pd.date_range("2023-03-01", "2023-11-30 23:00", freq="h")
+    heures = heures[(heures < "2023-06-01") | (heures > "2023-06-03 05:00")]
+    heures = heures[heures != pd.Timestamp("2023-03-12 02:00")]
+    doublons = pd.date_range("2023-11-04 22:00", "2023-11-05 03:00", freq="h")
+    heures = heures.append(doublons).sort_values()
+    complet = analyser(pd.DataFrame({"Datetime": heures}))
+
+    dernier = pd.Timestamp(coupe)
+    debut = analyser(pd.DataFrame({"Datetime": heures[heures <= dernier]}))
+    suite = analyser(pd.DataFrame({"Datetime": heures[heures > dernier].insert(0, dernier)}))
+    prolonge = debut.prolonger(suite)
+    assert (prolonge.premier, prolonge.dernier, prolonge.nb_lignes, prolonge.nb_attendues) == \
+        (complet.premier, complet.dernier, complet.nb_lignes, complet.nb_attendues)
+    for tableau in ("trous", "doublons", "changements_heure"):
+        pd.testing.assert_frame_equal(getattr(prolonge, tableau), getattr(complet, tableau), check_dtype=False)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pytest
+
+from regression import ajouter_droites, ajuster_degres_jours, ajuster_droite
+
+
+def test_droite_comme_polyfit():
+    generateur = np.random.default_rng(0)
+    x = generateur.uniform(-20, 30, 500)
+    y = 3.5 - 1.2 * x + generateur.normal(0, 2, 500)
+    x[::50] = np.nan
+    droite = ajuster_droite(x, y)
+    valides = np.isfinite(x)
+    pente, ordonnee = np.polyfit(x[valides], y[valides], 1)
+    assert (droite.pente, droite.ordonnee) == pytest.approx((pente, ordonnee), rel=1e-10)
+    assert droite.r2 == pytest.approx(np.corrcoef(x[valides], y[valides])[0, 1] ** 2, rel=1e-10)
+    assert droite.n == valides.sum()
+    assert np.isnan(ajuster_droite([1.0, 1.0], [2.0, 3.0]).pente)
+
+
+def test_modele_degres_jours_retrouve_ses_parametres():
+    generateur = np.random.default_rng(1)
+    temperature = generateur.uniform(-25, 28, 2000)
+    groupes = np.repeat(["a", "b"], 1000)
+    equilibre = np.where(groupes == "a", 16.0, 13.5)
+    base = np.where(groupes == "a", 12.0, 20.0)
+    pente = np.where(groupes == "a", 2.0, 0.8)
+    conso = base + pente * np.clip(equilibre - temperature, 0, None) + generateur.normal(0, 0.5, 2000)
+
+    modele = ajuster_degres_jours(temperature, conso, groupes=groupes).tableau()
+    assert modele.loc["a", "temperature_equilibre"] == pytest.approx(16.0, abs=0.25)
+    assert modele.loc["b", "temperature_equilibre"] == pytest.approx(13.5, abs=0.25)
+    assert modele["base"].tolist() == pytest.approx([12.0, 20.0], abs=0.3)
+    assert modele["pente"].tolist() == pytest.approx([2.0, 0.8], rel=0.03)
+    assert (modele["r2"] > 0.95).all()
+
+
+def test_modele_sans_chauffage_constant():
+    temperature = np.linspace(-10, 30, 100)
+    modele = ajuster_degres_jours(temperature, 5 + 0.1 * temperature)
+    assert np.isnan(modele.temperature_equilibre[0]) and modele.pente[0] == 0
+    assert modele.predire([0.0, 20.0]) == pytest.approx([6.0, 6.0])
+
+
+def test_une_droite_par_serie():
+    generateur = np.random.default_rng(2)
+    df = pd.DataFrame({"x": generateur.uniform(0, 10, 90), "groupe": np.repeat(["a", "b", "c"], 30)})
+    df["y"] = df["x"] * df["groupe"].map({"a": 1.0, "b": 2.0, "c": -1.0}) + generateur.normal(0, 0.1, 90)
+    fig = ajouter_droites(px.scatter(df, x="x", y="y", color="groupe"))
+    points, droites = fig.data[:3], fig.data[3:]
+    assert len(droites) == 3
+    for trace, droite in zip(points, droites):
+        attendue = ajuster_droite(trace.x, trace.y)
+        assert droite.mode == "lines" and droite.legendgroup == trace.legendgroup
+        assert droite.line.color == trace.marker.color
+        assert list(droite.y) == pytest.approx(list(attendue.predire(droite.x)))
+        assert (min(droite.x), max(droite.x)) == (min(trace.x), max(trace.x))
@@ -0,0 +1,49 @@
+import multiprocessing
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from rendu_figures import ImageDifferee, RenduFigures, SpecCamembert, SpecCourbe, rendre_image
+
+avec_fork = pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="rendu en série sans fork")
+
+
+def _specs():
+    x = np.linspace(0, 10, 50)
+    return [SpecCourbe(f"courbe {i}", x, np.sin(x + i)) for i in range(4)] + [SpecCamembert("parts", [1, 2, 3], ["a", "b", "c"])]
+
+
+def test_en_serie_avec_un_processus():
+    specs = _specs()
+    with RenduFigures(1) as rendu:
+        images = [rendu.soumettre(spec) for spec in specs]
+        assert rendu.en_serie and rendu._pool is None
+        assert all(image.prete() for image in images)
+    assert [image.resultat() for image in images] == [rendre_image(spec) for spec in specs]
+
+
+@avec_fork
+def test_parallele_identique_au_rendu_en_serie_et_dans_l_ordre():
+    specs = _specs()
+    with RenduFigures(1) as rendu:
+        en_serie = [rendu.soumettre(spec).resultat() for spec in specs]
+    with RenduFigures(3) as rendu:
+        differees = [rendu.soumettre(spec) for spec in specs]
+        en_parallele = [image.resultat() for image in differees]
+        assert not rendu.en_serie
+    assert len(set(en_serie)) == len(specs)
+    assert en_parallele == en_serie
+
+
+def test_pool_interrompu_rendu_en_serie():
+    spec = _specs()[0]
+    futur = Future()
+    futur.set_exception(BrokenProcessPool("processus de travail interrompu"))
+    rendu = RenduFigures(2)
+    image = ImageDifferee(rendu, spec, futur=futur)
+    assert image.resultat() == rendre_image(spec)
+    assert rendu.en_serie
+    # Les figures suivantes ne passent plus par le pool.
+    assert rendu.soumettre(spec).prete() and rendu._pool is None
@@ -0,0 +1,63 @@
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import pytest
+
+from donnees_synthetiques import generer_horaire
+from service_requetes import ServiceRequetes, creer_serveur
+
+
+@pytest.fixture(scope="module")
+def serveur(tmp_path_factory):
+    dossier = tmp_path_factory.mktemp("service")
+    horaire = dossier / "horaire.csv"
+    generer_horaire(horaire, 24 * 62, debut="2024-01-01", taux_trous=0)
+    service = ServiceRequetes(horaire, None)
+    serveur = creer_serveur(service, port=0)
+    fil = threading.Thread(target=serveur.serve_forever, daemon=True)
+    fil.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def _get(serveur, chemin, **parametres):
+    url = f"http://127.0.0.1:{serveur.server_address[1]}/{chemin}?{urlencode(parametres)}"
+    try:
+        with urlopen(url) as reponse:
+            return reponse.status, json.load(reponse)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_fin_date_seule_couvre_la_journee(serveur):
+    code, reponse = _get(serveur, "horaire", debut="2024-01-01", fin="2024-01-31", agregat="count")
+    assert code == 200
+    assert reponse["lignes_source"] == 31 * 24
+    code, reponse = _get(serveur, "horaire", debut="2024-01-31T05:00", fin="2024-01-31T07:00", agregat="count")
+    assert reponse["lignes_source"] == 3
+
+
+@pytest.mark.parametrize("parametres", [
+    {"debut": "2019-01-02T00:00Z"},
+    {"fin": "pas une date"},
+    {"heures": "20-17"},
+    {"heures": "0-24"},
+])
+def test_parametres_invalides(serveur, parametres):
+    code, reponse = _get(serveur, "horaire", **parametres)
+    assert code == 400
+    assert "erreur" in reponse
+
+
+def test_erreur_interne(serveur, monkeypatch):
+    def echouer(source, parametres):
+        raise RuntimeError("panne")
+
+    monkeypatch.setattr(serveur.service, "_calculer", echouer)
+    code, reponse = _get(serveur, "horaire", colonne="inexistante-500")
+    assert code == 500
+    assert reponse["erreur"] == "erreur interne : RuntimeError"
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from sous_echantillonnage import lttb, minmax, sous_echantillonner
+
+
+def _serie(n=10_000):
+    x = pd.date_range("2020-01-01", periods=n, freq="h").to_numpy()
+    y = np.sin(np.arange(n) / 200) + np.random.default_rng(0).normal(0, 0.05, n)
+    return x, y
+
+
+def test_lttb_extremites_et_un_point_par_seau():
+    x, y = _serie()
+    indices = lttb(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+    bords = np.linspace(1, len(y) - 1, 499).astype(np.int64)
+    assert np.array_equal(np.searchsorted(bords, indices[1:-1], side="right"), np.arange(1, 499))
+
+
+def test_lttb_garde_un_pic_isole():
+    x, y = _serie()
+    y[4321] = 50.0
+    assert 4321 in lttb(x, y, 200)
+
+
+def test_serie_plus_courte_que_le_budget():
+    x, y = _serie(100)
+    assert np.array_equal(lttb(x, y, 500), np.arange(100))
+    assert np.array_equal(minmax(x, y, 500), np.arange(100))
+
+
+def test_minmax_garde_les_extremes():
+    x, y = _serie()
+    indices = minmax(x, y, 200)
+    assert {0, len(y) - 1, int(np.argmin(y)), int(np.argmax(y))} <= set(indices.tolist())
+
+
+def test_valeurs_manquantes_ignorees():
+    x, y = _serie()
+    y[::10] = np.nan
+    xs, ys = sous_echantillonner(x, y, 300)
+    assert len(ys) == 300 and not np.isnan(ys).any()
+    assert xs[0] == x[1] and xs[-1] == x[-1]
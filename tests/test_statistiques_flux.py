@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from statistiques_flux import AccumulateurColonne, CroquisKLL
+
+PROBABILITES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def _erreur_de_rang(croquis, valeurs):
+    triees = np.sort(valeurs)
+    quantiles = croquis.quantiles(PROBABILITES)
+    return max(abs(np.searchsorted(triees, quantiles[p]) / len(valeurs) - p) for p in PROBABILITES)
+
+
+@pytest.mark.parametrize("graine", range(3))
+def test_kll_erreur_de_rang_bornee(graine):
+    valeurs = np.random.default_rng(graine).lognormal(3, 1, 200_000)
+    croquis = CroquisKLL(0.01, graine=graine)
+    for bloc in np.array_split(valeurs, 40):
+        croquis.ajouter(bloc)
+    assert croquis.n == len(valeurs)
+    assert _erreur_de_rang(croquis, valeurs) <= 0.01
+    assert sum(tampon.size for tampon in croquis.niveaux) < len(valeurs) / 100
+
+
+def test_kll_fusion_comme_un_seul_croquis():
+    valeurs = np.random.default_rng(0).normal(0, 1, 100_000)
+    gauche, droite = CroquisKLL(0.01, graine=0), CroquisKLL(0.01, graine=1)
+    gauche.ajouter(valeurs[:30_000])
+    droite.ajouter(valeurs[30_000:])
+    gauche.fusionner(droite)
+    assert gauche.n == len(valeurs)
+    assert _erreur_de_rang(gauche, valeurs) <= 0.01
+
+
+def test_accumulateur_exact_par_blocs():
+    valeurs = np.random.default_rng(0).normal(100, 15, 10_000)
+    valeurs[::97] = np.nan
+    accumulateur = AccumulateurColonne()
+    for bloc in np.array_split(valeurs, 7):
+        accumulateur.ajouter(bloc)
+    presentes = valeurs[~np.isnan(valeurs)]
+    assert accumulateur.manquantes == np.isnan(valeurs).sum()
+    assert (accumulateur.minimum, accumulateur.maximum) == (presentes.min(), presentes.max())
+    assert accumulateur.moyenne == pytest.approx(presentes.mean(), rel=1e-12)
+    assert accumulateur.ecart_type == pytest.approx(presentes.std(ddof=1), rel=1e-9)
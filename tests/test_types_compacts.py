@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from types_compacts import SAISONS, SCHEMA_HORAIRE, compacter
+
+
+def _horaire(nb_heures=24 * 60):
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2024-01-01", periods=nb_heures, freq="h")
+    volume = np.round(rng.uniform(16_000, 40_000, nb_heures), 3)
+    return pd.DataFrame({
+        "Filename": np.where(np.arange(nb_heures) % 2, "a.csv", "b.csv"),
+        "Date": dates,
+        "mois": dates.month, "jour": dates.day, "Heure": dates.hour, "Année": dates.year,
+        "Saison": np.array(SAISONS)[dates.month % 4],
+        "Volume (MWh)": volume,
+        "Volume net (MWh)": np.where(np.arange(nb_heures) % 97 == 0, np.nan, volume - 0.001),
+        "diff": np.diff(volume, prepend=np.nan),
+    })
+
+
+def test_compacter_horaire_types_et_valeurs():
+    df = _horaire()
+    compact = compacter(df.copy(), SCHEMA_HORAIRE)
+
+    assert isinstance(compact["Filename"].dtype, pd.CategoricalDtype)
+    assert list(compact["Saison"].cat.categories) == SAISONS
+    assert compact["Année"].dtype == np.int16 and compact["Heure"].dtype == np.int8
+    assert compact["mois"].dtype == np.int8 and compact["jour"].dtype == np.int8
+    assert compact["Date"].dtype == df["Date"].dtype
+    # Règle "*" : "exacte", les volumes restent en float64, même au-delà de 16 384 MWh.
+    assert compact["Volume (MWh)"].dtype == np.float64 and compact["Volume net (MWh)"].dtype == np.float64
+    assert compact["diff"].dtype == np.float32
+
+    exactes = [c for c in df.columns if c != "diff"]
+    pd.testing.assert_frame_equal(compact[exactes], df[exactes], check_dtype=False, check_categorical=False)
+    assert compact["Volume (MWh)"].sum() == df["Volume (MWh)"].sum()
+    pd.testing.assert_series_equal(compact["diff"].astype(np.float64), df["diff"], check_exact=False, rtol=1e-6)
+
+
+def test_calendrier_incomplet_en_float32():
+    df = pd.DataFrame({"mois": [1.0, np.nan, 12.0], "Heure": [0.0, 5.0, 23.0]})
+    compact = compacter(df.copy(), SCHEMA_HORAIRE)
+    assert compact["mois"].dtype == np.float32 and compact["Heure"].dtype == np.int8
+    pd.testing.assert_frame_equal(compact, df, check_dtype=False)
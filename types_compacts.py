@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+SAISONS = ["Hiver", "Printemps", "Été", "Automne"]
+
+# Type de chaque colonne : "mesure" (float32), "exacte" (float64 conservé), "calendrier" (plus petit
+# entier suffisant, float32 s'il manque des valeurs), "categorie" (catégories triées) ou liste ordonnée
+# des catégories. Les autres colonnes float64 suivent la règle "*" du schéma (défaut : "mesure").
+# Les volumes horaires (MWh à trois décimales, jusqu'à ~40 000) ne tiennent pas exactement en float32
+# au-delà de 16 384 : ils restent en float64 pour que les statistiques affichées soient celles du CSV.
+SCHEMA_HORAIRE = {
+    "Filename": "categorie",
+    "mois": "calendrier",
+    "jour": "calendrier",
+    "Heure": "calendrier",
+    "Année": "calendrier",
+    "Saison": SAISONS,
+    "diff": "mesure",
+    "*": "exacte",
+}
+SCHEMA_JOURNALIER = {
+    "Intervalle": "categorie",
+    "mois": "categorie",
+    "année": "calendrier",
+    "jour": "calendrier",
+    "Saison": SAISONS,
+    "kWh": "mesure",
+    "Montant ($)": "mesure",
+    "Température moyenne (°C)": "mesure",
+    "Degrés-jours": "mesure",
+}
+
+
+def _calendrier(serie):
+    if serie.isna().any():
+        return serie.astype(np.float32)
+    entiers = pd.to_numeric(serie, downcast="integer")
+    return entiers if entiers.dtype.kind in "iu" else serie.astype(np.float32)
+
+
+def compacter(df, schema):
+    """Convertit en place les colonnes de `df` vers les types compacts du schéma et retourne `df`."""
+    for col in df.columns:
+        regle = schema.get(col, schema.get("*", "mesure") if df[col].dtype == np.float64 else None)
+        if regle is None or regle == "exacte":
+            continue
+        if isinstance(regle, list):
+            if not isinstance(df[col].dtype, pd.CategoricalDtype) or list(df[col].cat.categories) != regle:
+                df[col] = pd.Categorical(df[col], categories=regle)
+        elif regle == "categorie":
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+        elif regle == "mesure":
+            if df[col].dtype.kind == "f" and df[col].dtype != np.float32:
+                df[col] = df[col].astype(np.float32)
+        elif regle == "calendrier" and df[col].dtype.kind in "fiu":
+            df[col] = _calendrier(df[col])
+    return df
+
+
+def empreinte(df):
+    """Mémoire occupée par un DataFrame, chaînes et catégories comprises (octets)."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def rapport_memoire(df, nom):
+    octets = empreinte(df)
+    par_ligne = octets / len(df) if len(df) else 0
+    return f"{nom} : {len(df)} lignes, {octets / 2 ** 20:.1f} Mio ({par_ligne:.0f} octets/ligne)"